@@ -7,216 +7,39 @@ Autor: OCR Tool Team
 
 import os
 import sys
+import importlib
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
-from PIL import Image, ImageTk, ImageEnhance, ImageFilter
-import pytesseract
-import cv2
-import numpy as np
-import pandas as pd
 from datetime import datetime
 import threading
-import json
 import traceback
 import webbrowser
 from pathlib import Path
 
-# ============================================================================
-# CONFIGURACIÓN Y UTILIDADES
-# ============================================================================
+# Solo módulos ligeros al arrancar: OpenCV, NumPy, pandas, PIL y Tesseract
+# se importan dentro de los métodos que los usan (y se precargan en segundo
+# plano cuando la ventana ya está visible). benchmarks/bench_arranque.py
+# comprueba que siga siendo así.
+from utils.configuracion import ConfigManager
+from utils.instrumentacion import Perfilador, PesosEtapas
+from utils.tabla_virtual import TablaVirtual
+from utils.visor_piramide import VisorPiramide
+from utils.planificador import Planificador, PENDIENTE, EN_CURSO, COMPLETADO, ERROR
+from utils.localizar_tesseract import localizar_tesseract
 
-class ConfigManager:
-    """Gestor de configuración de la aplicación"""
-    
-    DEFAULT_CONFIG = {
-        "app": {
-            "version": "3.0",
-            "language": "es",
-            "theme": "light",
-            "auto_save": True,
-            "auto_export": False
-        },
-        "paths": {
-            "tesseract": "",
-            "last_folder": "",
-            "export_folder": "exportados",
-            "tessdata": "tessdata"
-        },
-        "ocr": {
-            "language": "eng",
-            "psm": "6",
-            "oem": "3",
-            "dpi": "300"
-        },
-        "preprocessing": {
-            "grayscale": True,
-            "denoise": True,
-            "contrast": 1.5,
-            "brightness": 1.0,
-            "threshold": "adaptive",
-            "deskew": True
-        },
-        "ui": {
-            "font_size": 10,
-            "font_family": "Segoe UI",
-            "show_grid": True,
-            "alternate_colors": True
-        }
-    }
-    
-    def __init__(self):
-        self.config_file = "config/settings.json"
-        self.load_config()
-        
-    def load_config(self):
-        """Cargar configuración desde archivo"""
-        try:
-            if os.path.exists(self.config_file):
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    self.config = json.load(f)
-                # Actualizar con valores por defecto si faltan
-                for section, values in self.DEFAULT_CONFIG.items():
-                    if section not in self.config:
-                        self.config[section] = values
-                    else:
-                        for key, value in values.items():
-                            if key not in self.config[section]:
-                                self.config[section][key] = value
-            else:
-                self.config = self.DEFAULT_CONFIG.copy()
-                self.save_config()
-        except Exception as e:
-            print(f"Error cargando configuración: {e}")
-            self.config = self.DEFAULT_CONFIG.copy()
-            
-    def save_config(self):
-        """Guardar configuración en archivo"""
-        try:
-            os.makedirs(os.path.dirname(self.config_file), exist_ok=True)
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(self.config, f, indent=4, ensure_ascii=False)
-        except Exception as e:
-            print(f"Error guardando configuración: {e}")
-            
-    def get(self, key, default=None):
-        """Obtener valor de configuración"""
-        try:
-            keys = key.split('.')
-            value = self.config
-            for k in keys:
-                value = value[k]
-            return value
-        except:
-            return default
-            
-    def set(self, key, value):
-        """Establecer valor de configuración"""
-        try:
-            keys = key.split('.')
-            config = self.config
-            for k in keys[:-1]:
-                if k not in config:
-                    config[k] = {}
-                config = config[k]
-            config[keys[-1]] = value
-            self.save_config()
-        except Exception as e:
-            print(f"Error guardando configuración {key}: {e}")
+# Módulos pesados precargados tras mostrar la ventana
+MODULOS_DIFERIDOS = (
+    'PIL.ImageTk',
+    'utils.piramide',
+    'utils.procesador',
+    'utils.motor_ocr',
+    'utils.modelo_tabla',
+    'utils.tablas_regladas',
+    'utils.exportadores',
+)
 
-class ImageProcessor:
-    """Procesador de imágenes para OCR"""
-    
-    @staticmethod
-    def preprocess_image(image, config):
-        """Preprocesar imagen para mejorar OCR"""
-        try:
-            # Convertir PIL a OpenCV
-            if image.mode != 'RGB':
-                img_cv = cv2.cvtColor(np.array(image), cv2.COLOR_GRAY2BGR)
-            else:
-                img_cv = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-            
-            # Convertir a escala de grises
-            gray = cv2.cvtColor(img_cv, cv2.COLOR_BGR2GRAY)
-            
-            # Aplicar configuración de preprocesamiento
-            if config.get('preprocessing.grayscale', True):
-                pass  # Ya está en escala de grises
-            
-            if config.get('preprocessing.denoise', True):
-                gray = cv2.medianBlur(gray, 3)
-            
-            # Ajustar brillo y contraste
-            alpha = config.get('preprocessing.contrast', 1.5)
-            beta = config.get('preprocessing.brightness', 1.0) * 50 - 50
-            gray = cv2.convertScaleAbs(gray, alpha=alpha, beta=beta)
-            
-            # Umbralización
-            threshold_type = config.get('preprocessing.threshold', 'adaptive')
-            if threshold_type == 'adaptive':
-                thresh = cv2.adaptiveThreshold(
-                    gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-                    cv2.THRESH_BINARY, 11, 2
-                )
-            elif threshold_type == 'otsu':
-                _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-            else:
-                _, thresh = cv2.threshold(gray, 150, 255, cv2.THRESH_BINARY)
-            
-            # Enderezar imagen si está configurado
-            if config.get('preprocessing.deskew', True):
-                thresh = ImageProcessor.deskew_image(thresh)
-            
-            return thresh
-            
-        except Exception as e:
-            print(f"Error en preprocesamiento: {e}")
-            return np.array(image.convert('L'))
-    
-    @staticmethod
-    def deskew_image(image):
-        """Enderezar imagen inclinada"""
-        try:
-            # Encontrar contornos de texto
-            coords = np.column_stack(np.where(image > 0))
-            
-            if len(coords) < 10:
-                return image
-            
-            # Calcular ángulo de inclinación
-            angle = cv2.minAreaRect(coords)[-1]
-            
-            if angle < -45:
-                angle = 90 + angle
-            elif angle > 45:
-                angle = angle - 90
-            
-            # Rotar imagen para corregir
-            if abs(angle) > 1.0:
-                (h, w) = image.shape[:2]
-                center = (w // 2, h // 2)
-                M = cv2.getRotationMatrix2D(center, angle, 1.0)
-                image = cv2.warpAffine(image, M, (w, h),
-                                     flags=cv2.INTER_CUBIC,
-                                     borderMode=cv2.BORDER_REPLICATE)
-            
-            return image
-            
-        except:
-            return image
-    
-    @staticmethod
-    def resize_for_display(image, max_width=800, max_height=600):
-        """Redimensionar imagen para visualización"""
-        width, height = image.size
-        
-        if width > max_width or height > max_height:
-            ratio = min(max_width/width, max_height/height)
-            new_width = int(width * ratio)
-            new_height = int(height * ratio)
-            return image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-        
-        return image
+# Prioridad de los trabajos lanzados con "Procesar OCR" (el usuario espera el resultado)
+PRIORIDAD_INTERACTIVA = 10
 
 # ============================================================================
 # INTERFAZ GRÁFICA PRINCIPAL
@@ -233,16 +56,31 @@ class OCRApp:
         # Configuración
         self.config = ConfigManager()
         
+        # Duración medida de cada etapa (reparte la barra de progreso)
+        self.stage_weights = PesosEtapas("config/pesos_etapas.json")
+        self.last_profile = None
+        
         # Variables de estado
         self.image_path = None
         self.original_image = None
         self.preview_image = None
+        self.pyramid = None
         self.ocr_text = ""
-        self.ocr_data = []
+        self.ocr_data = []  # TablaOCR en cuanto hay resultados
         self.headers = []
+        self.ocr_from_cache = False
         self.processing = False
         
-        # Configurar Tesseract
+        # Cola de trabajos (varios documentos en un número fijo de hilos)
+        self.active_job = None
+        self.scheduler = Planificador(self._run_job,
+                                      hilos=int(self.config.get("jobs.workers", 2)),
+                                      al_cambiar=self._job_changed)
+        
+        # Configurar Tesseract en segundo plano (y de nuevo si cambia su ruta)
+        self.tesseract_info = None
+        self.config.suscribir(lambda key, value: self._apply_tesseract_path(value),
+                              "paths.tesseract")
         self.setup_tesseract()
         
         # Configurar interfaz
@@ -255,38 +93,26 @@ class OCRApp:
         # Cargar última imagen si existe
         self.load_last_image()
         
+        # Precargar OpenCV/pandas/Tesseract cuando la ventana ya se ve
+        self.root.after(200, self._preload_modules)
+        
     def setup_tesseract(self):
-        """Configurar Tesseract OCR"""
-        try:
-            # Intentar encontrar Tesseract automáticamente
-            tesseract_path = self.config.get("paths.tesseract", "")
-            
-            if tesseract_path and os.path.exists(tesseract_path):
-                pytesseract.pytesseract.tesseract_cmd = tesseract_path
-                return True
-            
-            # Rutas comunes
-            common_paths = [
-                r"C:\Program Files\Tesseract-OCR\tesseract.exe",
-                r"C:\Program Files (x86)\Tesseract-OCR\tesseract.exe",
-                "/usr/bin/tesseract",
-                "/usr/local/bin/tesseract"
-            ]
-            
-            for path in common_paths:
-                if os.path.exists(path):
-                    pytesseract.pytesseract.tesseract_cmd = path
-                    self.config.set("paths.tesseract", path)
-                    return True
-            
-            # Si no se encuentra, intentar usar el del PATH
-            import shutil
-            tesseract_cmd = shutil.which("tesseract")
-            if tesseract_cmd:
-                pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
-                self.config.set("paths.tesseract", tesseract_cmd)
-                return True
-            
+        """Localizar Tesseract sin bloquear el arranque"""
+        def discover():
+            try:
+                # Memorizado en config/tesseract.json; solo se vuelve a
+                # sondear si cambia el ejecutable o su carpeta tessdata
+                info = localizar_tesseract(self.config.get("paths.tesseract", ""))
+            except Exception as e:
+                print(f"Error configurando Tesseract: {e}")
+                info = None
+            self.root.after(0, lambda: self._tesseract_ready(info))
+        
+        threading.Thread(target=discover, daemon=True).start()
+    
+    def _tesseract_ready(self, info):
+        """Aplicar el resultado de la búsqueda de Tesseract"""
+        if info is None:
             messagebox.showwarning(
                 "Tesseract no encontrado",
                 "Tesseract OCR no está instalado o configurado.\n\n"
@@ -296,10 +122,28 @@ class OCRApp:
                 "Luego configura la ruta en: Configuración → Tesseract Path"
             )
             return False
-            
-        except Exception as e:
-            print(f"Error configurando Tesseract: {e}")
-            return False
+        
+        self.tesseract_info = info
+        self._apply_tesseract_path(info['ruta'])
+        self.config.set("paths.tesseract", info['ruta'])
+        return True
+    
+    def _apply_tesseract_path(self, path):
+        """Usar un ejecutable de Tesseract (pytesseract se importa aquí)"""
+        if path and os.path.exists(path):
+            import pytesseract
+            pytesseract.pytesseract.tesseract_cmd = path
+    
+    def _preload_modules(self):
+        """Importar en segundo plano los módulos pesados antes de que se usen"""
+        def preload():
+            for module in MODULOS_DIFERIDOS:
+                try:
+                    importlib.import_module(module)
+                except Exception as e:
+                    print(f"No se pudo precargar {module}: {e}")
+        
+        threading.Thread(target=preload, daemon=True).start()
     
     def setup_styles(self):
         """Configurar estilos de la aplicación"""
@@ -401,8 +245,8 @@ class OCRApp:
         self.file_label = ttk.Label(left_panel, text="Ninguna imagen seleccionada")
         self.file_label.pack(anchor=tk.W, pady=(0, 10))
         
-        # Canvas para vista previa
-        self.preview_canvas = tk.Canvas(left_panel, bg='black',
+        # Canvas para vista previa (pirámide de resoluciones con zoom y desplazamiento)
+        self.preview_canvas = VisorPiramide(left_panel, bg='black',
                                        highlightthickness=1,
                                        highlightbackground='#cccccc')
         self.preview_canvas.pack(fill=tk.BOTH, expand=True)
@@ -455,6 +299,11 @@ class OCRApp:
         # Treeview para tabla
         self.create_table_widget(table_tab)
         
+        # Pestaña 3: Cola de trabajos
+        jobs_tab = ttk.Frame(self.notebook)
+        self.notebook.add(jobs_tab, text="⏱️ Cola de Trabajos")
+        self.create_jobs_widget(jobs_tab)
+        
         # ========== PANEL INFERIOR ==========
         bottom_frame = ttk.Frame(main_frame)
         bottom_frame.pack(fill=tk.X, pady=(10, 0))
@@ -487,35 +336,55 @@ class OCRApp:
     
     def create_table_widget(self, parent):
         """Crear widget de tabla para mostrar resultados"""
-        # Frame para la tabla con scrollbars
-        table_frame = ttk.Frame(parent)
-        table_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-        
-        # Scrollbars
-        v_scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL)
-        h_scrollbar = ttk.Scrollbar(table_frame, orient=tk.HORIZONTAL)
+        # Tabla virtualizada: solo existen los ítems de las filas visibles
+        self.table_view = TablaVirtual(parent)
+        self.table_view.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.tree = self.table_view.tree
         
-        # Treeview
-        self.tree = ttk.Treeview(table_frame,
-                                yscrollcommand=v_scrollbar.set,
-                                xscrollcommand=h_scrollbar.set,
-                                selectmode='extended',
-                                show='headings')
+        # Configurar doble clic para editar
+        self.tree.bind('<Double-1>', self.edit_cell)
+    
+    def create_jobs_widget(self, parent):
+        """Crear la lista de trabajos con sus controles"""
+        jobs_controls = ttk.Frame(parent)
+        jobs_controls.pack(fill=tk.X, padx=5, pady=5)
+        
+        ttk.Button(jobs_controls, text="➕ Añadir",
+                  command=self.add_jobs,
+                  style='Secondary.TButton').pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(jobs_controls, text="⬆️ Subir",
+                  command=lambda: self.change_job_priority(1),
+                  style='Secondary.TButton').pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(jobs_controls, text="⬇️ Bajar",
+                  command=lambda: self.change_job_priority(-1),
+                  style='Secondary.TButton').pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(jobs_controls, text="⛔ Cancelar",
+                  command=self.cancel_jobs,
+                  style='Secondary.TButton').pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(jobs_controls, text="👁️ Ver Resultado",
+                  command=self.show_job_result,
+                  style='Secondary.TButton').pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(jobs_controls, text="🧹 Quitar Terminados",
+                  command=self.clear_finished_jobs,
+                  style='Secondary.TButton').pack(side=tk.LEFT)
         
-        v_scrollbar.config(command=self.tree.yview)
-        h_scrollbar.config(command=self.tree.xview)
+        jobs_frame = ttk.Frame(parent)
+        jobs_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
-        # Layout
-        self.tree.grid(row=0, column=0, sticky=tk.NSEW)
-        v_scrollbar.grid(row=0, column=1, sticky=tk.NS)
-        h_scrollbar.grid(row=1, column=0, sticky=tk.EW)
+        columns = ('archivo', 'prioridad', 'estado', 'progreso', 'tiempo', 'mensaje')
+        self.jobs_tree = ttk.Treeview(jobs_frame, columns=columns, show='headings')
+        for column, title, width in (('archivo', "Archivo", 200), ('prioridad', "Prioridad", 70),
+                                     ('estado', "Estado", 90), ('progreso', "Progreso", 70),
+                                     ('tiempo', "Tiempo", 70), ('mensaje', "Mensaje", 220)):
+            self.jobs_tree.heading(column, text=title)
+            self.jobs_tree.column(column, width=width, minwidth=50)
         
-        # Configurar grid weights
-        table_frame.grid_columnconfigure(0, weight=1)
-        table_frame.grid_rowconfigure(0, weight=1)
+        scrollbar = ttk.Scrollbar(jobs_frame, orient=tk.VERTICAL, command=self.jobs_tree.yview)
+        self.jobs_tree.configure(yscrollcommand=scrollbar.set)
+        self.jobs_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
-        # Configurar doble clic para editar
-        self.tree.bind('<Double-1>', self.edit_cell)
+        self.jobs_tree.bind('<Double-1>', lambda e: self.show_job_result())
     
     def create_menu(self):
         """Crear menú de la aplicación"""
@@ -528,6 +397,8 @@ class OCRApp:
         file_menu.add_command(label="Abrir Imagen...", 
                              command=self.load_image, 
                              accelerator="Ctrl+O")
+        file_menu.add_command(label="Añadir a la Cola...",
+                             command=self.add_jobs)
         file_menu.add_separator()
         file_menu.add_command(label="Exportar a Excel...",
                              command=self.export_to_excel,
@@ -598,6 +469,21 @@ class OCRApp:
         """Configurar eventos adicionales"""
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
     
+    def on_closing(self):
+        """Cerrar la aplicación cancelando los trabajos de la cola"""
+        running = [job for job in self.scheduler.trabajos() if job.estado in (PENDIENTE, EN_CURSO)]
+        if running and not messagebox.askokcancel(
+                "Salir", f"Hay {len(running)} trabajo(s) sin terminar.\n¿Cancelarlos y salir?"):
+            return
+        
+        # Sin notificaciones: la ventana deja de existir
+        self.scheduler.al_cambiar = None
+        self.scheduler.cerrar()
+        
+        # Escribir los cambios de configuración aún no guardados
+        self.config.flush()
+        self.root.destroy()
+    
     def center_window(self):
         """Centrar ventana en pantalla"""
         self.root.update_idletasks()
@@ -621,7 +507,7 @@ class OCRApp:
     def load_image(self):
         """Cargar imagen desde archivo"""
         filetypes = [
-            ('Imágenes', '*.png *.jpg *.jpeg *.bmp *.tiff'),
+            ('Imágenes', '*.png *.jpg *.jpeg *.bmp *.tif *.tiff'),
             ('Todos los archivos', '*.*')
         ]
         
@@ -643,19 +529,30 @@ class OCRApp:
     def load_image_file(self, filename):
         """Cargar archivo de imagen"""
         try:
+            from PIL import Image
+            from utils.piramide import PiramideImagen
+            
             self.image_path = filename
             self.original_image = Image.open(filename)
             
+            # Niveles reducidos bajo demanda (JPEG: decodificados a 1/2-1/8)
+            self.pyramid = PiramideImagen(self.original_image, filename)
+            
             # Actualizar configuración
             self.config.set("paths.last_folder", os.path.dirname(filename))
             
             # Mostrar vista previa
             self.update_preview()
             
+            # TIFF multipágina: la vista previa es el primer fotograma y el
+            # OCR recorre todos de uno en uno (sin cargarlos a la vez)
+            frames = getattr(self.original_image, 'n_frames', 1)
+            pages = f" ({frames} fotogramas)" if frames > 1 else ""
+            
             # Actualizar interfaz
-            self.file_label.config(text=os.path.basename(filename))
+            self.file_label.config(text=os.path.basename(filename) + pages)
             self.process_btn.config(state='normal')
-            self.status_label.config(text=f"Imagen cargada: {os.path.basename(filename)}")
+            self.status_label.config(text=f"Imagen cargada: {os.path.basename(filename)}{pages}")
             
             # Limpiar resultados anteriores
             self.clear_results()
@@ -665,25 +562,12 @@ class OCRApp:
     
     def update_preview(self):
         """Actualizar vista previa de la imagen"""
-        if not self.original_image:
+        if not self.pyramid:
             return
         
         try:
-            # Redimensionar para vista previa
-            preview_image = ImageProcessor.resize_for_display(self.original_image, 400, 300)
-            
-            # Convertir para tkinter
-            self.tk_preview = ImageTk.PhotoImage(preview_image)
-            
-            # Actualizar canvas
-            self.preview_canvas.delete("all")
-            canvas_width = self.preview_canvas.winfo_width()
-            canvas_height = self.preview_canvas.winfo_height()
-            
-            if canvas_width > 1 and canvas_height > 1:
-                x = (canvas_width - preview_image.width) // 2
-                y = (canvas_height - preview_image.height) // 2
-                self.preview_canvas.create_image(x, y, anchor=tk.NW, image=self.tk_preview)
+            # Solo se generan las teselas visibles desde el nivel adecuado
+            self.preview_canvas.mostrar(self.pyramid)
             
             # Ocultar label de placeholder
             self.preview_label.place_forget()
@@ -692,105 +576,155 @@ class OCRApp:
             print(f"Error actualizando vista previa: {e}")
     
     def process_ocr(self):
-        """Iniciar procesamiento OCR"""
-        if self.processing or not self.original_image:
+        """Encolar la imagen actual con prioridad alta y mostrarla al terminar"""
+        if not self.image_path:
             return
         
-        # Actualizar estado
-        self.processing = True
-        self.process_btn.config(state='disabled')
-        self.progress_var.set(0)
-        self.status_label.config(text="Procesando OCR...")
-        
         # Limpiar resultados anteriores
         self.clear_results()
+        self.progress_var.set(0)
         
-        # Ejecutar en hilo separado
-        thread = threading.Thread(target=self._process_ocr_thread, daemon=True)
-        thread.start()
+        self.active_job = self.scheduler.encolar(self.image_path,
+                                                 prioridad=PRIORIDAD_INTERACTIVA,
+                                                 interactivo=True)
+        self.status_label.config(text="OCR en cola...")
+    
+    def add_jobs(self):
+        """Añadir imágenes o PDF a la cola de trabajos"""
+        filenames = filedialog.askopenfilenames(
+            title='Añadir documentos a la cola',
+            filetypes=[('Documentos', '*.png *.jpg *.jpeg *.bmp *.tif *.tiff *.pdf'),
+                       ('Todos los archivos', '*.*')],
+            initialdir=self.config.get("paths.last_folder", "")
+        )
+        
+        for filename in filenames:
+            self.scheduler.encolar(filename)
+        
+        if filenames:
+            self.config.set("paths.last_folder", os.path.dirname(filenames[0]))
+            self.notebook.select(2)
+            self.status_label.config(text=f"{len(filenames)} documento(s) añadidos a la cola")
+    
+    def _selected_jobs(self):
+        """Trabajos seleccionados en la lista"""
+        jobs = (self.scheduler.trabajo(int(item)) for item in self.jobs_tree.selection())
+        return [job for job in jobs if job is not None]
+    
+    def change_job_priority(self, delta):
+        """Subir o bajar la prioridad de los trabajos pendientes seleccionados"""
+        for job in self._selected_jobs():
+            self.scheduler.cambiar_prioridad(job.id, job.prioridad + delta)
+    
+    def cancel_jobs(self):
+        """Cancelar los trabajos seleccionados (pendientes o en curso)"""
+        for job in self._selected_jobs():
+            self.scheduler.cancelar(job.id)
+    
+    def clear_finished_jobs(self):
+        """Quitar de la lista los trabajos terminados"""
+        self.scheduler.quitar_terminados()
+        known = {str(job.id) for job in self.scheduler.trabajos()}
+        for item in self.jobs_tree.get_children():
+            if item not in known:
+                self.jobs_tree.delete(item)
+    
+    def show_job_result(self):
+        """Mostrar el resultado del trabajo seleccionado"""
+        jobs = self._selected_jobs()
+        if not jobs:
+            return
+        
+        job = jobs[0]
+        if job.estado == COMPLETADO:
+            self._ocr_completed(job, notify=False)
+        elif job.estado == ERROR:
+            messagebox.showerror("Error OCR", job.error)
+    
+    def _run_job(self, job):
+        """Procesar un trabajo de la cola (en un hilo del planificador)"""
+        from utils.motor_ocr import procesar_documento
+        
+        perfilador = Perfilador(trabajo=os.path.basename(job.ruta),
+                                progreso=job.avisar,
+                                pesos=self.stage_weights)
+        
+        # Ajustes capturados al empezar: cambiarlos no afecta a este trabajo
+        config = self.config.instantanea()
+        
+        # Imagen o PDF completo; job.avisar cancela entre etapas/páginas
+        resultado = procesar_documento(job.ruta, config, progreso=job.avisar,
+                                       perfilador=perfilador)
+        
+        # Registrar tiempos (solo los trabajos completos ajustan los pesos)
+        if perfilador.registros:
+            resultado['perfil'] = perfilador
+            if not resultado['desde_cache']:
+                self.stage_weights.actualizar(perfilador)
+            self._save_trace(perfilador, job)
+        
+        return resultado
+    
+    def _job_changed(self, job):
+        """Cambio de estado o progreso de un trabajo (llamado desde su hilo)"""
+        self.root.after(0, lambda: self._refresh_job(job))
+    
+    def _refresh_job(self, job):
+        """Actualizar la fila del trabajo y, si es el interactivo, la barra de progreso"""
+        item = str(job.id)
+        values = (os.path.basename(job.ruta), job.prioridad, job.estado,
+                  f"{job.progreso:.0f}%", f"{job.segundos():.1f}s", job.mensaje)
+        if self.jobs_tree.exists(item):
+            self.jobs_tree.item(item, values=values)
+        else:
+            self.jobs_tree.insert('', tk.END, iid=item, values=values)
+        
+        if job is not self.active_job:
+            return
+        
+        if job.estado in (PENDIENTE, EN_CURSO):
+            self.progress_var.set(job.progreso)
+            self.status_label.config(text=job.mensaje)
+        elif job.estado == COMPLETADO:
+            self.active_job = None
+            self._ocr_completed(job)
+        elif job.estado == ERROR:
+            self.active_job = None
+            self._ocr_failed(f"Error en OCR: {job.error}")
+        else:
+            self.active_job = None
+            self.progress_var.set(0)
+            self.status_label.config(text="OCR cancelado")
     
-    def _process_ocr_thread(self):
-        """Procesar OCR en hilo separado"""
+    def _save_trace(self, perfilador, job):
+        """Guardar la traza Chrome/JSON del trabajo si hay carpeta configurada"""
+        trace_folder = self.config.get("paths.traces", "")
+        if not trace_folder:
+            return
+        
         try:
-            # Paso 1: Preprocesar imagen
-            self._update_progress(10, "Preprocesando imagen...")
-            processed_image = ImageProcessor.preprocess_image(self.original_image, self.config)
-            
-            # Paso 2: Configurar OCR
-            self._update_progress(30, "Configurando OCR...")
-            lang = self.config.get("ocr.language", "eng")
-            psm = self.config.get("ocr.psm", "6")
-            oem = self.config.get("ocr.oem", "3")
-            
-            custom_config = f'--psm {psm} --oem {oem}'
-            
-            # Paso 3: Ejecutar OCR
-            self._update_progress(50, "Ejecutando reconocimiento OCR...")
-            text = pytesseract.image_to_string(processed_image, lang=lang, config=custom_config)
-            
-            # Paso 4: Procesar resultados
-            self._update_progress(80, "Procesando resultados...")
-            
-            # Guardar texto completo
-            self.ocr_text = text
-            
-            # Procesar como tabla
-            self._process_text_to_table(text)
-            
-            # Paso 5: Completar
-            self._update_progress(100, "Completado")
-            self.root.after(0, self._ocr_completed)
-            
+            # El id del trabajo distingue trabajos que terminan en el mismo segundo
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            name = os.path.splitext(os.path.basename(job.ruta))[0]
+            perfilador.exportar_traza(os.path.join(
+                trace_folder, f"ocr_{timestamp}_{job.id}_{name}.trace.json"))
         except Exception as e:
-            error_msg = f"Error en OCR: {str(e)}"
-            print(traceback.format_exc())
-            self.root.after(0, lambda: self._ocr_failed(error_msg))
+            print(f"Error guardando traza: {e}")
     
     def _update_progress(self, value, message):
         """Actualizar progreso desde hilo"""
         self.root.after(0, lambda: self.progress_var.set(value))
         self.root.after(0, lambda: self.status_label.config(text=message))
     
-    def _process_text_to_table(self, text):
-        """Convertir texto OCR a tabla"""
-        # Dividir en líneas
-        lines = [line.strip() for line in text.split('\n') if line.strip()]
-        
-        if not lines:
-            return
-        
-        # Detectar separadores
-        first_line = lines[0]
-        separators = ['\t', '  ', '|', ',', ';']
-        
-        detected_separator = None
-        for sep in separators:
-            if sep in first_line:
-                parts = first_line.split(sep)
-                if len(parts) > 1:
-                    detected_separator = sep
-                    break
-        
-        # Procesar líneas
-        if detected_separator:
-            # Procesar como tabla con separador
-            self.headers = [h.strip() for h in first_line.split(detected_separator) if h.strip()]
-            data_lines = lines[1:] if len(self.headers) > 1 else lines
-            
-            for line in data_lines:
-                cells = [c.strip() for c in line.split(detected_separator) if c.strip()]
-                if cells:
-                    self.ocr_data.append(cells)
-        else:
-            # Procesar como texto simple
-            self.headers = ["Texto Extraído"]
-            for line in lines:
-                self.ocr_data.append([line])
-    
-    def _ocr_completed(self):
-        """Llamado cuando OCR se completa exitosamente"""
-        self.processing = False
-        self.process_btn.config(state='normal')
+    def _ocr_completed(self, job, notify=True):
+        """Mostrar el resultado de un trabajo completado"""
+        resultado = job.resultado
+        self.ocr_text = resultado['texto']
+        self.ocr_data = resultado['tabla']
+        self.headers = self.ocr_data.encabezados
+        self.ocr_from_cache = resultado['desde_cache']
+        self.last_profile = resultado.get('perfil')
+        self.progress_var.set(100)
         
         # Mostrar texto en área de texto
         self.text_area.delete('1.0', tk.END)
@@ -804,10 +738,17 @@ class OCRApp:
         
         # Actualizar estado
         rows = len(self.ocr_data)
-        self.status_label.config(text=f"OCR completado: {rows} filas detectadas")
+        origin = " (desde caché)" if self.ocr_from_cache else ""
+        skipped = resultado.get('omitidas', [])
+        if skipped:
+            # Páginas en blanco o separadoras que no pasaron por el OCR
+            pages = ', '.join(f"{o['pagina']} ({o['clase']})" for o in skipped)
+            origin += f" · omitidas: {pages}"
+        self.status_label.config(text=f"{os.path.basename(job.ruta)}: {rows} filas detectadas "
+                                      f"en {job.segundos():.2f}s{origin}")
         
         # Mostrar notificación
-        if rows > 0:
+        if notify and rows > 0:
             messagebox.showinfo("OCR Completado", 
                               f"Se extrajeron {rows} filas de datos.\n"
                               f"Revisa y edita los datos antes de exportar.")
@@ -821,30 +762,147 @@ class OCRApp:
         
         messagebox.showerror("Error OCR", error_msg)
     
-    def display_table(self):
-        """Mostrar datos en la tabla Treeview"""
-        # Limpiar tabla existente
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+    def detect_tables(self):
+        """Reconocer tablas regladas (con líneas) celda a celda"""
+        if self.processing or not self.original_image:
+            return
         
-        # Limpiar columnas existentes
-        self.tree['columns'] = []
+        self.processing = True
+        self.process_btn.config(state='disabled')
+        self.progress_var.set(0)
+        self.status_label.config(text="Buscando tablas...")
         
-        # Configurar columnas si hay datos
-        if self.headers and self.ocr_data:
-            self.tree['columns'] = self.headers
-            
-            # Configurar encabezados
-            for header in self.headers:
-                self.tree.heading(header, text=header)
-                self.tree.column(header, width=150, anchor='w', stretch=True)
+        thread = threading.Thread(target=self._detect_tables_thread, daemon=True)
+        thread.start()
+    
+    def _detect_tables_thread(self):
+        """Detectar y reconocer tablas en hilo separado"""
+        try:
+            import numpy as np
+            from utils.procesador import ImageProcessor
+            from utils.backend_ocr import backend_desde_config
+            from utils.tablas_regladas import reconocer_tablas, tabla_a_filas, tabla_a_rejilla
+            from utils.modelo_tabla import TablaOCR
+            
+            config = self.config.instantanea()
+            gray = np.array(self.original_image.convert('L'))
+            if config.get("preprocessing.deskew", True):
+                self._update_progress(10, "Enderezando imagen...")
+                gray = ImageProcessor.deskew_image(gray)
+            
+            self._update_progress(30, "Reconociendo celdas...")
+            tables = reconocer_tablas(gray,
+                                      backend=backend_desde_config(config),
+                                      idioma=config.get("ocr.language", "eng"),
+                                      oem=config.get("ocr.oem", "3"))
+            
+            if not tables:
+                self.root.after(0, lambda: self._ocr_failed("No se encontraron tablas con líneas"))
+                return
+            
+            # Primera fila de la primera tabla como encabezados; las demás
+            # tablas se añaden debajo separadas por una fila vacía
+            rows = []
+            cells = []
+            for i, table in enumerate(tables):
+                if i > 0:
+                    rows.append([])
+                    cells.append([])
+                rows.extend(tabla_a_filas(table))
+                cells.extend(tabla_a_rejilla(table))
+            
+            self.ocr_data = TablaOCR.desde_filas(rows[0], rows[1:], celdas=cells[1:])
+            self.headers = self.ocr_data.encabezados
+            self.ocr_text = '\n'.join('\t'.join(row) for row in rows)
+            self.ocr_from_cache = False
+            self.last_profile = None
+            
+            calls = sum(t['llamadas_ocr'] for t in tables)
+            self._update_progress(100, "Completado")
+            self.root.after(0, lambda: self._tables_completed(len(tables), calls))
             
-            # Insertar datos
-            for row_idx, row in enumerate(self.ocr_data):
-                # Asegurar que la fila tenga todas las columnas
-                values = row + [''] * (len(self.headers) - len(row))
-                self.tree.insert('', 'end', values=values)
+        except Exception as e:
+            error_msg = f"Error reconociendo tablas: {str(e)}"
+            print(traceback.format_exc())
+            self.root.after(0, lambda: self._ocr_failed(error_msg))
+    
+    def _tables_completed(self, table_count, ocr_calls):
+        """Llamado cuando termina el reconocimiento de tablas"""
+        self.processing = False
+        self.process_btn.config(state='normal')
+        
+        self.text_area.delete('1.0', tk.END)
+        self.text_area.insert('1.0', self.ocr_text)
+        
+        self.display_table()
+        
+        # Cambiar a pestaña de tabla
+        self.notebook.select(1)
+        
+        self.status_label.config(text=f"{table_count} tabla(s) reconocida(s): "
+                                      f"{len(self.ocr_data)} filas, {ocr_calls} llamadas OCR")
+    
+    def export_to_excel(self):
+        """Exportar la tabla a Excel, CSV o Parquet (escritura por bloques)"""
+        if not len(self.ocr_data):
+            messagebox.showwarning("Exportar", "No hay datos para exportar")
+            return
+        
+        export_format = self.config.get("export_settings.format", "xlsx")
+        name = "ocr_datos"
+        if self.config.get("export_settings.include_timestamp", True):
+            name = f"ocr_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        
+        filename = filedialog.asksaveasfilename(
+            title="Exportar datos",
+            initialdir=self.config.get("paths.export_folder", ""),
+            initialfile=f"{name}.{export_format}",
+            defaultextension=f".{export_format}",
+            filetypes=[("Excel", "*.xlsx"), ("CSV", "*.csv"), ("Parquet", "*.parquet")]
+        )
+        if not filename:
+            return
+        
+        self.status_label.config(text="Exportando...")
+        
+        def export():
+            try:
+                from utils.exportadores import exportar_tabla, formato_desde_ruta
+                
+                rows = exportar_tabla(self.ocr_data, filename,
+                                      formato=formato_desde_ruta(filename, export_format),
+                                      hoja=self.config.get("export_settings.sheet_name", "OCR_Data"))
+                self.root.after(0, lambda: self._export_completed(filename, rows))
+            except Exception as e:
+                error_msg = f"No se pudo exportar:\n{str(e)}"
+                print(traceback.format_exc())
+                self.root.after(0, lambda: messagebox.showerror("Error", error_msg))
+        
+        threading.Thread(target=export, daemon=True).start()
+    
+    def _export_completed(self, filename, rows):
+        """Llamado cuando termina la exportación"""
+        self.config.set("paths.export_folder", os.path.dirname(filename))
+        self.status_label.config(text=f"Exportadas {rows} filas a {os.path.basename(filename)}")
+        
+        if self.config.get("export_settings.auto_open", False):
+            webbrowser.open(Path(filename).resolve().as_uri())
     
+    def display_table(self):
+        """Mostrar datos en la tabla (solo se renderizan las filas visibles)"""
+        self.table_view.mostrar(self.headers, self.ocr_data)
+
+    def clear_results(self):
+        """Borrar el texto y la tabla del resultado anterior"""
+        self.ocr_text = ""
+        self.ocr_data = []
+        self.headers = []
+        self.ocr_from_cache = False
+        self.last_profile = None
+
+        self.text_area.delete('1.0', tk.END)
+        self.display_table()
+
     def edit_cell(self, event):
         """Editar celda al hacer doble clic"""
         # Identificar ítem y columna
@@ -854,12 +912,13 @@ class OCRApp:
         if not row_id or not column:
             return
         
-        # Obtener índices
+        # Obtener índices (posición en los datos, no en el Treeview)
         col_idx = int(column[1:]) - 1
-        row_idx = self.tree.index(row_id)
+        row_idx = self.table_view.indice_fila(row_id)
         
         # Obtener valor actual
-        current_value = self.tree.item(row_id, 'values')[col_idx]
+        row = self.ocr_data[row_idx]
+        current_value = row[col_idx] if col_idx < len(row) else ''
         
         # Crear ventana de edición
         self.create_edit_dialog(row_idx, col_idx, current_value, row_id)
@@ -868,7 +927,7 @@ class OCRApp:
         """Crear diálogo para editar celda"""
         dialog = tk.Toplevel(self.root)
         dialog.title("Editar Celda")
-        dialog.geometry("400x200")
+        dialog.geometry("400x230")
         dialog.transient(self.root)
         dialog.grab_set()
         
@@ -882,6 +941,20 @@ class OCRApp:
                  text=f"Fila {row_idx+1}, {col_name}",
                  font=('Segoe UI', 12, 'bold')).pack(anchor=tk.W, pady=(0, 10))
         
+        # Procedencia de la celda (página, posición y confianza del OCR)
+        origin = self.ocr_data.procedencia(row_idx, col_idx)
+        details = []
+        if origin['pagina'] is not None:
+            details.append(f"Página {origin['pagina']}")
+        if origin['left'] is not None:
+            details.append(f"x={origin['left']}, y={origin['top']}")
+        if origin['conf'] is not None:
+            details.append(f"confianza {origin['conf']:.0f}%")
+        if origin['editada']:
+            details.append("editada")
+        if details:
+            ttk.Label(frame, text=" · ".join(details)).pack(anchor=tk.W, pady=(0, 10))
+        
         # Campo de texto
         text_frame = ttk.Frame(frame)
         text_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 20))
@@ -902,16 +975,12 @@ class OCRApp:
         def save_changes():
             new_value = text_widget.get('1.0', 'end-1c').strip()
             
-            # Actualizar datos
-            if row_idx < len(self.ocr_data):
-                if col_idx >= len(self.ocr_data[row_idx]):
-                    # Extender la fila si es necesario
-                    self.ocr_data[row_idx].extend([''] * (col_idx - len(self.ocr_data[row_idx]) + 1))
-                self.ocr_data[row_idx][col_idx] = new_value
+            # Actualizar datos (la tabla siempre es rectangular)
+            if row_idx < len(self.ocr_data) and col_idx < self.ocr_data.n_columnas:
+                self.ocr_data.establecer(row_idx, col_idx, new_value)
             
-            # Actualizar Treeview
-            values = self.ocr_data[row_idx] + [''] * (len(self.headers) - len(self.ocr_data[row_idx]))
-            self.tree.item(row_id, values=values)
+            # Actualizar la fila si sigue visible
+            self.table_view.actualizar_fila(row_idx)
             
             dialog.destroy()
         
@@ -0,0 +1,8 @@
+"""
+Benchmarks de rendimiento de OCR to Excel
+
+Uso (desde la carpeta de la aplicación):
+    python -m benchmarks                   # medir y comparar con baselines
+    python -m benchmarks --actualizar      # grabar baselines de esta máquina
+    python -m benchmarks ocr deskew_image  # solo algunas etapas
+"""
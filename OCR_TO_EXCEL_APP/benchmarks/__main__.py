@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Ejecutar los benchmarks por etapas y fallar si hay regresiones
+
+Las etapas sin baseline (sin umbral que comprobar) se avisan; con
+--estricto también hacen fallar la ejecución. Las baselines se graban con
+--actualizar en la máquina de referencia.
+"""
+
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.etapas import ETAPAS, BASELINES, ejecutar_benchmarks
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks',
+                                     description="Benchmarks por etapas con umbrales de regresión")
+    parser.add_argument('etapas', nargs='*',
+                        help=f"Etapas a medir (por defecto, todas): {', '.join(ETAPAS)}")
+    parser.add_argument('-n', '--repeticiones', type=int, default=5)
+    parser.add_argument('--baselines', default=BASELINES, help="Archivo de baselines")
+    parser.add_argument('--actualizar', action='store_true',
+                        help="Grabar los tiempos medidos como baselines")
+    parser.add_argument('--estricto', action='store_true',
+                        help="Fallar también si alguna etapa medida no tiene baseline")
+    args = parser.parse_args(argv)
+
+    desconocidas = [e for e in args.etapas if e not in ETAPAS]
+    if desconocidas:
+        parser.error(f"etapas desconocidas: {', '.join(desconocidas)}")
+
+    resultados, regresiones = ejecutar_benchmarks(args.etapas or None, args.repeticiones,
+                                                  args.baselines, args.actualizar)
+
+    # Sin baseline no hay umbral que comprobar (salvo al grabarlas ahora)
+    sin_baseline = [] if args.actualizar else \
+        [nombre for nombre, medicion in resultados.items()
+         if medicion is not None and not medicion['baseline']]
+
+    print(f"{'etapa':<20} {'mediana (s)':>12} {'baseline':>10} {'límite':>10}  estado")
+    for nombre, medicion in resultados.items():
+        if medicion is None:
+            print(f"{nombre:<20} {'-':>12} {'-':>10} {'-':>10}  omitida (falta requisito)")
+            continue
+        base = f"{medicion['baseline']:.4f}" if medicion['baseline'] else '-'
+        limite = f"{medicion['limite']:.4f}" if medicion['limite'] else '-'
+        if nombre in regresiones:
+            estado = 'REGRESIÓN'
+        elif nombre in sin_baseline:
+            estado = 'SIN BASELINE'
+        else:
+            estado = 'ok'
+        print(f"{nombre:<20} {medicion['mediana']:>12.4f} {base:>10} {limite:>10}  {estado}")
+
+    if args.actualizar:
+        print(f"\nBaselines actualizadas en {args.baselines}")
+
+    if regresiones:
+        print(f"\n{len(regresiones)} etapa(s) por encima del umbral: {', '.join(regresiones)}")
+    if sin_baseline:
+        aviso = "Error" if args.estricto else "Aviso"
+        print(f"\n{aviso}: {len(sin_baseline)} etapa(s) sin baseline en {args.baselines}: "
+              f"{', '.join(sin_baseline)}\n"
+              f"Grábalas con: python -m benchmarks --actualizar")
+    return 1 if regresiones or (args.estricto and sin_baseline) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
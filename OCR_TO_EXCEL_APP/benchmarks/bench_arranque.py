@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark de arranque: tiempo de importación de OCR_APP en un proceso nuevo
+
+Uso (desde la carpeta de la aplicación):
+    python benchmarks/bench_arranque.py [--rondas 5] [--limite 0.5] [--ventana]
+
+Falla (código 1) si la importación supera el límite o si al importar se
+cargan módulos pesados que deberían ser diferidos (OpenCV, NumPy, pandas,
+PIL, pytesseract...). Con --ventana mide también hasta el primer dibujado
+de la ventana (requiere pantalla).
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+DIRECTORIO_APP = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULOS_PESADOS = ('cv2', 'numpy', 'pandas', 'PIL', 'pytesseract', 'tesserocr',
+                   'openpyxl', 'pyarrow', 'pdf2image')
+
+# Se ejecuta en un intérprete nuevo para medir un arranque en frío
+SONDA_IMPORTACION = """
+import sys, time, json
+inicio = time.perf_counter()
+import OCR_APP
+segundos = time.perf_counter() - inicio
+pesados = sorted({m.split('.')[0] for m in sys.modules} & set(%r))
+print(json.dumps({'segundos': segundos, 'pesados': pesados}))
+"""
+
+SONDA_VENTANA = """
+import time, json
+inicio = time.perf_counter()
+import tkinter as tk
+import OCR_APP
+root = tk.Tk()
+app = OCR_APP.OCRApp(root)
+root.update()
+segundos = time.perf_counter() - inicio
+root.destroy()
+print(json.dumps({'segundos': segundos}))
+"""
+
+def ejecutar_sonda(codigo):
+    """Ejecutar una sonda en un proceso nuevo y devolver su JSON"""
+    salida = subprocess.run([sys.executable, '-c', codigo], cwd=DIRECTORIO_APP,
+                            capture_output=True, text=True, timeout=120)
+    if salida.returncode != 0:
+        raise RuntimeError(salida.stderr.strip().splitlines()[-1] if salida.stderr else
+                           f"código {salida.returncode}")
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de arranque de la aplicación")
+    parser.add_argument('--rondas', type=int, default=5)
+    parser.add_argument('--limite', type=float, default=0.5,
+                        help="Segundos máximos de importación (mediana)")
+    parser.add_argument('--ventana', action='store_true',
+                        help="Medir también hasta mostrar la ventana")
+    args = parser.parse_args(argv)
+
+    tiempos = []
+    pesados = set()
+    for _ in range(args.rondas):
+        resultado = ejecutar_sonda(SONDA_IMPORTACION % (MODULOS_PESADOS,))
+        tiempos.append(resultado['segundos'])
+        pesados.update(resultado['pesados'])
+
+    mediana = statistics.median(tiempos)
+    print(f"Importación de OCR_APP: mediana {mediana * 1000:.1f} ms "
+          f"(mín {min(tiempos) * 1000:.1f}, máx {max(tiempos) * 1000:.1f}, "
+          f"{args.rondas} rondas)")
+
+    if args.ventana:
+        try:
+            ventana = ejecutar_sonda(SONDA_VENTANA)['segundos']
+            print(f"Hasta la primera ventana: {ventana * 1000:.1f} ms")
+        except Exception as e:
+            print(f"Ventana no medida: {e}")
+
+    fallos = []
+    if pesados:
+        fallos.append(f"módulos pesados importados al arrancar: {', '.join(sorted(pesados))}")
+    if mediana > args.limite:
+        fallos.append(f"importación por encima de {args.limite:.2f}s")
+
+    for fallo in fallos:
+        print(f"REGRESIÓN: {fallo}")
+    return 1 if fallos else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark de backends OCR: páginas/segundo con pytesseract vs tesserocr
+
+Uso (desde la carpeta de la aplicación):
+    python benchmarks/bench_backends.py [imagenes...] [--rondas 3] [--idioma eng]
+
+Sin imágenes se generan recibos sintéticos pequeños, el caso donde más pesa
+el arranque de un proceso tesseract por imagen.
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+
+from benchmarks.sinteticos import recibo
+from utils.backend_ocr import BackendPytesseract, BackendTesserocr, tesserocr_disponible
+
+def medir(backend, imagenes, rondas, idioma):
+    """Medir páginas/segundo de un backend"""
+    # La primera página incluye la carga del modelo
+    inicio = time.perf_counter()
+    backend.reconocer(imagenes[0], idioma=idioma)
+    primera = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    for _ in range(rondas):
+        for imagen in imagenes:
+            backend.reconocer(imagen, idioma=idioma)
+    total = time.perf_counter() - inicio
+
+    return primera, (len(imagenes) * rondas) / total
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de backends OCR")
+    parser.add_argument('imagenes', nargs='*', help="Imágenes a reconocer")
+    parser.add_argument('--rondas', type=int, default=3)
+    parser.add_argument('--paginas', type=int, default=20,
+                        help="Recibos sintéticos a generar si no se pasan imágenes")
+    parser.add_argument('--idioma', default='eng')
+    args = parser.parse_args(argv)
+
+    if args.imagenes:
+        imagenes = [Image.open(ruta).convert('L') for ruta in args.imagenes]
+    else:
+        imagenes = [recibo(i) for i in range(args.paginas)]
+
+    backends = [BackendPytesseract()]
+    if tesserocr_disponible():
+        backends.append(BackendTesserocr())
+    else:
+        print("tesserocr no instalado: solo se mide pytesseract")
+
+    print(f"{len(imagenes)} páginas x {args.rondas} rondas\n")
+    print(f"{'backend':<12} {'1ª página (s)':>14} {'páginas/s':>10}")
+
+    resultados = {}
+    for backend in backends:
+        primera, paginas_s = medir(backend, imagenes, args.rondas, args.idioma)
+        resultados[backend.nombre] = paginas_s
+        print(f"{backend.nombre:<12} {primera:>14.3f} {paginas_s:>10.2f}")
+
+    if len(resultados) == 2:
+        mejora = resultados['tesserocr'] / resultados['pytesseract']
+        print(f"\ntesserocr es {mejora:.1f}x más rápido")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
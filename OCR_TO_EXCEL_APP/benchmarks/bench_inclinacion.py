@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark del estimador de inclinación: velocidad, memoria y precisión
+
+Compara estimar_inclinacion (perfiles de proyección sobre la tinta de una
+versión reducida) con el método anterior (np.column_stack(np.where(...)) +
+cv2.minAreaRect) sobre páginas A4 sintéticas a 300 DPI con inclinación
+conocida.
+
+Uso (desde la carpeta de la aplicación):
+    python benchmarks/bench_inclinacion.py [--angulos -7 -3 -1.5 0 2 5]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+from benchmarks.sinteticos import generar_documento
+from utils.inclinacion import estimar_inclinacion
+
+def generar_pagina(angulo, semilla=0):
+    """Página A4 binaria rotada 'angulo' grados (corrección esperada: -angulo)"""
+    imagen = generar_documento('texto', inclinacion=angulo, semilla=semilla)
+    _, binaria = cv2.threshold(np.array(imagen), 127, 255, cv2.THRESH_BINARY)
+    return binaria
+
+def angulo_metodo_anterior(imagen):
+    """Ángulo calculado por el deskew original (antes del umbral de 1 grado)"""
+    coords = np.column_stack(np.where(imagen > 0))
+    angle = cv2.minAreaRect(coords)[-1]
+    if angle < -45:
+        angle = 90 + angle
+    elif angle > 45:
+        angle = angle - 90
+    return angle
+
+def medir(funcion, imagen):
+    """Tiempo (s) y pico de memoria de NumPy (MB) de una llamada"""
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = funcion(imagen)
+    segundos = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultado, segundos, pico / (1024 * 1024)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del estimador de inclinación")
+    parser.add_argument('--angulos', type=float, nargs='+',
+                        default=[-7.0, -3.0, -1.5, 0.0, 0.8, 2.0, 5.0])
+    args = parser.parse_args(argv)
+
+    print(f"{'real':>6} | {'anterior':>9} {'error':>6} {'s':>6} {'MB':>7} | "
+          f"{'nuevo':>7} {'error':>6} {'conf':>5} {'s':>6} {'MB':>6}")
+
+    totales = {'anterior': [0.0, 0.0, 0.0], 'nuevo': [0.0, 0.0, 0.0]}
+
+    for angulo in args.angulos:
+        pagina = generar_pagina(angulo)
+        esperado = -angulo
+
+        viejo, t_viejo, mb_viejo = medir(angulo_metodo_anterior, pagina)
+        (nuevo, conf), t_nuevo, mb_nuevo = medir(estimar_inclinacion, pagina)
+
+        err_viejo = abs(viejo - esperado)
+        err_nuevo = abs(nuevo - esperado)
+        for nombre, valores in (('anterior', (err_viejo, t_viejo, mb_viejo)),
+                                ('nuevo', (err_nuevo, t_nuevo, mb_nuevo))):
+            for i, v in enumerate(valores):
+                totales[nombre][i] = max(totales[nombre][i], v) if i == 2 else totales[nombre][i] + v
+
+        print(f"{angulo:>6.2f} | {viejo:>9.2f} {err_viejo:>6.2f} {t_viejo:>6.3f} {mb_viejo:>7.1f} | "
+              f"{nuevo:>7.2f} {err_nuevo:>6.2f} {conf:>5.2f} {t_nuevo:>6.3f} {mb_nuevo:>6.1f}")
+
+    n = len(args.angulos)
+    print()
+    for nombre, (error, segundos, pico) in totales.items():
+        print(f"{nombre:<9} error medio {error / n:.3f}°  tiempo medio {segundos / n:.3f}s  "
+              f"pico NumPy {pico:.1f} MB")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark de ingesta: tiempo por página y pico de memoria antes/después
+
+Uso (desde la carpeta de la aplicación):
+    python benchmarks/bench_ingesta.py [imagenes...] [--rondas 5] [--escala 2]
+
+Compara el camino anterior (PIL -> np.array RGB -> BGR -> gris, tres
+imágenes completas) con utils.ingesta.leer_gris (imdecode en gris sobre el
+archivo proyectado en memoria). Cada medición se hace en un proceso nuevo
+para que el pico de RSS sea solo el de esa ingesta. Sin imágenes se genera
+una página en color a 300 DPI por --escala, en JPEG y en PNG.
+"""
+
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+DIRECTORIO_APP = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRECTORIO_APP)
+
+METODOS = ('anterior', 'ingesta')
+
+# Se ejecuta en un proceso nuevo: importaciones, pico base, una ingesta
+# para el pico y luego las rondas cronometradas
+SONDA = """
+import sys, json, time, statistics, resource
+import cv2
+import numpy as np
+from PIL import Image
+from utils.ingesta import leer_gris
+
+ruta, metodo, rondas = sys.argv[1], sys.argv[2], int(sys.argv[3])
+unidad = 1 if sys.platform == 'darwin' else 1024
+
+def anterior():
+    imagen = Image.open(ruta)
+    rgb = np.array(imagen.convert('RGB'))
+    bgr = cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
+    return cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+
+def ingesta():
+    return leer_gris(ruta)
+
+funcion = anterior if metodo == 'anterior' else ingesta
+base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unidad
+gris = funcion()
+pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unidad
+forma = gris.shape
+del gris
+
+tiempos = []
+for _ in range(rondas):
+    inicio = time.perf_counter()
+    funcion()
+    tiempos.append(time.perf_counter() - inicio)
+
+print(json.dumps({'segundos': statistics.median(tiempos), 'pico_mb': (pico - base) / 1e6,
+                  'forma': list(forma)}))
+"""
+
+def medir(ruta, metodo, rondas):
+    """Medir un método sobre una imagen en un proceso nuevo"""
+    salida = subprocess.run([sys.executable, '-c', SONDA, ruta, metodo, str(rondas)],
+                            cwd=DIRECTORIO_APP, capture_output=True, text=True, timeout=600)
+    if salida.returncode != 0:
+        raise RuntimeError(salida.stderr.strip().splitlines()[-1])
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+def generar_entradas(directorio, escala):
+    """Página sintética en color (JPEG y PNG)"""
+    from PIL import Image
+    from benchmarks.sinteticos import generar_documento, ANCHO_A4, ALTO_A4
+
+    pagina = generar_documento('factura', ruido=6, sombra=0.3,
+                               ancho=ANCHO_A4 * escala, alto=ALTO_A4 * escala)
+    # Escaneo en color: el caso que más conversiones hacía
+    color = Image.merge('RGB', (pagina, pagina, pagina.point(lambda v: min(255, v + 8))))
+    rutas = []
+    for formato, extension in (('JPEG', 'jpg'), ('PNG', 'png')):
+        ruta = os.path.join(directorio, f"pagina.{extension}")
+        color.save(ruta, formato, quality=90)
+        rutas.append(ruta)
+    return rutas
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de ingesta en escala de grises")
+    parser.add_argument('imagenes', nargs='*', help="Imágenes a medir (por defecto, sintéticas)")
+    parser.add_argument('--rondas', type=int, default=5)
+    parser.add_argument('--escala', type=int, default=2,
+                        help="Multiplicador del tamaño A4 a 300 DPI de la página sintética")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix='bench_ingesta_') as directorio:
+        rutas = args.imagenes or generar_entradas(directorio, args.escala)
+
+        print(f"{'imagen':<24} {'método':<10} {'ms/página':>10} {'pico RSS (MB)':>14}")
+        for ruta in rutas:
+            resultados = {}
+            for metodo in METODOS:
+                resultados[metodo] = medir(ruta, metodo, args.rondas)
+                r = resultados[metodo]
+                print(f"{os.path.basename(ruta):<24} {metodo:<10} {r['segundos'] * 1000:>10.1f} "
+                      f"{r['pico_mb']:>14.1f}")
+            antes, despues = resultados['anterior'], resultados['ingesta']
+            print(f"{'':<24} {'mejora':<10} {antes['segundos'] / despues['segundos']:>9.2f}x "
+                  f"{antes['pico_mb'] - despues['pico_mb']:>13.1f}M menos")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
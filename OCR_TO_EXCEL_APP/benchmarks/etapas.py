@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Medición por etapas del flujo OCR con baselines y umbrales de regresión
+
+Cada etapa se prepara una vez (fuera del cronómetro) y se mide varias veces;
+se compara la mediana con la baseline guardada multiplicada por la
+tolerancia de la etapa. Las baselines dependen de la máquina: se graban con
+--actualizar en el equipo donde se vayan a comparar.
+"""
+
+import os
+import json
+import shutil
+import tempfile
+import statistics
+import time
+
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+
+def _config(directorio):
+    from utils.configuracion import ConfigManager
+    config = ConfigManager(os.path.join(directorio, 'settings.json'))
+    config.set('cache.enabled', False, save=False)
+    return config
+
+def _sin_memoria():
+    """Desactivar la memoria de etapas para medir el cálculo completo"""
+    from utils.etapas import cadena_por_defecto
+    cadena_por_defecto().max_bytes = 0
+    cadena_por_defecto().limpiar()
+
+def preparar_preprocess_image(directorio):
+    from utils.procesador import ImageProcessor
+    from benchmarks.sinteticos import generar_documento
+    _sin_memoria()
+    config = _config(directorio)
+    imagen = generar_documento('factura', inclinacion=2.0, ruido=8, sombra=0.3)
+    return lambda: ImageProcessor.preprocess_image(imagen, config)
+
+def preparar_mejorar_imagen_ocr(directorio):
+    from utils.preprocesar_imagen import mejorar_imagen_ocr
+    from benchmarks.sinteticos import generar_documento
+    _sin_memoria()
+    ruta = os.path.join(directorio, 'mejorar.png')
+    generar_documento('texto', inclinacion=2.0, ruido=8).save(ruta)
+    return lambda: mejorar_imagen_ocr(ruta)
+
+def preparar_mejorar_imagenes_lote(directorio):
+    import numpy as np
+    from utils.preprocesar_imagen import mejorar_imagen_ocr
+    from utils.preprocesado_lote import mejorar_imagenes_ocr
+    from benchmarks.sinteticos import generar_documento
+    _sin_memoria()
+    rutas = []
+    for i in range(8):
+        ruta = os.path.join(directorio, f'lote_{i}.png')
+        generar_documento('texto', inclinacion=2.0 if i % 2 else 0.0, ruido=8,
+                          semilla=i).save(ruta)
+        rutas.append(ruta)
+
+    # El lote debe dar exactamente lo mismo que el camino por página
+    for ruta, imagen in zip(rutas, mejorar_imagenes_ocr(rutas)):
+        if not np.array_equal(np.asarray(imagen), np.asarray(mejorar_imagen_ocr(ruta))):
+            raise AssertionError(f"El lote difiere del camino por página en {ruta}")
+    return lambda: mejorar_imagenes_ocr(rutas)
+
+def preparar_deskew_image(directorio):
+    import numpy as np
+    from utils.procesador import ImageProcessor
+    from benchmarks.sinteticos import generar_documento
+    binaria = np.where(np.asarray(generar_documento('texto', inclinacion=3.0)) > 127, 255, 0)
+    binaria = binaria.astype(np.uint8)
+    return lambda: ImageProcessor.deskew_image(binaria)
+
+def preparar_eliminar_sombras(directorio):
+    import numpy as np
+    from utils.preprocesar_imagen import eliminar_sombras
+    from benchmarks.sinteticos import generar_documento
+    gris = np.asarray(generar_documento('texto', sombra=0.5))
+    return lambda: eliminar_sombras(gris)
+
+def preparar_pdf_a_imagenes(directorio):
+    from utils.convertir_pdf import pdf_a_imagenes
+    from benchmarks.sinteticos import generar_documento, guardar_pdf
+    ruta = guardar_pdf([generar_documento('factura', semilla=i) for i in range(2)],
+                       os.path.join(directorio, 'documento.pdf'))
+
+    def ejecutar():
+        imagenes, temp_dir = pdf_a_imagenes(ruta, dpi=300)
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        return imagenes
+    return ejecutar
+
+def preparar_ocr(directorio):
+    from utils.backend_ocr import backend_desde_config
+    from benchmarks.sinteticos import generar_documento
+    config = _config(directorio)
+    backend = backend_desde_config(config)
+    imagen = generar_documento('factura')
+    # Calentar: la carga del modelo no es parte de la etapa
+    backend.reconocer(imagen)
+    return lambda: backend.reconocer(imagen, idioma='eng', psm='6')
+
+def preparar_tabla(directorio):
+    from utils.motor_ocr import texto_a_tabla
+    lineas = ["Codigo  Descripcion  Cantidad  Importe"]
+    lineas += [f"REF-{i:05d}  producto {i % 97}  {i % 13}  {i * 1.37:.2f}" for i in range(5000)]
+    texto = '\n'.join(lineas)
+    return lambda: texto_a_tabla(texto)
+
+def preparar_tabla_cajas(directorio):
+    from utils.tabla_cajas import tabla_desde_palabras
+    columnas = (50, 320, 760, 960)
+    palabras = []
+    for fila in range(10001):
+        if fila == 0:
+            celdas = ["Codigo", "Descripcion", "Cantidad", "Importe"]
+        else:
+            celdas = [f"REF-{fila:05d}", f"producto {fila % 97}", str(fila % 13), f"{fila * 1.37:.2f}"]
+        for x, celda in zip(columnas, celdas):
+            # Desalineación de unos píxeles, como en una página real
+            x += fila % 3
+            for palabra in celda.split():
+                palabras.append({'texto': palabra, 'conf': 90.0, 'left': x,
+                                 'top': 20 + fila * 30 + fila % 2, 'width': 11 * len(palabra),
+                                 'height': 20})
+                x += 11 * len(palabra) + 7
+    return lambda: tabla_desde_palabras(palabras)
+
+def preparar_exportar(directorio):
+    import pandas as pd
+    ruta = os.path.join(directorio, 'export.xlsx')
+    filas = [[f"REF-{i:05d}", f"producto {i % 97}", i % 13, i * 1.37] for i in range(5000)]
+    encabezados = ["Codigo", "Descripcion", "Cantidad", "Importe"]
+
+    def ejecutar():
+        pd.DataFrame(filas, columns=encabezados).to_excel(ruta, sheet_name='OCR_Data', index=False)
+    return ejecutar
+
+def preparar_exportar_streaming(directorio):
+    from utils.modelo_tabla import TablaOCR
+    from utils.exportadores import exportar_tabla
+    ruta = os.path.join(directorio, 'export_streaming.xlsx')
+    filas = [[f"REF-{i:05d}", f"producto {i % 97}", str(i % 13), f"{i * 1.37:.2f}"] for i in range(5000)]
+    tabla = TablaOCR.desde_filas(["Codigo", "Descripcion", "Cantidad", "Importe"], filas)
+    return lambda: exportar_tabla(tabla, ruta)
+
+def _hay_tesseract():
+    return shutil.which('tesseract') is not None
+
+def _hay_poppler():
+    return shutil.which('pdftoppm') is not None
+
+# nombre -> (preparar, requisito opcional)
+ETAPAS = {
+    'preprocess_image': (preparar_preprocess_image, None),
+    'mejorar_imagen_ocr': (preparar_mejorar_imagen_ocr, None),
+    'mejorar_imagenes_lote': (preparar_mejorar_imagenes_lote, None),
+    'deskew_image': (preparar_deskew_image, None),
+    'eliminar_sombras': (preparar_eliminar_sombras, None),
+    'pdf_a_imagenes': (preparar_pdf_a_imagenes, _hay_poppler),
+    'ocr': (preparar_ocr, _hay_tesseract),
+    'texto_a_tabla': (preparar_tabla, None),
+    'tabla_cajas': (preparar_tabla_cajas, None),
+    'exportar': (preparar_exportar, None),
+    'exportar_streaming': (preparar_exportar_streaming, None),
+}
+
+def medir_etapa(nombre, repeticiones=5, directorio=None):
+    """
+    Medir una etapa
+
+    Args:
+        nombre: Clave de ETAPAS
+        repeticiones: Número de mediciones
+        directorio: Carpeta temporal para archivos de entrada/salida
+
+    Returns:
+        Dict con 'mediana' y 'minimo' en segundos, o None si falta un
+        requisito (tesseract, poppler)
+    """
+    preparar, requisito = ETAPAS[nombre]
+    if requisito and not requisito():
+        return None
+
+    ejecutar = preparar(directorio)
+    ejecutar()  # primera ejecución fuera de la medición
+
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        ejecutar()
+        tiempos.append(time.perf_counter() - inicio)
+
+    return {'mediana': statistics.median(tiempos), 'minimo': min(tiempos)}
+
+def cargar_baselines(ruta=BASELINES):
+    """Leer el archivo de baselines (tolerancias y tiempos de referencia)"""
+    with open(ruta, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def guardar_baselines(datos, ruta=BASELINES):
+    """Escribir el archivo de baselines"""
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump(datos, f, indent=4, ensure_ascii=False)
+        f.write('\n')
+
+def ejecutar_benchmarks(nombres=None, repeticiones=5, ruta_baselines=BASELINES,
+                        actualizar=False):
+    """
+    Medir las etapas y compararlas con las baselines
+
+    Args:
+        nombres: Etapas a medir (None = todas)
+        repeticiones: Mediciones por etapa
+        ruta_baselines: Archivo de baselines
+        actualizar: Grabar los tiempos medidos como nuevas baselines
+
+    Returns:
+        Tupla (resultados, regresiones): dict nombre -> medición y lista de
+        nombres de etapas que superan su umbral
+    """
+    baselines = cargar_baselines(ruta_baselines)
+    tolerancia_defecto = baselines.get('tolerancia', 1.25)
+    referencias = baselines.setdefault('etapas', {})
+
+    resultados = {}
+    regresiones = []
+
+    directorio = tempfile.mkdtemp(prefix='bench_ocr_')
+    try:
+        for nombre in nombres or ETAPAS:
+            medicion = medir_etapa(nombre, repeticiones, directorio)
+            resultados[nombre] = medicion
+            if medicion is None:
+                continue
+
+            referencia = referencias.setdefault(nombre, {})
+            base = referencia.get('mediana')
+            tolerancia = referencia.get('tolerancia', tolerancia_defecto)
+            medicion['baseline'] = base
+            medicion['limite'] = base * tolerancia if base else None
+
+            if medicion['limite'] and medicion['mediana'] > medicion['limite']:
+                regresiones.append(nombre)
+
+            if actualizar:
+                referencia['mediana'] = round(medicion['mediana'], 6)
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    if actualizar:
+        guardar_baselines(baselines, ruta_baselines)
+
+    return resultados, regresiones
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Generador de documentos sintéticos para benchmarks (sin red, solo PIL)
+
+Tipos: texto corrido, tabla reglada, factura y recibo. Se les puede aplicar
+inclinación, ruido y sombras de intensidad controlada. Todo es determinista
+a partir de la semilla.
+"""
+
+import random
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+# A4 a 300 DPI
+ANCHO_A4 = 2480
+ALTO_A4 = 3508
+
+PALABRAS = (
+    "factura cliente importe total fecha pedido unidad precio descuento "
+    "servicio producto cantidad referencia proveedor pago albaran entrega "
+    "iva base cuenta banco transferencia numero codigo descripcion"
+).split()
+
+def fuente(tamano):
+    """Fuente TrueType si hay alguna disponible; si no, la de PIL"""
+    for nombre in ("DejaVuSans.ttf", "arial.ttf", "LiberationSans-Regular.ttf"):
+        try:
+            return ImageFont.truetype(nombre, tamano)
+        except OSError:
+            continue
+    try:
+        return ImageFont.load_default(size=tamano)
+    except TypeError:
+        return ImageFont.load_default()
+
+def _frase(rng, palabras):
+    return ' '.join(rng.choice(PALABRAS) for _ in range(palabras))
+
+def pagina_texto(ancho=ANCHO_A4, alto=ALTO_A4, tamano_fuente=36, semilla=0):
+    """Página de texto corrido"""
+    rng = random.Random(semilla)
+    imagen = Image.new('L', (ancho, alto), 255)
+    dibujo = ImageDraw.Draw(imagen)
+    letra = fuente(tamano_fuente)
+
+    y = ancho // 12
+    while y < alto - ancho // 12:
+        dibujo.text((ancho // 12, y), _frase(rng, rng.randint(6, 12)), fill=0, font=letra)
+        y += int(tamano_fuente * 1.6)
+
+    return imagen
+
+def tabla_reglada(filas=25, columnas=5, ancho=ANCHO_A4, alto=ALTO_A4, tamano_fuente=32,
+                  semilla=0):
+    """Página con una tabla de líneas (encabezado + filas de datos)"""
+    rng = random.Random(semilla)
+    imagen = Image.new('L', (ancho, alto), 255)
+    dibujo = ImageDraw.Draw(imagen)
+    letra = fuente(tamano_fuente)
+
+    margen = ancho // 12
+    alto_fila = int(tamano_fuente * 2.2)
+    ancho_col = (ancho - 2 * margen) // columnas
+    bottom = margen + alto_fila * (filas + 1)
+
+    for f in range(filas + 2):
+        y = margen + f * alto_fila
+        dibujo.line([(margen, y), (margen + ancho_col * columnas, y)], fill=0, width=3)
+    for c in range(columnas + 1):
+        x = margen + c * ancho_col
+        dibujo.line([(x, margen), (x, bottom)], fill=0, width=3)
+
+    for f in range(filas + 1):
+        for c in range(columnas):
+            if f == 0:
+                texto = f"Columna {c + 1}"
+            elif c == 0:
+                texto = f"REF-{rng.randint(1000, 9999)}"
+            else:
+                texto = f"{rng.uniform(1, 999):.2f}"
+            dibujo.text((margen + c * ancho_col + 12, margen + f * alto_fila + alto_fila // 4),
+                        texto, fill=0, font=letra)
+
+    return imagen
+
+def factura(ancho=ANCHO_A4, alto=ALTO_A4, lineas=15, tamano_fuente=34, semilla=0):
+    """Factura: cabecera, líneas de detalle separadas por espacios y totales"""
+    rng = random.Random(semilla)
+    imagen = Image.new('L', (ancho, alto), 255)
+    dibujo = ImageDraw.Draw(imagen)
+    letra = fuente(tamano_fuente)
+    titulo = fuente(tamano_fuente * 2)
+
+    margen = ancho // 12
+    dibujo.text((margen, margen), "FACTURA", fill=0, font=titulo)
+    dibujo.text((margen, margen + tamano_fuente * 3), f"Numero: F-{rng.randint(10000, 99999)}",
+                fill=0, font=letra)
+    dibujo.text((margen, margen + tamano_fuente * 5), "Fecha: 15/03/2024", fill=0, font=letra)
+
+    columnas = (margen, margen + 900, margen + 1300, margen + 1750)
+    y = margen + tamano_fuente * 9
+    for x, texto in zip(columnas, ("Descripcion", "Cantidad", "Precio", "Importe")):
+        dibujo.text((x, y), texto, fill=0, font=letra)
+    dibujo.line([(margen, y + tamano_fuente * 1.5), (ancho - margen, y + tamano_fuente * 1.5)],
+                fill=0, width=3)
+
+    total = 0.0
+    for _ in range(lineas):
+        y += int(tamano_fuente * 1.8)
+        cantidad = rng.randint(1, 20)
+        precio = rng.uniform(1, 200)
+        total += cantidad * precio
+        valores = (_frase(rng, 2), str(cantidad), f"{precio:.2f}", f"{cantidad * precio:.2f}")
+        for x, texto in zip(columnas, valores):
+            dibujo.text((x, y), texto, fill=0, font=letra)
+
+    y += tamano_fuente * 3
+    dibujo.text((columnas[2], y), "TOTAL", fill=0, font=letra)
+    dibujo.text((columnas[3], y), f"{total:.2f}", fill=0, font=letra)
+
+    return imagen
+
+def recibo(indice=0, ancho=600, alto=400, tamano_fuente=22):
+    """Recibo pequeño (donde más pesa el coste fijo por imagen)"""
+    imagen = Image.new('L', (ancho, alto), 255)
+    dibujo = ImageDraw.Draw(imagen)
+    letra = fuente(tamano_fuente)
+    lineas = [
+        f"TICKET N. {1000 + indice}",
+        "Producto        Cant   Precio",
+        f"Cafe            {indice % 5 + 1}      1.50",
+        "Pan             2      0.80",
+        f"TOTAL                  {3.1 + indice:.2f}",
+    ]
+    for i, linea in enumerate(lineas):
+        dibujo.text((30, 30 + i * 40), linea, fill=0, font=letra)
+    return imagen
+
+def aplicar_inclinacion(imagen, angulo):
+    """Rotar en sentido antihorario (la corrección esperada es -angulo)"""
+    if not angulo:
+        return imagen
+    return imagen.rotate(angulo, resample=Image.Resampling.BICUBIC, fillcolor=255)
+
+def aplicar_ruido(imagen, intensidad, semilla=0):
+    """Ruido gaussiano (intensidad = desviación típica en niveles de gris)"""
+    if not intensidad:
+        return imagen
+    rng = np.random.default_rng(semilla)
+    array = np.asarray(imagen, dtype=np.float32)
+    array = array + rng.normal(0, intensidad, array.shape).astype(np.float32)
+    return Image.fromarray(np.clip(array, 0, 255).astype(np.uint8))
+
+def aplicar_sombra(imagen, intensidad):
+    """Sombra en degradado diagonal (intensidad 0-1 = oscurecimiento máximo)"""
+    if not intensidad:
+        return imagen
+    ancho, alto = imagen.size
+    gx = np.linspace(0, 1, ancho, dtype=np.float32)[None, :]
+    gy = np.linspace(0, 1, alto, dtype=np.float32)[:, None]
+    factor = 1.0 - intensidad * (gx + gy) / 2
+    array = np.asarray(imagen, dtype=np.float32) * factor
+    return Image.fromarray(np.clip(array, 0, 255).astype(np.uint8))
+
+GENERADORES = {
+    'texto': pagina_texto,
+    'tabla': tabla_reglada,
+    'factura': factura,
+}
+
+def generar_documento(tipo='texto', inclinacion=0.0, ruido=0.0, sombra=0.0, semilla=0, **opciones):
+    """
+    Generar una página sintética con degradaciones controladas
+
+    Args:
+        tipo: 'texto', 'tabla' o 'factura'
+        inclinacion: Grados de rotación
+        ruido: Desviación típica del ruido gaussiano
+        sombra: Intensidad de la sombra (0-1)
+        semilla: Semilla para el contenido y el ruido
+        **opciones: Parámetros del generador (ancho, alto, ...)
+
+    Returns:
+        PIL.Image en escala de grises
+    """
+    imagen = GENERADORES[tipo](semilla=semilla, **opciones)
+    imagen = aplicar_sombra(imagen, sombra)
+    imagen = aplicar_inclinacion(imagen, inclinacion)
+    return aplicar_ruido(imagen, ruido, semilla)
+
+def guardar_pdf(paginas, ruta, dpi=300):
+    """Guardar una lista de páginas como PDF rasterizado"""
+    primera = paginas[0].convert('RGB')
+    resto = [p.convert('RGB') for p in paginas[1:]]
+    primera.save(ruta, 'PDF', resolution=dpi, save_all=True, append_images=resto)
+    return ruta
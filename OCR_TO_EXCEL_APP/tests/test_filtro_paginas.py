@@ -0,0 +1,28 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+cv2 = pytest.importorskip('cv2')
+
+from utils.filtro_paginas import BLANCA, CONTENIDO, TINTA_BLANCA, clasificar_pagina
+
+def _pagina_a4(fondo=235):
+    """Página A4 a 150 DPI con el papel algo gris, como un escaneo"""
+    return np.full((1754, 1240), fondo, dtype=np.uint8)
+
+def test_pagina_vacia_es_blanca():
+    pagina = _pagina_a4()
+    # Motas de polvo del escáner
+    for x, y in ((200, 300), (900, 1200), (640, 80)):
+        cv2.circle(pagina, (x, y), 1, 30, -1)
+
+    assert clasificar_pagina(pagina)['clase'] == BLANCA
+
+def test_pagina_con_una_linea_corta_no_es_blanca():
+    pagina = _pagina_a4()
+    cv2.putText(pagina, "TOTAL 1.234,56 EUR", (120, 900), cv2.FONT_HERSHEY_SIMPLEX,
+                0.7, 20, 2, cv2.LINE_AA)
+
+    info = clasificar_pagina(pagina)
+    # Tan poca tinta que solo por la fracción pasaría por blanca
+    assert info['tinta'] < TINTA_BLANCA
+    assert info['clase'] == CONTENIDO
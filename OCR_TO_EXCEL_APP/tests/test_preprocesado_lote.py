@@ -0,0 +1,52 @@
+import os
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('cv2')
+pytest.importorskip('PIL')
+
+from PIL import Image, ImageEnhance
+
+from benchmarks.sinteticos import generar_documento
+from utils.preprocesar_imagen import mejorar_imagen_ocr
+from utils.preprocesado_lote import mejorar_imagenes_ocr
+
+@pytest.fixture
+def paginas(tmp_path):
+    """Páginas pequeñas con inclinación y ruido; la última de otro tamaño"""
+    rutas = []
+    for i in range(5):
+        ancho, alto = (620, 877) if i < 4 else (700, 500)
+        ruta = os.path.join(tmp_path, f'pagina_{i}.png')
+        generar_documento('texto', inclinacion=2.0 if i % 2 else 0.0, ruido=8, semilla=i,
+                          ancho=ancho, alto=alto).save(ruta)
+        rutas.append(ruta)
+    return rutas
+
+@pytest.mark.parametrize('config', [
+    None,
+    {'threshold': 'otsu', 'deskew': False},
+    {'threshold': 'simple', 'brightness': 1.2, 'contrast': 1.0, 'denoise': False},
+])
+def test_lote_igual_que_por_pagina(paginas, config):
+    lote = mejorar_imagenes_ocr(paginas, config, tam_lote=3)
+
+    assert len(lote) == len(paginas)
+    for ruta, imagen in zip(paginas, lote):
+        esperada = mejorar_imagen_ocr(ruta, config)
+        assert np.array_equal(np.asarray(imagen), np.asarray(esperada)), ruta
+
+@pytest.mark.parametrize('brillo, contraste', [(1.0, 1.5), (1.2, 2.0), (0.9, 3.0)])
+def test_lote_igual_que_image_enhance(paginas, brillo, contraste):
+    # Solo operaciones por píxel: la referencia es ImageEnhance + umbral fijo
+    config = {'brightness': brillo, 'contrast': contraste, 'threshold': 'simple',
+              'denoise': False, 'deskew': False}
+    lote = mejorar_imagenes_ocr(paginas, config, tam_lote=3)
+
+    for ruta, imagen in zip(paginas, lote):
+        with Image.open(ruta) as original:
+            referencia = ImageEnhance.Brightness(original.convert('L')).enhance(brillo)
+        referencia = ImageEnhance.Contrast(referencia).enhance(contraste)
+        referencia = referencia.point(lambda v: 255 if v > 150 else 0)
+        assert np.array_equal(np.asarray(imagen), np.asarray(referencia)), ruta
@@ -0,0 +1,34 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('cv2')
+PIL = pytest.importorskip('PIL')
+
+from PIL import Image, ImageEnhance
+
+from benchmarks.sinteticos import generar_documento
+from utils.preprocesar_imagen import _ajustar_brillo_gris, _ajustar_contraste_gris
+
+def _paginas():
+    """Todos los niveles de gris y una página sintética con ruido"""
+    rampa = np.tile(np.arange(256, dtype=np.uint8), (16, 1))
+    pagina = np.asarray(generar_documento('texto', ruido=8, semilla=3, ancho=620, alto=877))
+    return [rampa, pagina]
+
+def test_contraste_alto_satura_la_tinta():
+    gris = np.array([[0, 20, 60, 128, 230]], dtype=np.uint8)
+    assert _ajustar_contraste_gris(gris.copy(), 2.0).tolist() == [[0, 0, 32, 168, 255]]
+
+@pytest.mark.parametrize('factor', [0.5, 1.2, 1.5, 2.0, 3.0])
+def test_contraste_igual_que_image_enhance(factor):
+    for gris in _paginas():
+        esperada = ImageEnhance.Contrast(Image.fromarray(gris)).enhance(factor)
+        obtenida = _ajustar_contraste_gris(gris.copy(), factor)
+        assert np.array_equal(obtenida, np.asarray(esperada))
+
+@pytest.mark.parametrize('factor', [0.8, 1.2, 2.0])
+def test_brillo_igual_que_image_enhance(factor):
+    for gris in _paginas():
+        esperada = ImageEnhance.Brightness(Image.fromarray(gris)).enhance(factor)
+        obtenida = _ajustar_brillo_gris(gris.copy(), factor)
+        assert np.array_equal(obtenida, np.asarray(esperada))
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Backends de reconocimiento OCR
+
+- tesserocr: instancias de la API de Tesseract que se mantienen cargadas
+  (una por hilo/proceso e idioma) y se reutilizan entre páginas.
+- pytesseract: lanza un proceso 'tesseract' por imagen (respaldo).
+"""
+
+import os
+import atexit
+import threading
+
+import pytesseract
+from PIL import Image
+
+CAMPOS_TSV = ('block_num', 'par_num', 'line_num', 'word_num',
+              'left', 'top', 'width', 'height')
+
+def palabras_desde_tsv(tsv):
+    """
+    Extraer las palabras (nivel 5) de la salida TSV de Tesseract
+
+    Args:
+        tsv: Texto TSV con cabecera (level, page_num, ..., conf, text)
+
+    Returns:
+        Lista de dicts con 'texto', 'conf', 'left', 'top', 'width', 'height',
+        'block_num', 'par_num', 'line_num' y 'word_num'
+    """
+    lineas = tsv.splitlines()
+    if not lineas:
+        return []
+
+    cabecera = lineas[0].split('\t')
+    palabras = []
+
+    for linea in lineas[1:]:
+        valores = linea.split('\t')
+        if len(valores) < len(cabecera):
+            continue
+        fila = dict(zip(cabecera, valores))
+        texto = fila.get('text', '').strip()
+        if fila.get('level') != '5' or not texto:
+            continue
+
+        palabra = {campo: int(fila[campo]) for campo in CAMPOS_TSV}
+        palabra['texto'] = texto
+        palabra['conf'] = float(fila.get('conf', -1))
+        palabras.append(palabra)
+
+    return palabras
+
+def texto_desde_palabras(palabras):
+    """
+    Reconstruir el texto (líneas y párrafos) a partir de las palabras
+
+    Args:
+        palabras: Lista devuelta por palabras_desde_tsv
+
+    Returns:
+        str: Texto con una línea por línea de Tesseract
+    """
+    partes = []
+    anterior = None
+
+    for palabra in palabras:
+        linea = (palabra['block_num'], palabra['par_num'], palabra['line_num'])
+        if anterior is None:
+            pass
+        elif linea[:2] != anterior[:2]:
+            partes.append('\n\n')
+        elif linea != anterior:
+            partes.append('\n')
+        else:
+            partes.append(' ')
+        partes.append(palabra['texto'])
+        anterior = linea
+
+    return ''.join(partes) + ('\n' if partes else '')
+
+class BackendPytesseract:
+    """OCR mediante el ejecutable tesseract (un proceso por imagen)"""
+
+    nombre = 'pytesseract'
+
+    def reconocer(self, imagen, idioma='eng', psm='6', oem='3'):
+        """
+        Reconocer texto de una imagen
+
+        Args:
+            imagen: PIL.Image o array NumPy
+            idioma: Idioma(s) de Tesseract, p. ej. 'eng' o 'spa+eng'
+            psm: Modo de segmentación de página
+            oem: Motor OCR
+
+        Returns:
+            str: Texto reconocido
+        """
+        custom_config = f'--psm {psm} --oem {oem}'
+        return pytesseract.image_to_string(imagen, lang=idioma, config=custom_config)
+
+    def reconocer_con_cajas(self, imagen, idioma='eng', psm='6', oem='3'):
+        """
+        Reconocer texto y cajas de palabras en una sola pasada de Tesseract
+
+        Returns:
+            Dict con 'texto' y 'palabras'
+        """
+        custom_config = f'--psm {psm} --oem {oem}'
+        tsv = pytesseract.image_to_data(imagen, lang=idioma, config=custom_config)
+        palabras = palabras_desde_tsv(tsv)
+        return {'texto': texto_desde_palabras(palabras), 'palabras': palabras}
+
+    def version(self):
+        """Versión de Tesseract (se consulta una sola vez)"""
+        if not hasattr(self, '_version'):
+            self._version = str(pytesseract.get_tesseract_version())
+        return self._version
+
+class BackendTesserocr:
+    """OCR con instancias de libtesseract cargadas en memoria (tesserocr)"""
+
+    nombre = 'tesserocr'
+
+    def __init__(self, tessdata=None):
+        import tesserocr
+        self._tesserocr = tesserocr
+        self.tessdata = tessdata
+        self._local = threading.local()
+        # Instancias de cada hilo (threading.Thread -> {(idioma, oem): api})
+        self._por_hilo = {}
+        self._cerrojo = threading.Lock()
+        atexit.register(self.cerrar)
+
+    def _liberar_hilos_terminados(self):
+        """Liberar las instancias de los hilos que ya han terminado"""
+        with self._cerrojo:
+            terminados = [hilo for hilo in self._por_hilo if not hilo.is_alive()]
+            apis = [api for hilo in terminados for api in self._por_hilo.pop(hilo).values()]
+        for api in apis:
+            try:
+                api.End()
+            except Exception:
+                pass
+
+    def _api(self, idioma, oem):
+        """Obtener (o crear) la instancia del hilo actual para idioma/oem"""
+        apis = getattr(self._local, 'apis', None)
+        if apis is None:
+            apis = self._local.apis = {}
+            # Un hilo nuevo (p. ej. uno por clic en la interfaz): antes de
+            # cargar otro modelo se liberan los de los hilos terminados
+            self._liberar_hilos_terminados()
+            with self._cerrojo:
+                self._por_hilo[threading.current_thread()] = apis
+
+        clave = (idioma, str(oem))
+        api = apis.get(clave)
+        if api is None:
+            # OEM y PSM de tesserocr son clases de constantes: se pasan enteros
+            opciones = {'lang': idioma, 'oem': int(oem)}
+            if self.tessdata:
+                opciones['path'] = self.tessdata
+            api = self._tesserocr.PyTessBaseAPI(**opciones)
+            apis[clave] = api
+        return api
+
+    def reconocer(self, imagen, idioma='eng', psm='6', oem='3'):
+        """
+        Reconocer texto de una imagen reutilizando la instancia cargada
+
+        Args:
+            imagen: PIL.Image o array NumPy
+            idioma: Idioma(s) de Tesseract, p. ej. 'eng' o 'spa+eng'
+            psm: Modo de segmentación de página
+            oem: Motor OCR
+
+        Returns:
+            str: Texto reconocido
+        """
+        if not isinstance(imagen, Image.Image):
+            imagen = Image.fromarray(imagen)
+
+        api = self._api(idioma, oem)
+        api.SetPageSegMode(int(psm))
+        api.SetImage(imagen)
+        texto = api.GetUTF8Text()
+        api.Clear()
+        return texto
+
+    def reconocer_con_cajas(self, imagen, idioma='eng', psm='6', oem='3'):
+        """
+        Reconocer texto y cajas de palabras en una sola pasada de Tesseract
+
+        Returns:
+            Dict con 'texto' y 'palabras'
+        """
+        if not isinstance(imagen, Image.Image):
+            imagen = Image.fromarray(imagen)
+
+        api = self._api(idioma, oem)
+        api.SetPageSegMode(int(psm))
+        api.SetImage(imagen)
+        texto = api.GetUTF8Text()
+        # El TSV reutiliza el resultado del reconocimiento anterior
+        palabras = palabras_desde_tsv(api.GetTSVText(0))
+        api.Clear()
+        return {'texto': texto, 'palabras': palabras}
+
+    def version(self):
+        """Versión de libtesseract"""
+        return self._tesserocr.tesseract_version().split()[1]
+
+    def cerrar(self):
+        """Liberar todas las instancias de Tesseract"""
+        with self._cerrojo:
+            apis = [api for por_clave in self._por_hilo.values() for api in por_clave.values()]
+            self._por_hilo = {}
+            self._local = threading.local()
+        for api in apis:
+            try:
+                api.End()
+            except Exception:
+                pass
+
+_backends = {}
+_cerrojo_backends = threading.Lock()
+
+def tesserocr_disponible():
+    """Indicar si los bindings de libtesseract están instalados"""
+    try:
+        import tesserocr  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def obtener_backend(nombre='auto', tessdata=None):
+    """
+    Obtener el backend OCR (compartido dentro del proceso)
+
+    Args:
+        nombre: 'auto', 'tesserocr' o 'pytesseract'
+        tessdata: Carpeta tessdata opcional (solo tesserocr)
+
+    Returns:
+        Instancia de BackendTesserocr o BackendPytesseract
+    """
+    if tessdata and not os.path.isdir(tessdata):
+        tessdata = None
+
+    if nombre == 'auto':
+        nombre = 'tesserocr' if tesserocr_disponible() else 'pytesseract'
+
+    clave = (nombre, tessdata)
+    with _cerrojo_backends:
+        backend = _backends.get(clave)
+        if backend is None:
+            if nombre == 'tesserocr':
+                try:
+                    backend = BackendTesserocr(tessdata)
+                except Exception as e:
+                    print(f"tesserocr no disponible ({e}), usando pytesseract")
+                    backend = BackendPytesseract()
+            else:
+                backend = BackendPytesseract()
+            _backends[clave] = backend
+
+    return backend
+
+def backend_desde_config(config):
+    """
+    Obtener el backend indicado en la configuración (ocr.backend)
+
+    Args:
+        config: ConfigManager (u objeto con método get)
+
+    Returns:
+        Backend OCR
+    """
+    return obtener_backend(config.get("ocr.backend", "auto"),
+                           config.get("paths.tessdata", None))
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Caché en disco de resultados OCR direccionada por contenido
+
+La clave combina el hash de los bytes de la imagen, la configuración
+efectiva de preprocesamiento y OCR, la versión de Tesseract, el backend, la
+carpeta tessdata y el idioma.
+Cada entrada guarda texto, cajas de palabras y tabla; al superar el tamaño
+máximo se desalojan las entradas usadas hace más tiempo (LRU por mtime).
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+import threading
+
+TAMANO_BLOQUE = 1 << 20
+# Hashes recientes por (ruta, mtime, tamaño): los fotogramas de un TIFF
+# multipágina comparten archivo y no se vuelve a leer entero para cada uno
+MAX_HASHES_RECIENTES = 64
+
+_hashes_recientes = {}
+_cerrojo_hashes = threading.Lock()
+
+def hash_archivo(ruta):
+    """
+    Calcular el hash SHA-256 de un archivo leyéndolo por bloques
+
+    Si el archivo no ha cambiado (misma fecha de modificación y tamaño) se
+    reutiliza el hash calculado antes en este proceso.
+
+    Args:
+        ruta: Ruta del archivo
+
+    Returns:
+        str: Hash hexadecimal
+    """
+    info = os.stat(ruta)
+    clave = (os.path.abspath(ruta), info.st_mtime_ns, info.st_size)
+    with _cerrojo_hashes:
+        if clave in _hashes_recientes:
+            return _hashes_recientes[clave]
+
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(TAMANO_BLOQUE), b''):
+            h.update(bloque)
+    resultado = h.hexdigest()
+
+    with _cerrojo_hashes:
+        if len(_hashes_recientes) >= MAX_HASHES_RECIENTES:
+            # Desalojar el más antiguo (orden de inserción)
+            del _hashes_recientes[next(iter(_hashes_recientes))]
+        _hashes_recientes[clave] = resultado
+    return resultado
+
+def hash_imagen(imagen):
+    """
+    Calcular el hash SHA-256 de los píxeles de una imagen PIL
+
+    Args:
+        imagen: PIL.Image
+
+    Returns:
+        str: Hash hexadecimal
+    """
+    h = hashlib.sha256()
+    h.update(f"{imagen.mode}:{imagen.size}".encode('utf-8'))
+    h.update(imagen.tobytes())
+    return h.hexdigest()
+
+class CacheOCR:
+    """Caché de resultados OCR en disco con desalojo LRU por tamaño"""
+
+    def __init__(self, directorio='cache_ocr', max_bytes=512 * 1024 * 1024):
+        self.directorio = directorio
+        self.max_bytes = max_bytes
+        self.estadisticas = {'aciertos': 0, 'fallos': 0, 'guardados': 0, 'desalojos': 0}
+        self._cerrojo = threading.Lock()
+        os.makedirs(directorio, exist_ok=True)
+        self._tamano = self._calcular_tamano()
+
+    def clave(self, hash_datos, config, version_tesseract, idioma, backend=''):
+        """
+        Construir la clave de una entrada
+
+        Args:
+            hash_datos: Hash de los bytes de la imagen
+            config: ConfigInstantanea (usa su huella ya calculada),
+                ConfigManager u objeto con método get
+            version_tesseract: Versión de Tesseract
+            idioma: Idioma de OCR
+            backend: Nombre del backend que reconoce (con 'auto' en la
+                configuración, la huella no dice cuál se usó)
+
+        Returns:
+            str: Clave hexadecimal
+        """
+        huella = getattr(config, 'huella', None)
+        if huella is None:
+            ajustes = {
+                'preprocessing': config.get('preprocessing', {}),
+                'ocr': config.get('ocr', {}),
+            }
+            huella = json.dumps(ajustes, sort_keys=True, default=str)
+        h = hashlib.sha256()
+        h.update(hash_datos.encode('utf-8'))
+        h.update(huella.encode('utf-8'))
+        # Los modelos de otra carpeta tessdata dan otro resultado
+        tessdata = config.get('paths.tessdata', '') or ''
+        h.update(f"{version_tesseract}|{idioma}|{backend}|{tessdata}".encode('utf-8'))
+        return h.hexdigest()
+
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, clave[:2], f"{clave}.json")
+
+    def obtener(self, clave):
+        """
+        Buscar una entrada en la caché
+
+        Args:
+            clave: Clave devuelta por clave()
+
+        Returns:
+            Dict guardado o None si no existe
+        """
+        ruta = self._ruta(clave)
+        try:
+            with open(ruta, 'r', encoding='utf-8') as f:
+                resultado = json.load(f)
+            # Marcar como usada recientemente
+            os.utime(ruta, None)
+        except (OSError, ValueError):
+            with self._cerrojo:
+                self.estadisticas['fallos'] += 1
+            return None
+
+        with self._cerrojo:
+            self.estadisticas['aciertos'] += 1
+        return resultado
+
+    def guardar(self, clave, resultado):
+        """
+        Guardar una entrada (escritura atómica)
+
+        Args:
+            clave: Clave devuelta por clave()
+            resultado: Dict serializable (texto, palabras, tabla)
+        """
+        ruta = self._ruta(clave)
+        try:
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+            fd, temporal = tempfile.mkstemp(dir=os.path.dirname(ruta), suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(resultado, f, ensure_ascii=False)
+            # Al sobrescribir una entrada solo cuenta la diferencia de tamaño
+            try:
+                anterior = os.path.getsize(ruta)
+            except OSError:
+                anterior = 0
+            os.replace(temporal, ruta)
+            tamano = os.path.getsize(ruta)
+        except Exception as e:
+            print(f"Error guardando en caché OCR: {e}")
+            return
+
+        with self._cerrojo:
+            self.estadisticas['guardados'] += 1
+            self._tamano += tamano - anterior
+            desalojar = self._tamano > self.max_bytes
+
+        if desalojar:
+            self.desalojar()
+
+    def _entradas(self):
+        """Listar (mtime, tamaño, ruta) de todas las entradas"""
+        entradas = []
+        for sub in os.scandir(self.directorio):
+            if not sub.is_dir():
+                continue
+            for entrada in os.scandir(sub.path):
+                if entrada.name.endswith('.json'):
+                    try:
+                        info = entrada.stat()
+                    except OSError:
+                        continue
+                    entradas.append((info.st_mtime, info.st_size, entrada.path))
+        return entradas
+
+    def _calcular_tamano(self):
+        return sum(tamano for _, tamano, _ in self._entradas())
+
+    def desalojar(self):
+        """Eliminar las entradas menos usadas hasta quedar bajo el límite"""
+        with self._cerrojo:
+            # Otros procesos pueden compartir el directorio: medir de nuevo
+            entradas = sorted(self._entradas())
+            total = sum(tamano for _, tamano, _ in entradas)
+            # Dejar margen para no desalojar en cada guardado
+            objetivo = self.max_bytes * 0.9
+
+            for _, tamano, ruta in entradas:
+                if total <= objetivo:
+                    break
+                try:
+                    os.remove(ruta)
+                    total -= tamano
+                    self.estadisticas['desalojos'] += 1
+                except OSError:
+                    pass
+
+            self._tamano = total
+
+    def limpiar(self):
+        """Vaciar la caché"""
+        with self._cerrojo:
+            for _, _, ruta in self._entradas():
+                try:
+                    os.remove(ruta)
+                except OSError:
+                    pass
+            self._tamano = 0
+
+    def resumen(self):
+        """
+        Estadísticas de uso de la caché
+
+        Returns:
+            Dict con aciertos, fallos, tasa de aciertos y tamaño en bytes
+        """
+        with self._cerrojo:
+            datos = dict(self.estadisticas)
+            datos['bytes'] = self._tamano
+        consultas = datos['aciertos'] + datos['fallos']
+        datos['tasa_aciertos'] = datos['aciertos'] / consultas if consultas else 0.0
+        return datos
+
+_caches = {}
+_cerrojo_caches = threading.Lock()
+
+def cache_desde_config(config):
+    """
+    Obtener la caché configurada (cache.*) o None si está desactivada
+
+    Args:
+        config: ConfigManager (u objeto con método get)
+
+    Returns:
+        CacheOCR compartida dentro del proceso, o None
+    """
+    if not config.get('cache.enabled', True):
+        return None
+
+    directorio = config.get('cache.directory', 'cache_ocr')
+    max_bytes = int(float(config.get('cache.max_mb', 512)) * 1024 * 1024)
+
+    with _cerrojo_caches:
+        cache = _caches.get(directorio)
+        if cache is None:
+            try:
+                cache = CacheOCR(directorio, max_bytes)
+            except OSError as e:
+                print(f"Caché OCR desactivada: {e}")
+                return None
+            _caches[directorio] = cache
+        return cache
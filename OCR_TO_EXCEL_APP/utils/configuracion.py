@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Gestión de la configuración de la aplicación (sin dependencias de la GUI)
+
+- ConfigInstantanea: copia inmutable y tipada de la configuración. Cada
+  trabajo la captura una vez; get() es una consulta a un diccionario plano
+  y huella identifica los ajustes que afectan al resultado del OCR (clave
+  de caché).
+- ConfigManager.set() no escribe en disco en el acto: programa un guardado
+  atómico (archivo temporal + os.replace) en segundo plano que agrupa los
+  cambios seguidos, y avisa a los suscriptores de cada cambio.
+"""
+
+import os
+import copy
+import json
+import hashlib
+import tempfile
+import threading
+from dataclasses import dataclass, field, fields, asdict
+from functools import cached_property
+
+_VERDADERO = ('1', 'true', 'yes', 'si', 'sí', 'on')
+
+def _convertir(valor, defecto):
+    """Convertir un valor leído del JSON al tipo del valor por defecto"""
+    if isinstance(defecto, bool):
+        if isinstance(valor, str):
+            return valor.strip().lower() in _VERDADERO
+        return bool(valor)
+    if isinstance(defecto, int):
+        return int(float(valor))
+    if isinstance(defecto, float):
+        return float(valor)
+    if isinstance(defecto, str):
+        return str(valor)
+    return valor
+
+def _congelar(valor):
+    """Listas y diccionarios a tuplas (valores hashables)"""
+    if isinstance(valor, dict):
+        return tuple(sorted((k, _congelar(v)) for k, v in valor.items()))
+    if isinstance(valor, (list, tuple)):
+        return tuple(_congelar(v) for v in valor)
+    return valor
+
+@dataclass(frozen=True)
+class AjustesOCR:
+    """Sección ocr tipada"""
+    language: str = "eng"
+    psm: str = "6"
+    oem: str = "3"
+    dpi: int = 300
+    backend: str = "auto"
+    table_layout: str = "boxes"
+
+@dataclass(frozen=True)
+class AjustesPreprocesado:
+    """Sección preprocessing tipada"""
+    grayscale: bool = True
+    denoise: bool = True
+    contrast: float = 1.5
+    brightness: float = 1.0
+    threshold: str = "adaptive"
+    deskew: bool = True
+    auto_resolution: bool = True
+    page_filter: bool = True
+
+def _seccion_tipada(clase, valores):
+    """Construir una sección tipada; los valores inválidos toman el defecto"""
+    argumentos = {}
+    for campo in fields(clase):
+        if campo.name not in valores:
+            continue
+        try:
+            argumentos[campo.name] = _convertir(valores[campo.name], campo.default)
+        except (TypeError, ValueError):
+            print(f"Valor no válido para {campo.name}: {valores[campo.name]!r}")
+    return clase(**argumentos)
+
+@dataclass(frozen=True)
+class ConfigInstantanea:
+    """
+    Configuración congelada en un momento dado
+
+    Se usa igual que ConfigManager (get con claves 'seccion.clave') pero no
+    cambia aunque se modifique la configuración después; es hashable,
+    comparable y se puede enviar a otros procesos.
+    """
+    ocr: AjustesOCR
+    preprocessing: AjustesPreprocesado
+    valores: tuple
+    revision: int = field(default=0, compare=False)
+
+    @classmethod
+    def desde_dict(cls, config, revision=0):
+        """
+        Args:
+            config: Diccionario de secciones (ConfigManager.config)
+            revision: Número de cambios aplicados (solo informativo)
+        """
+        ocr = _seccion_tipada(AjustesOCR, config.get('ocr', {}))
+        preprocessing = _seccion_tipada(AjustesPreprocesado, config.get('preprocessing', {}))
+
+        planos = {}
+        for seccion, valores in config.items():
+            if isinstance(valores, dict):
+                for clave, valor in valores.items():
+                    planos[f"{seccion}.{clave}"] = _congelar(valor)
+            else:
+                planos[seccion] = _congelar(valores)
+        # Las secciones tipadas mandan sobre el JSON
+        for nombre, seccion in (('ocr', ocr), ('preprocessing', preprocessing)):
+            for clave, valor in asdict(seccion).items():
+                planos[f"{nombre}.{clave}"] = valor
+
+        return cls(ocr, preprocessing, tuple(sorted(planos.items())), revision)
+
+    @cached_property
+    def _indice(self):
+        """Claves planas y secciones para get()"""
+        indice = dict(self.valores)
+        secciones = {}
+        for clave, valor in self.valores:
+            if '.' in clave:
+                seccion, nombre = clave.split('.', 1)
+                secciones.setdefault(seccion, {})[nombre] = valor
+        return indice, secciones
+
+    def get(self, key, default=None):
+        """Obtener valor de configuración ('seccion.clave' o 'seccion')"""
+        indice, secciones = self._indice
+        if key in indice:
+            return indice[key]
+        if key in secciones:
+            # Copia: la instantánea no se puede modificar desde fuera
+            return dict(secciones[key])
+        return default
+
+    @cached_property
+    def huella(self):
+        """Hash de los ajustes que cambian el resultado del OCR"""
+        ajustes = {'ocr': asdict(self.ocr), 'preprocessing': asdict(self.preprocessing)}
+        datos = json.dumps(ajustes, sort_keys=True)
+        return hashlib.sha256(datos.encode('utf-8')).hexdigest()
+
+class ConfigManager:
+    """Gestor de configuración de la aplicación"""
+
+    DEFAULT_CONFIG = {
+        "app": {
+            "version": "3.0",
+            "language": "es",
+            "theme": "light",
+            "auto_save": True,
+            "auto_export": False
+        },
+        "paths": {
+            "tesseract": "",
+            "last_folder": "",
+            "export_folder": "exportados",
+            "tessdata": "tessdata",
+            "traces": ""
+        },
+        "ocr": {
+            "language": "eng",
+            "psm": "6",
+            "oem": "3",
+            "dpi": "300",
+            "backend": "auto",
+            "table_layout": "boxes"
+        },
+        "preprocessing": {
+            "grayscale": True,
+            "denoise": True,
+            "contrast": 1.5,
+            "brightness": 1.0,
+            "threshold": "adaptive",
+            "deskew": True,
+            "auto_resolution": True,
+            "page_filter": True
+        },
+        "cache": {
+            "enabled": True,
+            "directory": "cache_ocr",
+            "max_mb": 512
+        },
+        "jobs": {
+            "workers": 2
+        },
+        "export_settings": {
+            "format": "xlsx",
+            "include_timestamp": True,
+            "auto_open": False,
+            "sheet_name": "OCR_Data"
+        },
+        "ui": {
+            "font_size": 10,
+            "font_family": "Segoe UI",
+            "show_grid": True,
+            "alternate_colors": True
+        }
+    }
+
+    def __init__(self, config_file="config/settings.json", retardo_guardado=0.5):
+        """
+        Args:
+            config_file: Archivo JSON de configuración
+            retardo_guardado: Segundos sin cambios antes de escribir en
+                disco (los set() seguidos se guardan una sola vez)
+        """
+        self.config_file = config_file
+        self.retardo_guardado = retardo_guardado
+        self._cerrojo = threading.RLock()
+        self._temporizador = None
+        self._pendiente = False
+        self._revision = 0
+        self._instantanea = None
+        self._suscriptores = []
+        self.load_config()
+
+    def load_config(self):
+        """Cargar configuración desde archivo"""
+        try:
+            if os.path.exists(self.config_file):
+                with open(self.config_file, 'r', encoding='utf-8') as f:
+                    self.config = json.load(f)
+                # Actualizar con valores por defecto si faltan
+                for section, values in self.DEFAULT_CONFIG.items():
+                    if section not in self.config:
+                        self.config[section] = copy.deepcopy(values)
+                    else:
+                        for key, value in values.items():
+                            if key not in self.config[section]:
+                                self.config[section][key] = copy.deepcopy(value)
+            else:
+                self.config = copy.deepcopy(self.DEFAULT_CONFIG)
+                self.save_config()
+        except Exception as e:
+            print(f"Error cargando configuración: {e}")
+            self.config = copy.deepcopy(self.DEFAULT_CONFIG)
+        self._invalidar()
+
+    def save_config(self):
+        """Guardar configuración en archivo (escritura atómica, en el acto)"""
+        with self._cerrojo:
+            if self._temporizador is not None:
+                self._temporizador.cancel()
+                self._temporizador = None
+            self._pendiente = False
+            datos = json.dumps(self.config, indent=4, ensure_ascii=False)
+
+        try:
+            directorio = os.path.dirname(self.config_file) or '.'
+            os.makedirs(directorio, exist_ok=True)
+            # Archivo temporal en la misma carpeta + os.replace: nunca queda
+            # un settings.json a medio escribir
+            descriptor, temporal = tempfile.mkstemp(prefix='.settings_', suffix='.tmp',
+                                                    dir=directorio)
+            try:
+                with os.fdopen(descriptor, 'w', encoding='utf-8') as f:
+                    f.write(datos)
+                os.replace(temporal, self.config_file)
+            except BaseException:
+                os.unlink(temporal)
+                raise
+        except Exception as e:
+            print(f"Error guardando configuración: {e}")
+
+    def _programar_guardado(self):
+        """Guardar en segundo plano cuando pase retardo_guardado sin cambios"""
+        with self._cerrojo:
+            self._pendiente = True
+            if self._temporizador is not None:
+                self._temporizador.cancel()
+            self._temporizador = threading.Timer(self.retardo_guardado, self._guardar_si_pendiente)
+            self._temporizador.daemon = True
+            self._temporizador.start()
+
+    def _guardar_si_pendiente(self):
+        if self._pendiente:
+            self.save_config()
+
+    def flush(self):
+        """Escribir ya los cambios pendientes (p. ej. al cerrar la aplicación)"""
+        self._guardar_si_pendiente()
+
+    def _invalidar(self):
+        with self._cerrojo:
+            self._revision += 1
+            self._instantanea = None
+
+    def instantanea(self):
+        """
+        Instantánea inmutable de la configuración actual
+
+        Se reconstruye solo cuando la configuración ha cambiado.
+
+        Returns:
+            ConfigInstantanea
+        """
+        with self._cerrojo:
+            if self._instantanea is None:
+                self._instantanea = ConfigInstantanea.desde_dict(self.config, self._revision)
+            return self._instantanea
+
+    def get(self, key, default=None):
+        """Obtener valor de configuración"""
+        return self.instantanea().get(key, default)
+
+    def set(self, key, value, save=True):
+        """
+        Establecer valor de configuración
+
+        Args:
+            key: Clave 'seccion.clave'
+            value: Nuevo valor
+            save: Programar el guardado en disco (False para cambios solo
+                de esta ejecución, p. ej. opciones de línea de comandos)
+        """
+        try:
+            with self._cerrojo:
+                keys = key.split('.')
+                config = self.config
+                for k in keys[:-1]:
+                    if k not in config:
+                        config[k] = {}
+                    config = config[k]
+                if config.get(keys[-1]) == value and keys[-1] in config:
+                    return
+                config[keys[-1]] = value
+                self._invalidar()
+                suscriptores = list(self._suscriptores)
+            if save:
+                self._programar_guardado()
+        except Exception as e:
+            print(f"Error guardando configuración {key}: {e}")
+            return
+
+        for prefijo, funcion in suscriptores:
+            if prefijo is None or key == prefijo or key.startswith(prefijo + '.'):
+                try:
+                    funcion(key, value)
+                except Exception as e:
+                    print(f"Error notificando cambio de {key}: {e}")
+
+    def suscribir(self, funcion, prefijo=None):
+        """
+        Recibir los cambios de configuración
+
+        La función se llama como funcion(clave, valor) en el hilo que hizo
+        el set(); desde la GUI hay que pasar a la interfaz con root.after.
+
+        Args:
+            funcion: Función a llamar en cada cambio
+            prefijo: Solo cambios de esta sección o clave (p. ej. 'ocr')
+
+        Returns:
+            Función sin argumentos que cancela la suscripción
+        """
+        entrada = (prefijo, funcion)
+        with self._cerrojo:
+            self._suscriptores.append(entrada)
+
+        def cancelar():
+            with self._cerrojo:
+                if entrada in self._suscriptores:
+                    self._suscriptores.remove(entrada)
+        return cancelar
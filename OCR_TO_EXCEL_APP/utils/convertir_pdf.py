@@ -5,17 +5,50 @@ Convertidor de PDF a imágenes para OCR
 
 import os
 import sys
-from pdf2image import convert_from_path
+import queue
+import threading
+from pdf2image import convert_from_path, pdfinfo_from_path
 from PIL import Image
 import tempfile
 
+try:
+    from utils.capa_texto import extraer_capa_texto, texto_es_util
+    from utils.resolucion import resolver_dpi
+    from utils.filtro_paginas import CONTENIDO, clasificar_origen
+    from utils.cache_ocr import hash_archivo
+    from utils.instrumentacion import PERFILADOR_NULO
+except ImportError:
+    from capa_texto import extraer_capa_texto, texto_es_util
+    from resolucion import resolver_dpi
+    from filtro_paginas import CONTENIDO, clasificar_origen
+    from cache_ocr import hash_archivo
+    from instrumentacion import PERFILADOR_NULO
+
+def obtener_backend_ocr(nombre='auto'):
+    """
+    Obtener el backend OCR compartido (tesserocr si está instalado)
+    
+    Args:
+        nombre: 'auto', 'tesserocr' o 'pytesseract'
+    
+    Returns:
+        Backend OCR con método reconocer()
+    """
+    try:
+        from utils.backend_ocr import obtener_backend
+    except ImportError:
+        from backend_ocr import obtener_backend
+    
+    return obtener_backend(nombre)
+
 def pdf_a_imagenes(ruta_pdf, dpi=300, formato='PNG', primera_pagina=None, ultima_pagina=None):
     """
     Convertir PDF a imágenes
     
     Args:
         ruta_pdf: Ruta del archivo PDF
-        dpi: Resolución DPI (recomendado 300 para OCR)
+        dpi: Resolución DPI (recomendado 300 para OCR) o 'auto' para
+            elegirla según el tamaño del texto (utils.resolucion)
         formato: Formato de salida ('PNG', 'JPEG', 'TIFF')
         primera_pagina: Primera página a convertir (1-indexed)
         ultima_pagina: Última página a convertir (1-indexed)
@@ -29,6 +62,8 @@ def pdf_a_imagenes(ruta_pdf, dpi=300, formato='PNG', primera_pagina=None, ultima
         if not os.path.exists(ruta_pdf):
             raise FileNotFoundError(f"PDF no encontrado: {ruta_pdf}")
         
+        dpi = resolver_dpi(ruta_pdf, dpi, primera_pagina or 1)
+        
         print(f"Convirtiendo PDF: {ruta_pdf}")
         print(f"DPI: {dpi}, Formato: {formato}")
         
@@ -126,38 +161,252 @@ def pdf_a_imagen_unica(ruta_pdf, dpi=300, unir_vertical=True):
         print(f"Error convirtiendo PDF a imagen única: {e}")
         return None
 
-def extraer_texto_pdf(ruta_pdf, idioma='eng'):
+def contar_paginas_pdf(ruta_pdf):
+    """
+    Obtener el número de páginas de un PDF sin renderizarlo
+    
+    Args:
+        ruta_pdf: Ruta del archivo PDF
+    
+    Returns:
+        int: Número de páginas
+    """
+    return int(pdfinfo_from_path(ruta_pdf)['Pages'])
+
+def iterar_paginas_pdf(ruta_pdf, dpi=300, paginas=None, paginas_por_bloque=2,
+                       max_en_vuelo=2, grayscale=False):
+    """
+    Renderizar un PDF por rangos de páginas en segundo plano
+    
+    Un hilo renderiza con first_page/last_page mientras el consumidor procesa
+    la página anterior. Nunca hay más de max_en_vuelo páginas renderizadas
+    y sin liberar a la vez; cada imagen se cierra al pedir la siguiente.
+    
+    Args:
+        ruta_pdf: Ruta del archivo PDF
+        dpi: Resolución DPI
+        paginas: Lista de números de página (1-indexed), None para todas
+        paginas_por_bloque: Páginas renderizadas por llamada a pdftoppm
+        max_en_vuelo: Máximo de páginas en memoria
+        grayscale: Renderizar directamente en escala de grises
+    
+    Yields:
+        Tupla (numero_pagina, PIL.Image)
+    """
+    if paginas is None:
+        paginas = list(range(1, contar_paginas_pdf(ruta_pdf) + 1))
+    
+    max_en_vuelo = max(1, max_en_vuelo)
+    paginas_por_bloque = max(1, min(paginas_por_bloque, max_en_vuelo))
+    
+    # Agrupar páginas consecutivas en rangos de como mucho paginas_por_bloque
+    rangos = []
+    for numero in paginas:
+        if rangos and numero == rangos[-1][1] + 1 and numero - rangos[-1][0] < paginas_por_bloque:
+            rangos[-1][1] = numero
+        else:
+            rangos.append([numero, numero])
+    
+    cola = queue.Queue()
+    huecos = threading.Semaphore(max_en_vuelo)
+    detener = threading.Event()
+    FIN = object()
+    
+    def renderizar():
+        try:
+            for primera, ultima in rangos:
+                # Reservar un hueco por página antes de renderizar el rango
+                for _ in range(ultima - primera + 1):
+                    while not huecos.acquire(timeout=0.1):
+                        if detener.is_set():
+                            return
+                if detener.is_set():
+                    return
+                
+                imagenes = convert_from_path(
+                    ruta_pdf,
+                    dpi=dpi,
+                    first_page=primera,
+                    last_page=ultima,
+                    grayscale=grayscale,
+                    thread_count=1
+                )
+                for desplazamiento, imagen in enumerate(imagenes):
+                    cola.put((primera + desplazamiento, imagen))
+        except Exception as e:
+            cola.put(e)
+        finally:
+            cola.put(FIN)
+    
+    hilo = threading.Thread(target=renderizar, daemon=True)
+    hilo.start()
+    
+    try:
+        while True:
+            elemento = cola.get()
+            if elemento is FIN:
+                break
+            if isinstance(elemento, Exception):
+                raise elemento
+            
+            numero, imagen = elemento
+            try:
+                yield numero, imagen
+            finally:
+                imagen.close()
+                huecos.release()
+    finally:
+        detener.set()
+        hilo.join(timeout=5)
+
+def extraer_texto_pdf_stream(ruta_pdf, idioma='eng', dpi=300, paginas_por_bloque=1,
+                             max_en_vuelo=2, usar_capa_texto=True, paginas_por_lectura=50,
+                             filtrar_paginas=True, psm='3', oem='3', backend=None, cache=None,
+                             config=None, perfilador=None):
+    """
+    Extraer texto de un PDF página a página con memoria acotada
+    
+    Las páginas con capa de texto nativa legible se leen directamente del
+    PDF; solo las escaneadas (o con texto basura) se renderizan y pasan por OCR.
+    
+    Args:
+        ruta_pdf: Ruta del archivo PDF
+        idioma: Idioma para OCR
+        dpi: Resolución DPI o 'auto' (según el tamaño del texto)
+        paginas_por_bloque: Páginas renderizadas por llamada a pdftoppm
+        max_en_vuelo: Máximo de páginas renderizadas en memoria
+        usar_capa_texto: Probar primero la capa de texto nativa
+        paginas_por_lectura: Páginas leídas por llamada a pdftotext
+        filtrar_paginas: No pasar por OCR las páginas en blanco o separadoras
+            (utils.filtro_paginas)
+        psm: Modo de segmentación de página
+        oem: Motor OCR
+        backend: Backend OCR (utils.backend_ocr); por defecto el compartido
+        cache: CacheOCR opcional; las páginas ya reconocidas no se renderizan
+        config: Configuración cuya huella entra en la clave de caché
+            (obligatoria si se pasa cache)
+        perfilador: Perfilador opcional (utils.instrumentacion)
+    
+    Yields:
+        Dict con 'pagina', 'texto', 'palabras' y 'metodo' ('texto', 'ocr' u
+        'omitida', que lleva además 'clase' y 'filtro') a medida que se
+        procesa cada página
+    """
+    # Backend con instancias de Tesseract reutilizadas entre páginas
+    backend = backend or obtener_backend_ocr()
+    perfilador = perfilador or PERFILADOR_NULO
+    
+    total = contar_paginas_pdf(ruta_pdf)
+    # Una sola resolución para todo el documento (también para las
+    # coordenadas de la capa de texto)
+    dpi = resolver_dpi(ruta_pdf, dpi)
+    
+    claves = {}
+    if cache:
+        # Un solo hash del PDF; cada página se distingue por número y DPI
+        with perfilador.etapa('cache'):
+            hash_pdf = hash_archivo(ruta_pdf)
+            version = backend.version()
+        
+        def clave_pagina(numero):
+            if numero not in claves:
+                claves[numero] = cache.clave(f"{hash_pdf}:{numero}:{dpi}", config, version,
+                                             idioma, backend.nombre)
+            return claves[numero]
+    
+    for inicio in range(1, total + 1, paginas_por_lectura):
+        fin = min(total, inicio + paginas_por_lectura - 1)
+        
+        capa = {}
+        if usar_capa_texto:
+            try:
+                capa = extraer_capa_texto(ruta_pdf, inicio, fin, dpi=dpi)
+            except Exception as e:
+                print(f"No se pudo leer la capa de texto ({e}), se usará OCR")
+        
+        pendientes_ocr = [n for n in range(inicio, fin + 1)
+                          if n not in capa or not texto_es_util(capa[n]['texto'])]
+        con_texto = set(range(inicio, fin + 1)) - set(pendientes_ocr)
+        
+        # Las páginas que ya están en la caché no se renderizan
+        en_cache = {}
+        if cache:
+            with perfilador.etapa('cache'):
+                for numero in pendientes_ocr:
+                    guardado = cache.obtener(clave_pagina(numero))
+                    if guardado is not None:
+                        en_cache[numero] = guardado
+            pendientes_ocr = [n for n in pendientes_ocr if n not in en_cache]
+        
+        paginas_ocr = iterar_paginas_pdf(ruta_pdf, dpi=dpi, paginas=pendientes_ocr,
+                                         paginas_por_bloque=paginas_por_bloque,
+                                         max_en_vuelo=max_en_vuelo) if pendientes_ocr else iter(())
+        
+        try:
+            for numero in range(inicio, fin + 1):
+                if numero in con_texto:
+                    yield {'pagina': numero, 'texto': capa[numero]['texto'],
+                           'palabras': capa[numero]['palabras'], 'metodo': 'texto'}
+                    continue
+                
+                if numero in en_cache:
+                    yield {'pagina': numero, 'texto': en_cache[numero]['texto'],
+                           'palabras': en_cache[numero]['palabras'], 'metodo': 'ocr',
+                           'desde_cache': True}
+                    continue
+                
+                with perfilador.etapa('decode.renderizar'):
+                    _, imagen = next(paginas_ocr)
+                if filtrar_paginas:
+                    with perfilador.etapa('preprocess.filtro'):
+                        filtro = clasificar_origen(imagen)
+                    if filtro['clase'] != CONTENIDO:
+                        yield {'pagina': numero, 'texto': '', 'palabras': [], 'metodo': 'omitida',
+                               'clase': filtro['clase'], 'filtro': filtro}
+                        continue
+                with perfilador.etapa('ocr'):
+                    reconocido = backend.reconocer_con_cajas(imagen, idioma=idioma, psm=psm,
+                                                             oem=oem)
+                if cache:
+                    with perfilador.etapa('cache.guardar'):
+                        cache.guardar(clave_pagina(numero), reconocido)
+                yield {'pagina': numero, 'texto': reconocido['texto'],
+                       'palabras': reconocido['palabras'], 'metodo': 'ocr'}
+        finally:
+            if hasattr(paginas_ocr, 'close'):
+                paginas_ocr.close()
+
+def extraer_texto_pdf(ruta_pdf, idioma='eng', dpi='auto'):
     """
     Extraer texto de PDF directamente usando OCR en cada página
     
     Args:
         ruta_pdf: Ruta del archivo PDF
         idioma: Idioma para OCR
+        dpi: Resolución DPI o 'auto' (según el tamaño del texto)
     
     Returns:
         str: Texto extraído
     """
     try:
-        import pytesseract
-        
-        # Convertir PDF a imágenes
-        imagenes = convert_from_path(ruta_pdf, dpi=300)
-        
         textos = []
+        metodos = {'texto': 0, 'ocr': 0, 'omitida': 0}
         
-        for i, imagen in enumerate(imagenes):
-            print(f"Procesando página {i+1} de {len(imagenes)}...")
-            
-            # Convertir PIL a formato compatible con Tesseract
-            texto = pytesseract.image_to_string(imagen, lang=idioma)
-            textos.append(texto)
+        # Capa de texto nativa si existe; si no, renderizado y OCR solapados
+        for resultado in extraer_texto_pdf_stream(ruta_pdf, idioma=idioma, dpi=dpi):
+            print(f"Página {resultado['pagina']} procesada ({resultado['metodo']})")
+            metodos[resultado['metodo']] += 1
+            if resultado['metodo'] == 'omitida':
+                # Queda constancia en el texto para poder auditarla
+                textos.append(f"--- Página {resultado['pagina']} (omitida: {resultado['clase']}) ---")
+                continue
+            textos.append(f"--- Página {resultado['pagina']} ---\n\n{resultado['texto']}")
         
-        # Unir todos los textos
-        texto_completo = '\n\n--- Página {} ---\n\n'.join(
-            [f'{i+1}' for i in range(len(textos))]
-        ).format(*textos)
+        print(f"Páginas con capa de texto: {metodos['texto']}, por OCR: {metodos['ocr']}, "
+              f"omitidas: {metodos['omitida']}")
         
-        return texto_completo
+        # Unir todos los textos
+        return '\n\n'.join(textos)
         
     except ImportError:
         print("Error: pytesseract no está instalado")
@@ -166,39 +415,36 @@ def extraer_texto_pdf(ruta_pdf, idioma='eng'):
         print(f"Error extrayendo texto: {e}")
         return ""
 
-def procesar_pdf_lote(carpeta_pdfs, dpi=300, formato='PNG'):
+def procesar_pdf_lote(carpeta_pdfs, dpi=300, formato='PNG', carpeta_salida=None, **opciones):
     """
-    Procesar múltiples PDFs en una carpeta
+    Procesar todos los PDF de una carpeta (página a página, en paralelo)
+    
+    Cada página es una tarea de un pool de procesos; el estado se guarda en
+    un manifiesto para reanudar el lote si se interrumpe y las carpetas
+    temporales se borran al terminar cada página. Ver utils.lote_pdf.
     
     Args:
         carpeta_pdfs: Carpeta con archivos PDF
-        dpi: Resolución DPI
-        formato: Formato de salida
+        dpi: Resolución DPI o 'auto'
+        formato: Formato de las imágenes renderizadas
+        carpeta_salida: Carpeta de resultados (por defecto, resultados_ocr
+            dentro de carpeta_pdfs)
+        **opciones: procesos, ocr, guardar_imagenes, reintentar_errores,
+            config, al_terminar (ver lote_pdf.procesar_carpeta_pdf)
     
     Returns:
-        Dict: {nombre_pdf: [rutas_imagenes]}
+        Dict con el estado de cada PDF, páginas procesadas y páginas por segundo
     """
+    try:
+        from utils.lote_pdf import procesar_carpeta_pdf
+    except ImportError:
+        from lote_pdf import procesar_carpeta_pdf
     
-    resultados = {}
+    if carpeta_salida is None:
+        carpeta_salida = os.path.join(carpeta_pdfs, 'resultados_ocr')
     
-    # Buscar archivos PDF en la carpeta
-    for archivo in os.listdir(carpeta_pdfs):
-        if archivo.lower().endswith('.pdf'):
-            ruta_pdf = os.path.join(carpeta_pdfs, archivo)
-            
-            print(f"\nProcesando: {archivo}")
-            
-            # Convertir PDF
-            imagenes, temp_dir = pdf_a_imagenes(ruta_pdf, dpi, formato)
-            
-            if imagenes:
-                resultados[archivo] = {
-                    'imagenes': imagenes,
-                    'temp_dir': temp_dir,
-                    'paginas': len(imagenes)
-                }
-    
-    return resultados
+    return procesar_carpeta_pdf(carpeta_pdfs, carpeta_salida, dpi=dpi, formato=formato,
+                                **opciones)
 
 if __name__ == "__main__":
     # Ejemplo de uso desde línea de comandos
@@ -211,13 +457,15 @@ Ejemplos:
   python convertir_pdf.py documento.pdf
   python convertir_pdf.py documento.pdf 300 PNG
   python convertir_pdf.py documento.pdf 150 JPEG
+  python convertir_pdf.py documento.pdf auto PNG
   
 Formato soportados: PNG, JPEG, TIFF
         """)
         sys.exit(1)
     
     ruta_pdf = sys.argv[1]
-    dpi = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    # 'auto': DPI según el tamaño del texto
+    dpi = sys.argv[2] if len(sys.argv) > 2 else 300
     formato = sys.argv[3] if len(sys.argv) > 3 else 'PNG'
     
     if not os.path.exists(ruta_pdf):
@@ -236,11 +484,12 @@ Formato soportados: PNG, JPEG, TIFF
         
         if respuesta.lower() == 's':
             try:
-                import pytesseract
+                backend = obtener_backend_ocr()
                 
                 for ruta_imagen in imagenes:
                     print(f"\nProcesando: {os.path.basename(ruta_imagen)}")
-                    texto = pytesseract.image_to_string(ruta_imagen, lang='spa')
+                    with Image.open(ruta_imagen) as imagen:
+                        texto = backend.reconocer(imagen, idioma='spa', psm='3')
                     
                     # Guardar texto extraído
                     ruta_txt = ruta_imagen.replace(f'.{formato.lower()}', '.txt')
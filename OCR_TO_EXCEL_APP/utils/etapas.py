@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Cadena de etapas de preprocesamiento con resultados intermedios memorizados
+
+Cada etapa tiene una clave que depende de sus propios parámetros y de la
+clave de la etapa anterior. Al cambiar un ajuste solo se recalcula desde la
+primera etapa afectada; las anteriores se reutilizan de la memoria.
+"""
+
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Grupo de instrumentación de cada etapa (por defecto 'preprocess')
+GRUPOS_ETAPA = {'cargar': 'decode', 'deskew': 'deskew'}
+
+class Etapa:
+    """Etapa de preprocesamiento: función pura + parámetros"""
+
+    def __init__(self, nombre, funcion, **parametros):
+        self.nombre = nombre
+        self.funcion = funcion
+        self.parametros = parametros
+
+    def clave(self, clave_anterior):
+        """
+        Calcular la clave de la salida de esta etapa
+
+        Args:
+            clave_anterior: Clave de la entrada (etapa anterior u origen)
+
+        Returns:
+            str: Clave hexadecimal
+        """
+        datos = json.dumps([clave_anterior, self.nombre, self.parametros],
+                           sort_keys=True, default=str)
+        return hashlib.sha1(datos.encode('utf-8')).hexdigest()
+
+    def aplicar(self, entrada, perfilador=None):
+        """Ejecutar la etapa (no debe modificar la entrada)"""
+        if perfilador is None:
+            return self.funcion(entrada, **self.parametros)
+        grupo = GRUPOS_ETAPA.get(self.nombre, 'preprocess')
+        with perfilador.etapa(f"{grupo}.{self.nombre}"):
+            return self.funcion(entrada, **self.parametros)
+
+def _tamano(valor):
+    """Bytes aproximados de un resultado intermedio (ndarray o PIL.Image)"""
+    if hasattr(valor, 'nbytes'):
+        return valor.nbytes
+    if hasattr(valor, 'size') and hasattr(valor, 'getbands'):
+        ancho, alto = valor.size
+        return ancho * alto * len(valor.getbands())
+    return 0
+
+class CadenaPreprocesado:
+    """Ejecutor de cadenas de etapas con memoria LRU acotada por bytes"""
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.estadisticas = {'reutilizadas': 0, 'calculadas': 0}
+        self._memo = OrderedDict()
+        self._bytes = 0
+        self._cerrojo = threading.Lock()
+
+    def ejecutar(self, clave_origen, origen, etapas, perfilador=None):
+        """
+        Ejecutar una cadena reutilizando los resultados memorizados
+
+        Args:
+            clave_origen: Identificador estable del origen (p. ej. ruta +
+                mtime); None desactiva la memoria para esta llamada
+            origen: Entrada de la primera etapa
+            etapas: Lista de Etapa en orden
+            perfilador: Perfilador opcional; solo se miden las etapas que
+                se calculan (las reutilizadas no cuestan)
+
+        Returns:
+            Salida de la última etapa (no debe modificarse en el sitio)
+        """
+        if clave_origen is None or self.max_bytes <= 0:
+            valor = origen
+            for etapa in etapas:
+                valor = etapa.aplicar(valor, perfilador)
+            with self._cerrojo:
+                self.estadisticas['calculadas'] += len(etapas)
+            return valor
+
+        claves = []
+        clave = clave_origen
+        for etapa in etapas:
+            clave = etapa.clave(clave)
+            claves.append(clave)
+
+        # Buscar la etapa más avanzada que ya esté calculada
+        inicio = 0
+        valor = origen
+        with self._cerrojo:
+            for i in range(len(etapas) - 1, -1, -1):
+                if claves[i] in self._memo:
+                    valor = self._memo[claves[i]]
+                    self._memo.move_to_end(claves[i])
+                    inicio = i + 1
+                    break
+            self.estadisticas['reutilizadas'] += inicio
+
+        for i in range(inicio, len(etapas)):
+            valor = etapas[i].aplicar(valor, perfilador)
+            self._guardar(claves[i], valor)
+
+        with self._cerrojo:
+            self.estadisticas['calculadas'] += len(etapas) - inicio
+
+        return valor
+
+    def _guardar(self, clave, valor):
+        tamano = _tamano(valor)
+        if tamano > self.max_bytes:
+            return
+
+        # Los arrays memorizados son compartidos: protegerlos de escrituras
+        if hasattr(valor, 'flags'):
+            valor.flags.writeable = False
+
+        with self._cerrojo:
+            if clave in self._memo:
+                self._memo.move_to_end(clave)
+                return
+            self._memo[clave] = valor
+            self._bytes += tamano
+            while self._bytes > self.max_bytes and self._memo:
+                _, antiguo = self._memo.popitem(last=False)
+                self._bytes -= _tamano(antiguo)
+
+    def limpiar(self):
+        """Vaciar la memoria de resultados intermedios"""
+        with self._cerrojo:
+            self._memo.clear()
+            self._bytes = 0
+
+_cadena = CadenaPreprocesado()
+
+def cadena_por_defecto():
+    """Cadena compartida por ImageProcessor y mejorar_imagen_ocr"""
+    return _cadena
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Exportadores en streaming (memoria constante): Excel, CSV y Parquet
+
+Las filas se escriben según van terminando las páginas, sin construir un
+DataFrame ni un libro completo en memoria:
+- xlsx: libro openpyxl en modo write_only; al llegar al límite de filas de
+  Excel se continúa en una hoja nueva (OCR_Data, OCR_Data_2, ...).
+- csv: csv.writer sobre el archivo abierto.
+- parquet: pyarrow.parquet.ParquetWriter por bloques de filas.
+"""
+
+import os
+import re
+import csv
+
+import pandas as pd
+
+MAX_FILAS_EXCEL = 1048576
+LARGO_MAX_HOJA = 31
+
+FORMATOS = ('xlsx', 'csv', 'parquet')
+
+def _nombre_hoja(nombre, indice):
+    """Nombre de hoja válido para Excel (la primera sin sufijo)"""
+    nombre = re.sub(r'[\[\]:*?/\\]', '_', nombre or 'OCR_Data')
+    sufijo = '' if indice == 1 else f'_{indice}'
+    return nombre[:LARGO_MAX_HOJA - len(sufijo)] + sufijo
+
+def _celda(valor):
+    """Valor de celda serializable (NA de pandas y tipos NumPy a Python)"""
+    if valor is None or valor is pd.NA:
+        return None
+    if hasattr(valor, 'item'):
+        valor = valor.item()
+    if isinstance(valor, float) and valor != valor:
+        return None
+    return valor
+
+class _Exportador:
+    """Base: encabezados fijos, filas normalizadas y gestor de contexto"""
+
+    def __init__(self, ruta, encabezados):
+        self.ruta = ruta
+        self.encabezados = list(encabezados)
+        self.filas_escritas = 0
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+    def _normalizar(self, fila):
+        """Ajustar la fila al número de columnas (el exceso va a la última)"""
+        n = len(self.encabezados)
+        fila = [_celda(v) for v in fila]
+        if len(fila) > n > 0:
+            resto = ' '.join(str(v) for v in fila[n - 1:] if v is not None)
+            fila = fila[:n - 1] + [resto]
+        elif len(fila) < n:
+            fila = fila + [None] * (n - len(fila))
+        return fila
+
+    def escribir_filas(self, filas):
+        """Escribir un iterable de filas (listas o tuplas)"""
+        raise NotImplementedError
+
+    def escribir_dataframe(self, dataframe):
+        """Escribir un bloque de filas de un DataFrame"""
+        self.escribir_filas(dataframe.itertuples(index=False, name=None))
+
+    def cerrar(self):
+        raise NotImplementedError
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        self.cerrar()
+        return False
+
+class ExportadorXlsx(_Exportador):
+    """Excel en modo write_only con cambio de hoja al llegar al límite"""
+
+    def __init__(self, ruta, encabezados, hoja='OCR_Data', max_filas=MAX_FILAS_EXCEL):
+        """
+        Args:
+            ruta: Archivo .xlsx de salida
+            encabezados: Nombres de columna (se repiten en cada hoja)
+            hoja: Nombre base de las hojas (export_settings.sheet_name)
+            max_filas: Filas por hoja incluido el encabezado
+        """
+        super().__init__(ruta, encabezados)
+        from openpyxl import Workbook
+
+        self.hoja = hoja
+        self.max_filas = max_filas
+        self.hojas = 0
+        self._libro = Workbook(write_only=True)
+        self._nueva_hoja()
+
+    def _nueva_hoja(self):
+        self.hojas += 1
+        self._hoja = self._libro.create_sheet(_nombre_hoja(self.hoja, self.hojas))
+        self._hoja.append(self.encabezados)
+        self._filas_hoja = 1
+
+    def escribir_filas(self, filas):
+        for fila in filas:
+            if self._filas_hoja >= self.max_filas:
+                self._nueva_hoja()
+            self._hoja.append(self._normalizar(fila))
+            self._filas_hoja += 1
+            self.filas_escritas += 1
+
+    def cerrar(self):
+        if self._libro is not None:
+            self._libro.save(self.ruta)
+            self._libro = None
+
+class ExportadorCsv(_Exportador):
+    """CSV escrito fila a fila"""
+
+    def __init__(self, ruta, encabezados, separador=',', codificacion='utf-8-sig'):
+        """
+        Args:
+            codificacion: 'utf-8-sig' para que Excel reconozca los acentos
+        """
+        super().__init__(ruta, encabezados)
+        self._archivo = open(ruta, 'w', encoding=codificacion, newline='')
+        self._escritor = csv.writer(self._archivo, delimiter=separador)
+        self._escritor.writerow(self.encabezados)
+
+    def escribir_filas(self, filas):
+        for fila in filas:
+            self._escritor.writerow(['' if v is None else v for v in self._normalizar(fila)])
+            self.filas_escritas += 1
+
+    def cerrar(self):
+        if self._archivo is not None:
+            self._archivo.close()
+            self._archivo = None
+
+class ExportadorParquet(_Exportador):
+    """Parquet por grupos de filas con pyarrow"""
+
+    def __init__(self, ruta, encabezados, filas_por_grupo=50000):
+        """
+        Args:
+            filas_por_grupo: Filas acumuladas antes de escribir un grupo
+        """
+        super().__init__(ruta, encabezados)
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("Para exportar a Parquet instala pyarrow: pip install pyarrow")
+
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self.filas_por_grupo = filas_por_grupo
+        self._escritor = None
+        self._esquema = None
+        self._pendientes = []
+
+    def _escribir_tabla(self, tabla):
+        if self._escritor is None:
+            self._esquema = tabla.schema
+            self._escritor = self._pq.ParquetWriter(self.ruta, self._esquema)
+        else:
+            tabla = tabla.cast(self._esquema)
+        self._escritor.write_table(tabla)
+
+    def _vaciar(self):
+        if not self._pendientes:
+            return
+        columnas = list(zip(*self._pendientes))
+        datos = {nombre: [None if v is None else str(v) for v in columna]
+                 for nombre, columna in zip(self.encabezados, columnas)}
+        self._pendientes = []
+        esquema = self._pa.schema([(n, self._pa.string()) for n in self.encabezados])
+        self._escribir_tabla(self._pa.Table.from_pydict(datos, schema=esquema))
+
+    def escribir_filas(self, filas):
+        for fila in filas:
+            self._pendientes.append(self._normalizar(fila))
+            self.filas_escritas += 1
+            if len(self._pendientes) >= self.filas_por_grupo:
+                self._vaciar()
+
+    def escribir_dataframe(self, dataframe):
+        """Bloques de DataFrame: se conservan los tipos de las columnas"""
+        self._vaciar()
+        dataframe = dataframe.copy(deep=False)
+        dataframe.columns = self.encabezados[:len(dataframe.columns)]
+        self._escribir_tabla(self._pa.Table.from_pandas(dataframe, preserve_index=False))
+        self.filas_escritas += len(dataframe)
+
+    def cerrar(self):
+        if self._pq is None:
+            return
+        self._vaciar()
+        if self._escritor is None:
+            # Sin filas: escribir un archivo vacío con las columnas
+            esquema = self._pa.schema([(n, self._pa.string()) for n in self.encabezados])
+            self._pq.write_table(esquema.empty_table(), self.ruta)
+        else:
+            self._escritor.close()
+            self._escritor = None
+        self._pq = None
+
+def formato_desde_ruta(ruta, defecto='xlsx'):
+    """Formato de exportación según la extensión del archivo"""
+    extension = os.path.splitext(ruta)[1].lower().lstrip('.')
+    return extension if extension in FORMATOS else defecto
+
+def crear_exportador(ruta, encabezados, formato=None, hoja='OCR_Data'):
+    """
+    Crear el exportador adecuado
+
+    Args:
+        ruta: Archivo de salida
+        encabezados: Nombres de columna
+        formato: 'xlsx', 'csv' o 'parquet' (por defecto, según la extensión)
+        hoja: Nombre base de las hojas (solo xlsx)
+
+    Returns:
+        Exportador con escribir_filas/escribir_dataframe/cerrar
+    """
+    formato = formato or formato_desde_ruta(ruta)
+    if formato == 'xlsx':
+        return ExportadorXlsx(ruta, encabezados, hoja=hoja)
+    if formato == 'csv':
+        return ExportadorCsv(ruta, encabezados)
+    if formato == 'parquet':
+        return ExportadorParquet(ruta, encabezados)
+    raise ValueError(f"Formato de exportación no soportado: {formato}")
+
+def exportar_tabla(tabla, ruta, formato=None, hoja='OCR_Data', filas_por_bloque=10000):
+    """
+    Exportar una tabla completa por bloques
+
+    Args:
+        tabla: TablaOCR o pandas.DataFrame
+        ruta: Archivo de salida
+        formato: 'xlsx', 'csv' o 'parquet' (por defecto, según la extensión)
+        hoja: Nombre base de las hojas (solo xlsx)
+        filas_por_bloque: Filas convertidas a la vez
+
+    Returns:
+        int: Filas escritas
+    """
+    dataframe = tabla.to_dataframe() if hasattr(tabla, 'to_dataframe') else tabla
+
+    with crear_exportador(ruta, [str(c) for c in dataframe.columns], formato, hoja) as exportador:
+        for inicio in range(0, len(dataframe), filas_por_bloque):
+            exportador.escribir_dataframe(dataframe.iloc[inicio:inicio + filas_por_bloque])
+        return exportador.filas_escritas
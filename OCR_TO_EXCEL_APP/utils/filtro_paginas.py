@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Filtro previo al OCR: páginas en blanco y hojas separadoras
+
+Los lotes escaneados traen reversos en blanco y hojas separadoras con
+código de barras; cada una pasaba por todo el preprocesado y una llamada a
+Tesseract. Aquí se clasifica cada página en milisegundos sobre una versión
+reducida (unos 1200 px de lado mayor):
+- Tinta: píxeles claramente más oscuros que el papel (percentil 90 del
+  histograma), sin contar un margen de borde (sombras del escáner).
+- Blanca: casi sin tinta y menos de MIN_CARACTERES componentes con tamaño
+  de carácter (una página con una sola línea corta no es blanca).
+- Separadora: la tinta está casi toda en bloques de barras verticales
+  (código de barras o patch code: cada columna del bloque está llena o
+  vacía de arriba abajo) y fuera de ellos solo hay algún rótulo.
+- Contenido: el resto.
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+try:
+    from utils.ingesta import leer_gris, leer_gris_archivo
+except ImportError:
+    from ingesta import leer_gris, leer_gris_archivo
+
+BLANCA = 'blanca'
+SEPARADOR = 'separador'
+CONTENIDO = 'contenido'
+
+LADO_ANALISIS = 1200
+# Fracción de cada borde que no se analiza
+MARGEN = 0.03
+# Diferencia mínima con el papel para contar como tinta
+CONTRASTE_TINTA = 60
+# Componentes menores (en píxeles de la versión reducida) son motas
+AREA_MOTA = 4
+
+# Una página es blanca si tiene menos tinta que esta fracción y menos de
+# MIN_CARACTERES componentes con tamaño de carácter (las motas no cuentan)
+TINTA_BLANCA = 0.001
+MIN_CARACTERES = 3
+ALTURA_MIN_CARACTER = 4
+# Bloques de barras: columnas coherentes, transiciones y tamaño mínimos
+COHERENCIA_BARRAS = 0.85
+TRANSICIONES_BARRAS = 8
+# Fracción de la tinta en barras y tinta máxima fuera de ellas
+TINTA_EN_BARRAS = 0.6
+TINTA_FUERA_BARRAS = 0.005
+
+def reduccion_para(tamano, lado=LADO_ANALISIS):
+    """Mayor reducción de decodificación (1, 2, 4 u 8) que deja el lado >= lado"""
+    mayor = max(tamano)
+    reduccion = 1
+    while reduccion < 8 and mayor // (reduccion * 2) >= lado:
+        reduccion *= 2
+    return reduccion
+
+def _bloques_barras(tinta, alto, ancho):
+    """
+    Regiones con forma de código de barras
+
+    Returns:
+        Lista de (x, y, ancho, alto, píxeles de tinta)
+    """
+    # Unir las barras de cada código (y las letras de cada línea)
+    cerrada = cv2.morphologyEx(tinta, cv2.MORPH_CLOSE,
+                               cv2.getStructuringElement(cv2.MORPH_RECT,
+                                                         (max(3, ancho // 60), 1)))
+    n, _, stats, _ = cv2.connectedComponentsWithStats(cerrada, connectivity=8)
+
+    bloques = []
+    for x, y, w, h, _ in stats[1:]:
+        if w < ancho * 0.08 or h < alto * 0.02:
+            continue
+        region = tinta[y:y + h, x:x + w] > 0
+        llenado = region.mean(axis=0)
+        # En una barra cada columna está llena o vacía de arriba abajo; en
+        # una línea de texto la mayoría están llenas solo en parte
+        coherencia = np.mean((llenado < 0.1) | (llenado > 0.9))
+        barras = llenado > 0.5
+        transiciones = int(np.count_nonzero(barras[1:] != barras[:-1]))
+        if coherencia >= COHERENCIA_BARRAS and transiciones >= TRANSICIONES_BARRAS \
+                and np.mean(llenado > 0.9) >= 0.2:
+            bloques.append((int(x), int(y), int(w), int(h), int(np.count_nonzero(region))))
+    return bloques
+
+def clasificar_pagina(gris):
+    """
+    Clasificar una página en escala de grises
+
+    Args:
+        gris: numpy.ndarray uint8 (cualquier tamaño; se reduce si es grande)
+
+    Returns:
+        Dict con 'clase' (BLANCA, SEPARADOR o CONTENIDO), 'tinta' (fracción
+        de la página), 'componentes', 'caracteres' (componentes con tamaño
+        de carácter), 'barras' (bloques de código de barras) y 'ms' (tiempo
+        de clasificación)
+    """
+    inicio = time.perf_counter()
+
+    alto, ancho = gris.shape[:2]
+    factor = LADO_ANALISIS / max(alto, ancho)
+    if factor < 1:
+        gris = cv2.resize(gris, (max(1, round(ancho * factor)), max(1, round(alto * factor))),
+                          interpolation=cv2.INTER_AREA)
+        alto, ancho = gris.shape[:2]
+
+    # Sin los bordes: sombras del escáner, perforaciones
+    my, mx = int(alto * MARGEN), int(ancho * MARGEN)
+    gris = gris[my:alto - my, mx:ancho - mx]
+    alto, ancho = gris.shape[:2]
+    total = max(1, alto * ancho)
+
+    # Papel = percentil 90 del histograma
+    histograma = cv2.calcHist([gris], [0], None, [256], [0, 256]).ravel()
+    papel = int(np.searchsorted(np.cumsum(histograma), 0.9 * total))
+    # Tinta: al menos CONTRASTE_TINTA niveles más oscura que el papel
+    _, tinta = cv2.threshold(gris, max(0, papel - CONTRASTE_TINTA), 255, cv2.THRESH_BINARY_INV)
+
+    n, _, stats, _ = cv2.connectedComponentsWithStats(tinta, connectivity=8)
+    areas = stats[1:, cv2.CC_STAT_AREA]
+    significativas = areas >= AREA_MOTA
+    pixeles_tinta = int(areas[significativas].sum())
+    fraccion = pixeles_tinta / total
+
+    # Componentes con tamaño de carácter (o de palabra, si las letras se
+    # funden al reducir)
+    altos = stats[1:, cv2.CC_STAT_HEIGHT]
+    anchos = stats[1:, cv2.CC_STAT_WIDTH]
+    caracteres = int(np.count_nonzero(significativas & (altos >= ALTURA_MIN_CARACTER) &
+                                      (altos <= alto // 10) & (anchos <= 20 * altos)))
+
+    info = {'tinta': round(fraccion, 5), 'componentes': int(np.count_nonzero(significativas)),
+            'caracteres': caracteres, 'barras': 0}
+
+    if papel <= CONTRASTE_TINTA:
+        # Página casi toda oscura (foto, negativo): no se descarta
+        info['clase'] = CONTENIDO
+    elif fraccion < TINTA_BLANCA and caracteres < MIN_CARACTERES:
+        info['clase'] = BLANCA
+    else:
+        bloques = _bloques_barras(tinta, alto, ancho)
+        en_barras = sum(b[4] for b in bloques)
+        info['barras'] = len(bloques)
+        if bloques and en_barras >= TINTA_EN_BARRAS * pixeles_tinta \
+                and (pixeles_tinta - en_barras) / total < TINTA_FUERA_BARRAS:
+            info['clase'] = SEPARADOR
+        else:
+            info['clase'] = CONTENIDO
+
+    info['ms'] = round((time.perf_counter() - inicio) * 1000, 2)
+    return info
+
+def clasificar_origen(origen, fotograma=None, tamano=None):
+    """
+    Clasificar una página desde una ruta, una PIL.Image o un array
+
+    Con una ruta se decodifica ya reducida (en JPEG, el decodificador DCT
+    reduce al leer), así que el coste es una fracción de la decodificación
+    completa.
+
+    Args:
+        origen: Ruta, PIL.Image o numpy.ndarray
+        fotograma: Fotograma si origen es un TIFF multipágina
+        tamano: (ancho, alto) de la imagen si ya se conoce (evita leer la
+            cabecera otra vez)
+
+    Returns:
+        Dict de clasificar_pagina
+    """
+    if isinstance(origen, str):
+        if tamano is None:
+            from PIL import Image
+            with Image.open(origen) as imagen:
+                tamano = imagen.size
+        reduccion = reduccion_para(tamano)
+        return clasificar_pagina(leer_gris_archivo(origen, fotograma, reduccion))
+
+    if hasattr(origen, 'size') and not isinstance(origen, np.ndarray):
+        # PIL.Image: reducir antes de convertir a gris
+        reduccion = reduccion_para(origen.size)
+        if reduccion > 1:
+            origen = origen.reduce(reduccion)
+    return clasificar_pagina(leer_gris(origen))
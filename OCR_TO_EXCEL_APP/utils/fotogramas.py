@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Lectura perezosa de imágenes con varios fotogramas (TIFF multipágina de fax)
+
+Los fotogramas se recorren con Image.seek: solo se decodifica el fotograma
+que se está entregando, así que la memoria no depende del número de
+páginas del archivo.
+"""
+
+from PIL import Image
+
+def contar_fotogramas(ruta):
+    """
+    Número de fotogramas de una imagen (1 para formatos de una sola página)
+
+    Args:
+        ruta: Ruta de la imagen
+
+    Returns:
+        int
+    """
+    with Image.open(ruta) as imagen:
+        return getattr(imagen, 'n_frames', 1)
+
+def iterar_fotogramas(ruta, fotogramas=None):
+    """
+    Recorrer los fotogramas de una imagen de uno en uno
+
+    Cada fotograma se entrega como una imagen independiente (copia del
+    fotograma actual) que el consumidor puede conservar; el archivo se
+    mantiene abierto y solo se decodifica un fotograma cada vez.
+
+    Args:
+        ruta: Ruta de la imagen
+        fotogramas: Números de fotograma (1-indexed), None para todos
+
+    Yields:
+        Tupla (numero_fotograma, PIL.Image)
+    """
+    with Image.open(ruta) as imagen:
+        total = getattr(imagen, 'n_frames', 1)
+        for numero in fotogramas or range(1, total + 1):
+            imagen.seek(numero - 1)
+            yield numero, imagen.copy()
+
+def abrir_fotograma(ruta, fotograma):
+    """
+    Abrir una imagen posicionada en un fotograma concreto
+
+    Args:
+        ruta: Ruta de la imagen
+        fotograma: Número de fotograma (1-indexed)
+
+    Returns:
+        PIL.Image (perezosa; cerrar al terminar)
+    """
+    imagen = Image.open(ruta)
+    if fotograma and fotograma > 1:
+        imagen.seek(fotograma - 1)
+    return imagen
+
+def expandir_fotogramas(rutas):
+    """
+    Convertir rutas de imágenes en tareas (ruta, fotograma)
+
+    Las imágenes de un solo fotograma dan (ruta, None); las multipágina una
+    tarea por fotograma. Es un generador: los archivos se abren según se
+    consumen las tareas.
+
+    Args:
+        rutas: Iterable de rutas de imágenes
+
+    Yields:
+        Tupla (ruta, fotograma o None)
+    """
+    for ruta in rutas:
+        try:
+            total = contar_fotogramas(ruta)
+        except Exception:
+            # El error se informará al procesar el archivo
+            total = 1
+        if total == 1:
+            yield ruta, None
+        else:
+            for numero in range(1, total + 1):
+                yield ruta, numero
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Ingesta de imágenes directamente a escala de grises de 8 bits
+
+El camino anterior decodificaba con PIL a RGB, copiaba a NumPy y convertía
+dos veces con cvtColor (tres imágenes completas en memoria). Aquí:
+- Archivo: se proyecta en memoria (np.memmap) y cv2.imdecode decodifica
+  directamente a un solo canal (IMREAD_GRAYSCALE): una decodificación y un
+  único array de salida, sin copia intermedia del archivo en el heap.
+- Formatos que OpenCV no lee (o fotogramas de TIFF multipágina): PIL con
+  draft('L'), que en JPEG ya decodifica en gris.
+- PIL.Image ya abierta: una sola conversión a gris.
+
+El array devuelto es propio y escribible (salvo que venga de una imagen L
+de PIL sin copiar), así que las etapas siguientes pueden trabajar en el
+sitio (ver en_sitio()).
+"""
+
+import os
+
+import cv2
+import numpy as np
+from PIL import Image
+
+# Sin rotación EXIF: mismo resultado que el camino PIL anterior
+FLAGS_GRIS = cv2.IMREAD_GRAYSCALE | cv2.IMREAD_IGNORE_ORIENTATION
+
+# Decodificación reducida a 1/2, 1/4 u 1/8 (en JPEG la reduce el decodificador)
+FLAGS_REDUCCION = {
+    1: FLAGS_GRIS,
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2 | cv2.IMREAD_IGNORE_ORIENTATION,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4 | cv2.IMREAD_IGNORE_ORIENTATION,
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8 | cv2.IMREAD_IGNORE_ORIENTATION,
+}
+
+def en_sitio(imagen):
+    """
+    Indicar si una etapa puede escribir su resultado sobre la entrada
+
+    Los resultados memorizados en etapas.CadenaPreprocesado son de solo
+    lectura; los arrays recién creados (o de la ingesta) son escribibles.
+    """
+    return isinstance(imagen, np.ndarray) and imagen.flags.writeable and imagen.flags.owndata
+
+def _mapear(ruta):
+    """Bytes del archivo proyectados en memoria (o leídos si no se puede)"""
+    try:
+        return np.memmap(ruta, dtype=np.uint8, mode='r')
+    except (ValueError, OSError):
+        # Archivo vacío o sistema de archivos sin mmap
+        return np.fromfile(ruta, dtype=np.uint8)
+
+def leer_gris_archivo(ruta, fotograma=None, reduccion=1):
+    """
+    Decodificar un archivo de imagen a gris de 8 bits
+
+    Args:
+        ruta: Ruta de la imagen
+        fotograma: Fotograma de un TIFF multipágina (1-indexed); se lee con PIL
+        reduccion: 1, 2, 4 u 8 para decodificar a 1/reduccion del tamaño
+
+    Returns:
+        numpy.ndarray (alto, ancho) uint8
+    """
+    if not fotograma or fotograma == 1:
+        datos = _mapear(ruta)
+        try:
+            gris = cv2.imdecode(datos, FLAGS_REDUCCION[reduccion]) if datos.size else None
+        finally:
+            mapa = getattr(datos, '_mmap', None)
+            del datos
+            if mapa is not None:
+                mapa.close()
+        if gris is not None:
+            return gris
+
+    with Image.open(ruta) as imagen:
+        if fotograma and fotograma > 1:
+            imagen.seek(fotograma - 1)
+        # JPEG: el decodificador entrega directamente un canal
+        ancho, alto = imagen.size
+        imagen.draft('L', (ancho // reduccion, alto // reduccion))
+        if reduccion > 1 and imagen.size != (ancho // reduccion, alto // reduccion):
+            imagen = imagen.reduce(max(1, imagen.width // max(1, ancho // reduccion)))
+        return gris_desde_pil(imagen)
+
+def gris_desde_pil(imagen):
+    """
+    Convertir una PIL.Image a gris de 8 bits con una sola conversión
+
+    Returns:
+        numpy.ndarray (alto, ancho) uint8
+    """
+    if imagen.mode == 'L':
+        return np.asarray(imagen)
+    if imagen.mode == 'RGB':
+        return cv2.cvtColor(np.asarray(imagen), cv2.COLOR_RGB2GRAY)
+    return np.asarray(imagen.convert('L'))
+
+def leer_gris(origen, fotograma=None):
+    """
+    Gris de 8 bits desde una ruta, una PIL.Image o un array
+
+    Args:
+        origen: Ruta, PIL.Image o numpy.ndarray (BGR, BGRA o gris)
+        fotograma: Fotograma si origen es la ruta de un TIFF multipágina
+
+    Returns:
+        numpy.ndarray (alto, ancho) uint8
+    """
+    if isinstance(origen, (str, os.PathLike)):
+        return leer_gris_archivo(origen, fotograma)
+
+    if isinstance(origen, np.ndarray):
+        if origen.ndim == 2:
+            if origen.dtype == np.uint16:
+                return (origen >> 8).astype(np.uint8)
+            return origen if origen.dtype == np.uint8 else cv2.convertScaleAbs(origen)
+        codigo = cv2.COLOR_BGRA2GRAY if origen.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+        return cv2.cvtColor(origen, codigo)
+
+    return gris_desde_pil(origen)
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Instrumentación por etapas de los trabajos OCR
+
+Registra tiempo real, tiempo de CPU y pico de memoria (RSS) de cada etapa
+(cache, decode, preprocess, deskew, ocr, table, export), exporta una línea de
+tiempo en formato Chrome trace (chrome://tracing, Perfetto) y calcula el
+progreso a partir de los pesos medidos en trabajos anteriores.
+
+La CPU de cada etapa es la del hilo que la ejecuta (time.thread_time): la
+cola de la interfaz procesa varios trabajos a la vez en hilos del mismo
+proceso y la CPU del proceso mezclaría la de todos. No incluye el trabajo
+repartido en el pool de mosaicos. La CPU de procesos hijos (tesseract vía
+pytesseract) solo existe para todo el proceso: con varios trabajos en
+curso es aproximada, porque incluye la de los hijos de los demás.
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+GRUPOS = ('cache', 'decode', 'preprocess', 'deskew', 'ocr', 'table', 'export')
+
+MENSAJES = {
+    'cache': "Consultando caché...",
+    'decode': "Decodificando imagen...",
+    'preprocess': "Preprocesando imagen...",
+    'deskew': "Enderezando imagen...",
+    'ocr': "Ejecutando reconocimiento OCR...",
+    'table': "Procesando resultados...",
+    'export': "Guardando resultados...",
+}
+
+# Proporciones iniciales hasta que haya mediciones reales
+PESOS_INICIALES = {
+    'cache': 0.02,
+    'decode': 0.05,
+    'preprocess': 0.25,
+    'deskew': 0.10,
+    'ocr': 0.50,
+    'table': 0.05,
+    'export': 0.05,
+}
+
+def rss_actual():
+    """
+    Memoria residente actual del proceso
+
+    Returns:
+        int: Bytes, o None si no se puede medir en esta plataforma
+    """
+    if sys.platform.startswith('linux'):
+        try:
+            with open('/proc/self/statm', 'r') as f:
+                return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, ValueError):
+            pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return None
+
+def _cpu_hijos():
+    """
+    CPU de procesos hijos terminados (p. ej. tesseract vía pytesseract)
+
+    Es de todo el proceso: incluye los hijos de otros trabajos en curso
+    """
+    if resource is None:
+        return 0.0
+    uso = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return uso.ru_utime + uso.ru_stime
+
+class _MuestreadorRSS(threading.Thread):
+    """Hilo que muestrea el RSS mientras dura una etapa y guarda el máximo"""
+
+    def __init__(self, intervalo):
+        super().__init__(daemon=True)
+        self.intervalo = intervalo
+        self.pico = rss_actual()
+        self._fin = threading.Event()
+
+    def run(self):
+        while not self._fin.wait(self.intervalo):
+            rss = rss_actual()
+            if rss is not None and (self.pico is None or rss > self.pico):
+                self.pico = rss
+
+    def detener(self):
+        self._fin.set()
+        self.join()
+        rss = rss_actual()
+        if rss is not None and (self.pico is None or rss > self.pico):
+            self.pico = rss
+        return self.pico
+
+class PesosEtapas:
+    """Pesos de cada grupo de etapas (media móvil de duraciones medidas)"""
+
+    def __init__(self, ruta=None, alfa=0.3):
+        self.ruta = ruta
+        self.alfa = alfa
+        self.duraciones = dict(PESOS_INICIALES)
+        # Varios trabajos de la cola pueden terminar a la vez
+        self._cerrojo = threading.Lock()
+        if ruta and os.path.exists(ruta):
+            try:
+                with open(ruta, 'r', encoding='utf-8') as f:
+                    self.duraciones.update(json.load(f))
+            except Exception as e:
+                print(f"Error cargando pesos de etapas: {e}")
+
+    def fracciones(self, grupos=GRUPOS):
+        """
+        Fracción del trabajo completada al empezar cada grupo
+
+        Returns:
+            Dict grupo -> fracción en [0, 1)
+        """
+        total = sum(self.duraciones.get(g, 0.0) for g in grupos) or 1.0
+        acumulado = 0.0
+        inicio = {}
+        for grupo in grupos:
+            inicio[grupo] = acumulado / total
+            acumulado += self.duraciones.get(grupo, 0.0)
+        return inicio
+
+    def actualizar(self, perfilador):
+        """Incorporar las duraciones de un trabajo terminado y guardar"""
+        with self._cerrojo:
+            for grupo, segundos in perfilador.por_grupo().items():
+                anterior = self.duraciones.get(grupo, segundos)
+                self.duraciones[grupo] = (1 - self.alfa) * anterior + self.alfa * segundos
+
+            if self.ruta:
+                try:
+                    os.makedirs(os.path.dirname(self.ruta) or '.', exist_ok=True)
+                    with open(self.ruta, 'w', encoding='utf-8') as f:
+                        json.dump(self.duraciones, f, indent=4)
+                except Exception as e:
+                    print(f"Error guardando pesos de etapas: {e}")
+
+class Perfilador:
+    """Registro de etapas de un trabajo OCR"""
+
+    def __init__(self, trabajo='ocr', progreso=None, pesos=None, intervalo_rss=0.005,
+                 grupos=GRUPOS):
+        """
+        Args:
+            trabajo: Nombre del trabajo (aparece en la traza)
+            progreso: Función opcional progreso(valor, mensaje), valor 0-100
+            pesos: PesosEtapas para repartir el progreso
+            intervalo_rss: Segundos entre muestras de memoria; None para no
+                lanzar el hilo de muestreo (solo se mide al empezar y al
+                terminar cada etapa)
+            grupos: Grupos de etapas previstos, en orden
+        """
+        self.trabajo = trabajo
+        self.progreso = progreso
+        self.intervalo_rss = intervalo_rss
+        self.registros = []
+        self._inicio = time.perf_counter()
+        self._fracciones = (pesos or PesosEtapas()).fracciones(grupos)
+        self._cerrojo = threading.Lock()
+
+    def _avisar(self, valor, mensaje):
+        if self.progreso:
+            self.progreso(round(100 * valor, 1), mensaje)
+
+    @contextmanager
+    def etapa(self, nombre):
+        """
+        Medir un bloque de código
+
+        Args:
+            nombre: 'grupo' o 'grupo.detalle' (p. ej. 'preprocess.denoise');
+                el progreso se reparte por grupo
+        """
+        grupo = nombre.split('.')[0]
+        self._avisar(self._fracciones.get(grupo, 0.0), MENSAJES.get(grupo, f"{nombre}..."))
+
+        muestreador = None
+        if self.intervalo_rss:
+            muestreador = _MuestreadorRSS(self.intervalo_rss)
+            rss_inicio = muestreador.pico
+            muestreador.start()
+        else:
+            rss_inicio = rss_actual()
+
+        inicio = time.perf_counter()
+        cpu_inicio = time.thread_time()
+        hijos_inicio = _cpu_hijos()
+        try:
+            yield
+        finally:
+            fin = time.perf_counter()
+            if muestreador is not None:
+                rss_pico = muestreador.detener()
+            else:
+                rss_pico = rss_actual()
+                if rss_pico is None or (rss_inicio is not None and rss_inicio > rss_pico):
+                    rss_pico = rss_inicio
+            registro = {
+                'nombre': nombre,
+                'grupo': grupo,
+                'inicio': inicio - self._inicio,
+                'segundos': fin - inicio,
+                'cpu': time.thread_time() - cpu_inicio,
+                'cpu_hijos': _cpu_hijos() - hijos_inicio,
+                'rss_inicio': rss_inicio,
+                'rss_pico': rss_pico,
+                'hilo': threading.get_ident(),
+            }
+            with self._cerrojo:
+                self.registros.append(registro)
+
+    def terminar(self, mensaje="Completado"):
+        """Marcar el trabajo como terminado (progreso 100%)"""
+        self._avisar(1.0, mensaje)
+
+    def por_grupo(self):
+        """Segundos totales por grupo de etapas"""
+        totales = {}
+        for registro in self.registros:
+            totales[registro['grupo']] = totales.get(registro['grupo'], 0.0) + registro['segundos']
+        return totales
+
+    def resumen(self):
+        """
+        Resumen por grupo: tiempo real, CPU y pico de RSS
+
+        Returns:
+            Dict grupo -> {'segundos', 'cpu', 'rss_pico_mb'}
+        """
+        datos = {}
+        for r in self.registros:
+            g = datos.setdefault(r['grupo'], {'segundos': 0.0, 'cpu': 0.0, 'rss_pico_mb': None})
+            g['segundos'] += r['segundos']
+            g['cpu'] += r['cpu'] + r['cpu_hijos']
+            if r['rss_pico'] is not None:
+                mb = r['rss_pico'] / (1024 * 1024)
+                g['rss_pico_mb'] = mb if g['rss_pico_mb'] is None else max(g['rss_pico_mb'], mb)
+        return datos
+
+    def traza_chrome(self):
+        """
+        Línea de tiempo en formato Chrome trace (eventos completos 'X')
+
+        Returns:
+            Dict serializable a JSON
+        """
+        pid = os.getpid()
+        eventos = [{
+            'name': 'process_name',
+            'ph': 'M',
+            'pid': pid,
+            'args': {'name': self.trabajo},
+        }]
+
+        for r in self.registros:
+            eventos.append({
+                'name': r['nombre'],
+                'cat': r['grupo'],
+                'ph': 'X',
+                'ts': round(r['inicio'] * 1e6),
+                'dur': round(r['segundos'] * 1e6),
+                'pid': pid,
+                'tid': r['hilo'],
+                'args': {
+                    'cpu_ms': round(r['cpu'] * 1000, 3),
+                    'cpu_hijos_ms': round(r['cpu_hijos'] * 1000, 3),
+                    'rss_inicio_mb': None if r['rss_inicio'] is None else round(r['rss_inicio'] / 2**20, 1),
+                    'rss_pico_mb': None if r['rss_pico'] is None else round(r['rss_pico'] / 2**20, 1),
+                },
+            })
+
+        return {'traceEvents': eventos, 'displayTimeUnit': 'ms'}
+
+    def exportar_traza(self, ruta):
+        """Guardar la traza Chrome/JSON del trabajo"""
+        os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(self.traza_chrome(), f, ensure_ascii=False)
+        return ruta
+
+class _PerfiladorNulo:
+    """Perfilador que no mide nada (para llamadas sin instrumentar)"""
+
+    @contextmanager
+    def etapa(self, nombre):
+        yield
+
+    def terminar(self, mensaje="Completado"):
+        pass
+
+PERFILADOR_NULO = _PerfiladorNulo()
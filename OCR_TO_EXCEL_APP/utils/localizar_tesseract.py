@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Localización de Tesseract con resultado memorizado en disco
+
+Buscar el ejecutable y preguntarle versión e idiomas cuesta dos procesos
+en cada arranque. El resultado se guarda en config/tesseract.json junto con
+la fecha de modificación y el tamaño del ejecutable y de la carpeta
+tessdata; mientras no cambien, el arranque solo hace dos os.stat.
+"""
+
+import os
+import json
+import shutil
+import tempfile
+import subprocess
+
+RUTAS_COMUNES = [
+    r"C:\Program Files\Tesseract-OCR\tesseract.exe",
+    r"C:\Program Files (x86)\Tesseract-OCR\tesseract.exe",
+    "/usr/bin/tesseract",
+    "/usr/local/bin/tesseract",
+    "/opt/homebrew/bin/tesseract",
+]
+
+ARCHIVO_CACHE = "config/tesseract.json"
+
+def _firma(ruta):
+    """(mtime_ns, tamaño) de un archivo o carpeta, None si no existe"""
+    try:
+        info = os.stat(ruta)
+    except (OSError, TypeError):
+        return None
+    return [info.st_mtime_ns, info.st_size]
+
+def _sondear(ruta, timeout=15):
+    """
+    Preguntar a un ejecutable de Tesseract su versión e idiomas
+
+    Returns:
+        Dict con 'ruta', 'version', 'idiomas' y 'tessdata', o None si no
+        es un Tesseract utilizable
+    """
+    try:
+        salida = subprocess.run([ruta, '--version'], capture_output=True, text=True,
+                                timeout=timeout)
+        lineas = (salida.stdout or salida.stderr).strip().splitlines()
+        if not lineas or 'tesseract' not in lineas[0].lower():
+            return None
+        version = lineas[0].split()[-1]
+
+        salida = subprocess.run([ruta, '--list-langs'], capture_output=True, text=True,
+                                timeout=timeout)
+        lineas = (salida.stdout or salida.stderr).strip().splitlines()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+    # Primera línea: List of available languages in "/ruta/tessdata/" (3):
+    tessdata = None
+    if lineas and '"' in lineas[0]:
+        tessdata = lineas[0].split('"')[1]
+    idiomas = sorted(l.strip() for l in lineas[1:] if l.strip())
+
+    return {'ruta': ruta, 'version': version, 'idiomas': idiomas, 'tessdata': tessdata}
+
+def _cargar_cache(archivo):
+    try:
+        with open(archivo, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _guardar_cache(archivo, datos):
+    """Escritura atómica del resultado (temporal + os.replace)"""
+    try:
+        directorio = os.path.dirname(archivo) or '.'
+        os.makedirs(directorio, exist_ok=True)
+        descriptor, temporal = tempfile.mkstemp(prefix='.tesseract_', suffix='.tmp',
+                                                dir=directorio)
+        with os.fdopen(descriptor, 'w', encoding='utf-8') as f:
+            json.dump(datos, f, indent=4)
+        os.replace(temporal, archivo)
+    except Exception as e:
+        print(f"Error guardando datos de Tesseract: {e}")
+
+def _candidatos(ruta_configurada):
+    """Rutas a probar, en orden, sin repetir"""
+    vistos = set()
+    for ruta in [ruta_configurada] + RUTAS_COMUNES + [shutil.which("tesseract")]:
+        if ruta and ruta not in vistos and os.path.isfile(ruta):
+            vistos.add(ruta)
+            yield ruta
+
+def localizar_tesseract(ruta_configurada='', archivo_cache=ARCHIVO_CACHE, forzar=False):
+    """
+    Encontrar Tesseract, su versión e idiomas instalados
+
+    Args:
+        ruta_configurada: Ruta preferida (paths.tesseract), puede estar vacía
+        archivo_cache: JSON donde se memoriza el resultado (None para no usarlo)
+        forzar: Ignorar el resultado memorizado
+
+    Returns:
+        Dict con 'ruta', 'version', 'idiomas' y 'tessdata', o None si no se
+        encuentra
+    """
+    if archivo_cache and not forzar:
+        datos = _cargar_cache(archivo_cache)
+        if (datos and (not ruta_configurada or ruta_configurada == datos.get('ruta'))
+                and _firma(datos.get('ruta')) == datos.get('firma')
+                and _firma(datos.get('tessdata')) == datos.get('firma_tessdata')):
+            return {k: datos[k] for k in ('ruta', 'version', 'idiomas', 'tessdata')}
+
+    for ruta in _candidatos(ruta_configurada):
+        info = _sondear(ruta)
+        if info is None:
+            continue
+        if archivo_cache:
+            _guardar_cache(archivo_cache, dict(info, firma=_firma(ruta),
+                                               firma_tessdata=_firma(info['tessdata'])))
+        return info
+
+    return None
@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Procesamiento por lotes de una carpeta de PDF, reanudable
+
+Cada página es una tarea de un pool de procesos (renderizado + OCR), con un
+máximo de tareas en vuelo para no acumular trabajo en memoria. Cada tarea
+renderiza en su propia carpeta temporal, que se borra al terminar la página
+(también si falla).
+
+El estado de cada archivo y de cada página se guarda en un manifiesto JSON
+en la carpeta de resultados (escritura atómica). Si el proceso se
+interrumpe, al relanzarlo con la misma carpeta de resultados solo se
+procesan las páginas que no estaban completadas. Un PDF modificado desde la
+última vez (tamaño o fecha) se procesa de nuevo entero.
+
+    python -m utils.lote_pdf carpeta_pdfs -o resultados -j 8
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import traceback
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+try:
+    from utils.configuracion import ConfigManager
+    from utils.planificador import PENDIENTE, EN_CURSO, COMPLETADO, ERROR
+except ImportError:
+    from configuracion import ConfigManager
+    from planificador import PENDIENTE, EN_CURSO, COMPLETADO, ERROR
+
+ARCHIVO_MANIFIESTO = 'manifiesto.json'
+VERSION_MANIFIESTO = 1
+
+def _firma(ruta):
+    """Tamaño y fecha de modificación: cambia si el archivo se reemplaza"""
+    info = os.stat(ruta)
+    return f"{info.st_size}:{info.st_mtime_ns}"
+
+class Manifiesto:
+    """Estado persistente de un lote: archivos, páginas y opciones"""
+
+    def __init__(self, ruta, intervalo=1.0):
+        """
+        Args:
+            ruta: Archivo JSON del manifiesto
+            intervalo: Segundos mínimos entre escrituras (guardar(forzar=True)
+                escribe siempre)
+        """
+        self.ruta = ruta
+        self.intervalo = intervalo
+        self._ultimo_guardado = 0.0
+        self.datos = {'version': VERSION_MANIFIESTO, 'opciones': {}, 'archivos': {}}
+
+        if os.path.exists(ruta):
+            try:
+                with open(ruta, 'r', encoding='utf-8') as f:
+                    datos = json.load(f)
+                if datos.get('version') == VERSION_MANIFIESTO:
+                    self.datos = datos
+            except Exception as e:
+                print(f"Manifiesto ilegible ({e}), se empieza de cero")
+
+    @property
+    def archivos(self):
+        return self.datos['archivos']
+
+    def preparar(self, opciones):
+        """
+        Fijar las opciones del lote; si no son las del manifiesto (otros
+        DPI, otros ajustes de OCR...) las páginas ya hechas no sirven
+        """
+        if self.archivos and self.datos['opciones'] != opciones:
+            print("Las opciones del lote han cambiado: se procesa todo de nuevo")
+            self.datos['archivos'] = {}
+        self.datos['opciones'] = opciones
+
+    def archivo(self, nombre, ruta):
+        """
+        Entrada de un PDF (nueva o vacía si el archivo ha cambiado)
+
+        Returns:
+            Dict con 'firma', 'paginas', 'dpi', 'estado' y 'estados' (página
+            -> registro de la página)
+        """
+        firma = _firma(ruta)
+        entrada = self.archivos.get(nombre)
+        if entrada is None or entrada.get('firma') != firma:
+            entrada = {'firma': firma, 'paginas': None, 'dpi': None,
+                       'estado': PENDIENTE, 'estados': {}}
+            self.archivos[nombre] = entrada
+        return entrada
+
+    def registrar(self, registro):
+        """Guardar el resultado de una página (registro del trabajador)"""
+        entrada = self.archivos[registro['archivo']]
+        datos = {clave: valor for clave, valor in registro.items()
+                 if clave not in ('archivo', 'pagina')}
+        entrada['estados'][str(registro['pagina'])] = datos
+        entrada['estado'] = self.estado_archivo(entrada)
+        self.guardar()
+
+    def error_archivo(self, nombre, ruta, error):
+        """Marcar un PDF que no se pudo abrir (se reintenta en la próxima ejecución)"""
+        self.archivos[nombre] = {'firma': None, 'paginas': None, 'dpi': None,
+                                 'estado': ERROR, 'error': str(error), 'estados': {}}
+        self.guardar()
+
+    @staticmethod
+    def estado_archivo(entrada):
+        """PENDIENTE, EN_CURSO, COMPLETADO o ERROR según sus páginas"""
+        estados = [d['estado'] for d in entrada['estados'].values()]
+        if entrada['paginas'] is None or len(estados) < entrada['paginas']:
+            return EN_CURSO if estados else PENDIENTE
+        return ERROR if ERROR in estados else COMPLETADO
+
+    def guardar(self, forzar=False):
+        """Escribir el manifiesto (atómico: nunca queda a medio escribir)"""
+        ahora = time.monotonic()
+        if not forzar and ahora - self._ultimo_guardado < self.intervalo:
+            return
+        self._ultimo_guardado = ahora
+
+        directorio = os.path.dirname(self.ruta) or '.'
+        os.makedirs(directorio, exist_ok=True)
+        descriptor, temporal = tempfile.mkstemp(prefix='.manifiesto_', suffix='.tmp',
+                                                dir=directorio)
+        try:
+            with os.fdopen(descriptor, 'w', encoding='utf-8') as f:
+                json.dump(self.datos, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(temporal, self.ruta)
+        except BaseException:
+            os.unlink(temporal)
+            raise
+
+# ============================================================================
+# TRABAJADOR
+# ============================================================================
+
+_config_trabajador = None
+_opciones_trabajador = None
+
+def _inicializar(config, opciones):
+    """Preparar cada proceso del pool (mismos ajustes que motor_ocr)"""
+    global _config_trabajador, _opciones_trabajador
+    try:
+        from utils.motor_ocr import inicializar_trabajador
+    except ImportError:
+        from motor_ocr import inicializar_trabajador
+
+    inicializar_trabajador(config)
+    _config_trabajador = config
+    _opciones_trabajador = opciones
+
+def _procesar_pagina(tarea):
+    """
+    Renderizar (y reconocer) una página dentro del pool
+
+    Args:
+        tarea: Tupla (nombre_pdf, ruta_pdf, pagina, dpi, carpeta_destino)
+
+    Returns:
+        Dict con 'archivo', 'pagina', 'estado', 'segundos' y, según el
+        caso, 'salida', 'filas', 'omitida', 'imagen' o 'error'
+    """
+    from pdf2image import convert_from_path
+    from PIL import Image
+    try:
+        from utils.motor_ocr import procesar_imagen, guardar_resultado
+    except ImportError:
+        from motor_ocr import procesar_imagen, guardar_resultado
+
+    nombre, ruta_pdf, pagina, dpi, carpeta_destino = tarea
+    opciones = _opciones_trabajador
+    inicio = time.perf_counter()
+    registro = {'archivo': nombre, 'pagina': pagina}
+    nombre_base = f"pagina_{pagina:04d}"
+
+    try:
+        os.makedirs(carpeta_destino, exist_ok=True)
+        # Carpeta temporal de esta página: se borra al salir, falle o no
+        with tempfile.TemporaryDirectory(prefix='pdf_ocr_') as temporal:
+            rutas = convert_from_path(ruta_pdf, dpi=dpi, first_page=pagina, last_page=pagina,
+                                      output_folder=temporal, fmt=opciones['formato'].lower(),
+                                      paths_only=True, thread_count=1)
+            if not rutas:
+                raise RuntimeError("pdftoppm no generó la página")
+
+            if opciones['ocr']:
+                with Image.open(rutas[0]) as imagen:
+                    resultado = procesar_imagen(imagen, _config_trabajador,
+                                                ruta_origen=rutas[0])
+                registro['salida'] = guardar_resultado(resultado, carpeta_destino, nombre_base)
+                registro['filas'] = len(resultado['filas'])
+                if resultado.get('omitida'):
+                    registro['omitida'] = resultado['omitida']
+
+            if opciones['guardar_imagenes']:
+                extension = os.path.splitext(rutas[0])[1]
+                registro['imagen'] = os.path.join(carpeta_destino, nombre_base + extension)
+                shutil.move(rutas[0], registro['imagen'])
+
+        registro['estado'] = COMPLETADO
+    except Exception as e:
+        registro['estado'] = ERROR
+        registro['error'] = str(e)
+
+    registro['segundos'] = round(time.perf_counter() - inicio, 3)
+    return registro
+
+# ============================================================================
+# LOTE
+# ============================================================================
+
+def listar_pdfs(carpeta_pdfs):
+    """Nombres de los PDF de una carpeta, ordenados"""
+    return sorted(entrada.name for entrada in os.scandir(carpeta_pdfs)
+                  if entrada.is_file() and entrada.name.lower().endswith('.pdf'))
+
+def procesar_carpeta_pdf(carpeta_pdfs, carpeta_salida, config=None, dpi=300, formato='PNG',
+                         procesos=None, ocr=True, guardar_imagenes=False,
+                         reintentar_errores=True, al_terminar=None):
+    """
+    Procesar todos los PDF de una carpeta página a página
+
+    Args:
+        carpeta_pdfs: Carpeta con archivos PDF
+        carpeta_salida: Carpeta de resultados (una subcarpeta por PDF con
+            pagina_0001.txt/.json...) y del manifiesto
+        config: ConfigManager o ConfigInstantanea (por defecto, la de la
+            aplicación)
+        dpi: Resolución de renderizado o 'auto' (según el tamaño del texto)
+        formato: Formato de las imágenes renderizadas ('PNG', 'JPEG', 'TIFF')
+        procesos: Número de procesos (por defecto, núcleos disponibles)
+        ocr: Reconocer cada página (si no, solo se renderiza)
+        guardar_imagenes: Conservar las imágenes en la carpeta de resultados
+        reintentar_errores: Volver a intentar las páginas que fallaron en una
+            ejecución anterior
+        al_terminar: Función opcional llamada con el registro de cada página
+
+    Returns:
+        Dict con 'archivos' (nombre -> 'paginas', 'completadas', 'errores',
+        'omitidas', 'estado'), 'paginas_procesadas', 'errores', 'segundos',
+        'paginas_por_segundo' y 'manifiesto'
+    """
+    try:
+        from utils.convertir_pdf import contar_paginas_pdf
+        from utils.resolucion import resolver_dpi
+    except ImportError:
+        from convertir_pdf import contar_paginas_pdf
+        from resolucion import resolver_dpi
+
+    procesos = procesos or os.cpu_count() or 1
+    if config is None:
+        config = ConfigManager()
+    # Los procesos reciben una instantánea inmutable (serializable)
+    if hasattr(config, 'instantanea'):
+        config = config.instantanea()
+
+    opciones = {'dpi': str(dpi), 'formato': formato.upper(), 'ocr': bool(ocr),
+                'guardar_imagenes': bool(guardar_imagenes),
+                'ajustes': config.huella if ocr else None}
+    manifiesto = Manifiesto(os.path.join(carpeta_salida, ARCHIVO_MANIFIESTO))
+    manifiesto.preparar(opciones)
+    nombres = listar_pdfs(carpeta_pdfs)
+
+    def tareas():
+        # Perezoso: cada PDF se abre (pdfinfo, DPI) solo cuando le toca
+        for nombre in nombres:
+            ruta = os.path.join(carpeta_pdfs, nombre)
+            try:
+                entrada = manifiesto.archivo(nombre, ruta)
+                if entrada['paginas'] is None:
+                    entrada['paginas'] = contar_paginas_pdf(ruta)
+                    entrada['dpi'] = resolver_dpi(ruta, dpi)
+                    entrada['estado'] = manifiesto.estado_archivo(entrada)
+            except Exception as e:
+                print(f"  [ERROR] {nombre}: {e}")
+                manifiesto.error_archivo(nombre, ruta, e)
+                continue
+
+            destino = os.path.join(carpeta_salida, os.path.splitext(nombre)[0])
+            for pagina in range(1, entrada['paginas'] + 1):
+                estado = entrada['estados'].get(str(pagina), {}).get('estado')
+                if estado == COMPLETADO or (estado == ERROR and not reintentar_errores):
+                    continue
+                yield (nombre, ruta, pagina, entrada['dpi'], destino)
+
+    # Limitar el trabajo en vuelo: memoria constante con miles de páginas
+    max_en_vuelo = procesos * 2
+    pendientes = tareas()
+    en_vuelo = set()
+    procesadas = 0
+    errores = 0
+    inicio = time.perf_counter()
+
+    pool = ProcessPoolExecutor(max_workers=procesos, initializer=_inicializar,
+                               initargs=(config, opciones))
+    try:
+        while True:
+            while len(en_vuelo) < max_en_vuelo:
+                tarea = next(pendientes, None)
+                if tarea is None:
+                    break
+                en_vuelo.add(pool.submit(_procesar_pagina, tarea))
+
+            if not en_vuelo:
+                break
+
+            terminados, en_vuelo = wait(en_vuelo, return_when=FIRST_COMPLETED)
+            for futuro in terminados:
+                registro = futuro.result()
+                manifiesto.registrar(registro)
+                procesadas += 1
+                if registro['estado'] == ERROR:
+                    errores += 1
+                if al_terminar:
+                    al_terminar(registro, procesadas / (time.perf_counter() - inicio))
+    finally:
+        # Ctrl+C o error: no empezar más páginas; las hechas ya constan
+        pool.shutdown(wait=True, cancel_futures=True)
+        manifiesto.guardar(forzar=True)
+
+    segundos = time.perf_counter() - inicio
+    archivos = {}
+    for nombre in nombres:
+        entrada = manifiesto.archivos.get(nombre)
+        if entrada is None:
+            continue
+        estados = list(entrada['estados'].values())
+        archivos[nombre] = {
+            'paginas': entrada['paginas'],
+            'completadas': sum(1 for d in estados if d['estado'] == COMPLETADO),
+            'errores': sum(1 for d in estados if d['estado'] == ERROR),
+            'omitidas': sum(1 for d in estados if d.get('omitida')),
+            'estado': entrada['estado']
+        }
+
+    return {'archivos': archivos,
+            'paginas_procesadas': procesadas,
+            'errores': errores,
+            'segundos': segundos,
+            'paginas_por_segundo': procesadas / segundos if segundos > 0 else 0.0,
+            'manifiesto': manifiesto.ruta}
+
+def main(argv=None):
+    """Punto de entrada de la línea de comandos"""
+    parser = argparse.ArgumentParser(
+        description="OCR por lotes de una carpeta de PDF, página a página y reanudable"
+    )
+    parser.add_argument('carpeta', help="Carpeta con archivos PDF")
+    parser.add_argument('-o', '--salida', default='resultados_pdf',
+                        help="Carpeta de resultados y del manifiesto (por defecto: resultados_pdf)")
+    parser.add_argument('-j', '--procesos', type=int, default=None,
+                        help="Número de procesos (por defecto: núcleos disponibles)")
+    parser.add_argument('--dpi', default='300',
+                        help="Resolución de renderizado o 'auto' (por defecto: 300)")
+    parser.add_argument('--formato', default='PNG', choices=('PNG', 'JPEG', 'TIFF'))
+    parser.add_argument('--config', default='config/settings.json',
+                        help="Archivo de configuración")
+    parser.add_argument('--imagenes', action='store_true',
+                        help="Conservar las imágenes de las páginas en la carpeta de resultados")
+    parser.add_argument('--sin-ocr', action='store_true',
+                        help="Solo renderizar las páginas (implica --imagenes)")
+    parser.add_argument('--sin-reintentos', action='store_true',
+                        help="No repetir las páginas que fallaron en una ejecución anterior")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.carpeta):
+        print(f"Error: carpeta no encontrada: {args.carpeta}")
+        return 1
+
+    def informar(registro, ritmo):
+        nombre = f"{registro['archivo']} pág. {registro['pagina']}"
+        if registro['estado'] == ERROR:
+            print(f"  [ERROR] {nombre}: {registro['error']}")
+        elif registro.get('omitida'):
+            print(f"  [OMITIDA] {nombre}: {registro['omitida']} · {ritmo:.2f} pág/s")
+        else:
+            filas = f"{registro['filas']} filas, " if 'filas' in registro else ""
+            print(f"  [OK] {nombre}: {filas}{registro['segundos']:.2f}s · {ritmo:.2f} pág/s")
+
+    try:
+        resumen = procesar_carpeta_pdf(args.carpeta, args.salida, ConfigManager(args.config),
+                                       dpi=args.dpi, formato=args.formato,
+                                       procesos=args.procesos, ocr=not args.sin_ocr,
+                                       guardar_imagenes=args.imagenes or args.sin_ocr,
+                                       reintentar_errores=not args.sin_reintentos,
+                                       al_terminar=informar)
+    except KeyboardInterrupt:
+        print("\nInterrumpido: vuelve a ejecutar el mismo comando para continuar")
+        return 130
+    except Exception:
+        print(traceback.format_exc())
+        return 1
+
+    archivos = resumen['archivos']
+    completos = sum(1 for a in archivos.values() if a['estado'] == COMPLETADO)
+    print(f"\nCompletado: {resumen['paginas_procesadas']} páginas en {resumen['segundos']:.1f}s "
+          f"({resumen['paginas_por_segundo']:.2f} pág/s), {resumen['errores']} errores")
+    print(f"Archivos: {completos} de {len(archivos)} completos")
+    print(f"Manifiesto: {resumen['manifiesto']}")
+
+    return 1 if resumen['errores'] or completos < len(archivos) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Modelo columnar de los resultados OCR
+
+Sustituye a las listas de listas (ocr_data) + encabezados por separado:
+- Un DataFrame de pandas con el texto de cada celda tal como se leyó o se
+  editó, siempre rectangular: no hay que rellenar filas al mostrar,
+  editar o exportar.
+- Actualización de celdas en O(1) (DataFrame.iat).
+- Procedencia por celda en arrays NumPy: página, caja (left, top, width,
+  height), confianza y si la celda se ha editado a mano.
+- to_dataframe() entrega a los exportadores las columnas tipadas (enteros
+  y decimales como números, el resto como texto); el tipo se decide al
+  exportar, así que mostrar y editar nunca reescribe lo leído ("1.50"
+  sigue siendo "1.50").
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    TIPO_TEXTO = pd.StringDtype("pyarrow")
+except ImportError:
+    TIPO_TEXTO = pd.StringDtype()
+
+# Enteros y decimales "limpios"; los códigos con ceros a la izquierda
+# (00123) se quedan como texto para no perder los ceros
+PATRON_ENTERO = re.compile(r'^[+-]?(0|[1-9]\d*)$')
+PATRON_DECIMAL = re.compile(r'^[+-]?(0|[1-9]\d*)\.\d+$')
+
+# Rango de Int64 y cifras significativas que Float64 conserva siempre;
+# fuera de ellos (referencias largas, importes con muchos decimales) la
+# columna se queda como texto para no perder cifras
+LIMITE_INT64 = 2 ** 63
+CIFRAS_FLOAT64 = 15
+
+def _es_entero(texto):
+    """Entero sin ceros a la izquierda que cabe en Int64"""
+    return bool(PATRON_ENTERO.match(texto)) and -LIMITE_INT64 <= int(texto) < LIMITE_INT64
+
+def _es_decimal(texto):
+    """Número que Float64 representa sin perder cifras"""
+    if not (PATRON_ENTERO.match(texto) or PATRON_DECIMAL.match(texto)):
+        return False
+    cifras = texto.lstrip('+-').replace('.', '').lstrip('0')
+    return len(cifras) <= CIFRAS_FLOAT64
+
+def encabezados_unicos(encabezados, n_columnas):
+    """Completar y desduplicar los nombres de columna"""
+    nombres = []
+    vistos = {}
+    for i in range(n_columnas):
+        nombre = str(encabezados[i]).strip() if i < len(encabezados) else ''
+        nombre = nombre or f"Columna {i + 1}"
+        if nombre in vistos:
+            vistos[nombre] += 1
+            nombre = f"{nombre} ({vistos[nombre]})"
+        else:
+            vistos[nombre] = 1
+        nombres.append(nombre)
+    return nombres
+
+def _tipar_columna(valores):
+    """
+    Convertir una columna de textos a su tipo más estrecho
+
+    Args:
+        valores: Textos de la columna ('' o NA = vacía)
+
+    Returns:
+        pandas.Series de tipo Int64, Float64 o texto
+    """
+    serie = pd.Series(valores, dtype=object).map(_formatear)
+    vacias = serie == ''
+    llenos = serie[~vacias]
+
+    if len(llenos) and llenos.map(_es_entero).all():
+        return pd.to_numeric(serie.mask(vacias)).astype('Int64')
+
+    if len(llenos) and llenos.map(_es_decimal).all():
+        return pd.to_numeric(serie.mask(vacias)).astype('Float64')
+
+    return serie.astype(TIPO_TEXTO)
+
+def _formatear(valor):
+    """Valor de una celda como texto para mostrar o editar"""
+    if valor is None or valor is pd.NA:
+        return ''
+    if isinstance(valor, float) and np.isnan(valor):
+        return ''
+    return str(valor)
+
+class TablaOCR:
+    """Tabla de resultados OCR con procedencia por celda (se tipa al exportar)"""
+
+    def __init__(self, dataframe, pagina=None, cajas=None, conf=None):
+        """
+        Args:
+            dataframe: DataFrame con columnas de texto
+            pagina: Array (n_filas,) con la página de cada fila (-1 = sin dato)
+            cajas: Array (n_filas, n_columnas, 4) con left, top, width,
+                height de cada celda (-1 = sin dato)
+            conf: Array (n_filas, n_columnas) con la confianza (NaN = sin dato)
+        """
+        n_filas, n_columnas = dataframe.shape
+        self._df = dataframe
+        self._pagina = pagina if pagina is not None else np.full(n_filas, -1, dtype=np.int32)
+        self._cajas = cajas if cajas is not None else np.full((n_filas, n_columnas, 4), -1,
+                                                               dtype=np.int32)
+        self._conf = conf if conf is not None else np.full((n_filas, n_columnas), np.nan,
+                                                            dtype=np.float32)
+        self._editada = np.zeros((n_filas, n_columnas), dtype=bool)
+
+    # ------------------------------------------------------------------
+    # Construcción
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def desde_filas(cls, encabezados, filas, celdas=None, pagina=None):
+        """
+        Construir la tabla a partir de filas de texto (posiblemente irregulares)
+
+        Args:
+            encabezados: Nombres de columna
+            filas: Lista de listas de str
+            celdas: Opcional, lista alineada con filas de listas de dicts
+                (o None) con 'conf', 'left', 'top', 'width', 'height'
+                (tabla_cajas.separar_encabezados, tablas_regladas)
+            pagina: Número de página de todas las filas (opcional)
+
+        Returns:
+            TablaOCR
+        """
+        n_filas = len(filas)
+        n_columnas = max([len(encabezados)] + [len(fila) for fila in filas])
+        nombres = encabezados_unicos(encabezados, n_columnas)
+
+        columnas = {}
+        for j, nombre in enumerate(nombres):
+            columnas[nombre] = pd.Series([fila[j] if j < len(fila) else '' for fila in filas],
+                                         dtype=TIPO_TEXTO)
+        dataframe = pd.DataFrame(columnas, index=pd.RangeIndex(n_filas))
+
+        paginas = np.full(n_filas, -1 if pagina is None else pagina, dtype=np.int32)
+        cajas = np.full((n_filas, n_columnas, 4), -1, dtype=np.int32)
+        conf = np.full((n_filas, n_columnas), np.nan, dtype=np.float32)
+
+        for i, fila in enumerate(celdas or []):
+            for j, celda in enumerate(fila):
+                if celda is None or j >= n_columnas:
+                    continue
+                cajas[i, j] = (celda['left'], celda['top'], celda['width'], celda['height'])
+                if celda.get('conf', -1) >= 0:
+                    conf[i, j] = celda['conf']
+
+        return cls(dataframe, paginas, cajas, conf)
+
+    @classmethod
+    def desde_resultado(cls, resultado, pagina=None):
+        """Construir la tabla a partir del resultado de motor_ocr.procesar_imagen"""
+        return cls.desde_filas(resultado['encabezados'], resultado['filas'],
+                               celdas=resultado.get('celdas'), pagina=pagina)
+
+    @classmethod
+    def concatenar(cls, tablas):
+        """
+        Unir tablas (p. ej. una por página) en una sola
+
+        Las columnas se alinean por nombre; las celdas de columnas que una
+        tabla no tiene quedan vacías.
+        """
+        tablas = [t for t in tablas if t is not None]
+        if not tablas:
+            return cls.vacia()
+
+        dataframe = pd.concat([t._df for t in tablas], ignore_index=True)
+        for nombre in dataframe.columns:
+            dataframe[nombre] = dataframe[nombre].map(_formatear).astype(TIPO_TEXTO)
+
+        columnas = list(dataframe.columns)
+        n_filas, n_columnas = dataframe.shape
+        cajas = np.full((n_filas, n_columnas, 4), -1, dtype=np.int32)
+        conf = np.full((n_filas, n_columnas), np.nan, dtype=np.float32)
+        editada = np.zeros((n_filas, n_columnas), dtype=bool)
+
+        inicio = 0
+        for tabla in tablas:
+            fin = inicio + len(tabla)
+            destino = [columnas.index(nombre) for nombre in tabla._df.columns]
+            cajas[inicio:fin, destino] = tabla._cajas
+            conf[inicio:fin, destino] = tabla._conf
+            editada[inicio:fin, destino] = tabla._editada
+            inicio = fin
+
+        resultado = cls(dataframe, np.concatenate([t._pagina for t in tablas]), cajas, conf)
+        resultado._editada = editada
+        return resultado
+
+    @classmethod
+    def vacia(cls):
+        return cls(pd.DataFrame())
+
+    # ------------------------------------------------------------------
+    # Acceso
+    # ------------------------------------------------------------------
+
+    @property
+    def encabezados(self):
+        return list(self._df.columns)
+
+    @property
+    def n_columnas(self):
+        return self._df.shape[1]
+
+    def __len__(self):
+        return self._df.shape[0]
+
+    def __getitem__(self, fila):
+        """Fila como lista de textos (para la tabla virtual y el portapapeles)"""
+        iat = self._df.iat
+        return [_formatear(iat[fila, j]) for j in range(self._df.shape[1])]
+
+    def valor(self, fila, columna):
+        """Texto de una celda ('' si está vacía)"""
+        return _formatear(self._df.iat[fila, columna])
+
+    def establecer(self, fila, columna, texto):
+        """Cambiar el texto de una celda (O(1); el tipo se decide al exportar)"""
+        self._df.iat[fila, columna] = texto.strip()
+        self._editada[fila, columna] = True
+
+    def procedencia(self, fila, columna):
+        """
+        Origen de una celda
+
+        Returns:
+            Dict con 'pagina', 'left', 'top', 'width', 'height', 'conf' y
+            'editada' (None en los campos sin dato)
+        """
+        left, top, width, height = (int(v) for v in self._cajas[fila, columna])
+        pagina = int(self._pagina[fila])
+        conf = float(self._conf[fila, columna])
+        sin_caja = left < 0
+        return {
+            'pagina': None if pagina < 0 else pagina,
+            'left': None if sin_caja else left,
+            'top': None if sin_caja else top,
+            'width': None if sin_caja else width,
+            'height': None if sin_caja else height,
+            'conf': None if np.isnan(conf) else conf,
+            'editada': bool(self._editada[fila, columna]),
+        }
+
+    def to_dataframe(self, con_procedencia=False):
+        """
+        DataFrame de los datos con las columnas tipadas
+
+        Cada columna pasa a Int64 o Float64 si todos sus valores son
+        números que caben en el tipo sin perder cifras; si no (códigos con
+        ceros a la izquierda, referencias largas), se queda como texto.
+
+        Args:
+            con_procedencia: Añadir columnas 'pagina' y 'conf_media'
+
+        Returns:
+            pandas.DataFrame (nuevo en cada llamada)
+        """
+        dataframe = pd.DataFrame({nombre: _tipar_columna(self._df[nombre].array)
+                                  for nombre in self._df.columns},
+                                 index=self._df.index)
+        if not con_procedencia:
+            return dataframe
+
+        dataframe['pagina'] = pd.array(np.where(self._pagina < 0, pd.NA, self._pagina),
+                                       dtype='Int32')
+        # Filas sin ninguna confianza conocida -> NaN (sin aviso)
+        conocidas = ~np.isnan(self._conf)
+        suma = np.where(conocidas, self._conf, 0).sum(axis=1)
+        cuenta = conocidas.sum(axis=1)
+        dataframe['conf_media'] = np.where(cuenta > 0, suma / np.maximum(cuenta, 1), np.nan)
+        return dataframe
+
+    def memoria(self):
+        """Bytes aproximados usados por datos y procedencia"""
+        return (int(self._df.memory_usage(deep=True).sum()) + self._pagina.nbytes
+                + self._cajas.nbytes + self._conf.nbytes + self._editada.nbytes)
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Procesamiento en mosaicos multihilo para imágenes muy grandes
+
+La imagen se divide en mosaicos con un margen de solapamiento igual al radio
+del kernel; cada mosaico se procesa en un pool de hilos (OpenCV libera el
+GIL) y solo se copia su parte central al resultado. En los bordes de la
+imagen el mosaico coincide con el borde real, así que el resultado es
+idéntico píxel a píxel al de procesar la imagen completa.
+
+warpAffine no se divide: OpenCV ya lo reparte entre hilos internamente y
+recortarlo cambiaría el redondeo de las coordenadas.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+# A partir de este número de píxeles compensa dividir en mosaicos
+UMBRAL_PIXELES = 8 * 1024 * 1024
+TAM_MOSAICO = 1024
+
+_hilos = os.cpu_count() or 1
+_pool = None
+_cerrojo = threading.Lock()
+
+def configurar_hilos(hilos):
+    """
+    Fijar el número de hilos del procesamiento en mosaicos
+
+    Args:
+        hilos: Número de hilos (1 desactiva los mosaicos)
+    """
+    global _hilos, _pool
+    with _cerrojo:
+        _hilos = max(1, int(hilos))
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+            _pool = None
+
+def _obtener_pool():
+    global _pool
+    with _cerrojo:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=_hilos, thread_name_prefix='mosaico')
+        return _pool
+
+def mapear(funcion, elementos):
+    """
+    Aplicar una función a cada elemento en el pool de hilos
+
+    La función no debe esperar a otras tareas del mismo pool (no usar
+    dentro las operaciones en mosaicos de este módulo).
+
+    Returns:
+        Lista de resultados en el orden de los elementos
+    """
+    elementos = list(elementos)
+    if _hilos == 1 or len(elementos) < 2:
+        return [funcion(elemento) for elemento in elementos]
+    pool = _obtener_pool()
+    return [futuro.result() for futuro in [pool.submit(funcion, e) for e in elementos]]
+
+def conviene_mosaicos(imagen):
+    """Indicar si la imagen es lo bastante grande para dividirla"""
+    return _hilos > 1 and imagen.shape[0] * imagen.shape[1] >= UMBRAL_PIXELES
+
+def procesar_en_mosaicos(imagen, funcion, margen, tam_mosaico=TAM_MOSAICO):
+    """
+    Aplicar una operación local por mosaicos solapados en paralelo
+
+    Args:
+        imagen: Array NumPy (2D o 3D con canales al final)
+        funcion: Operación que devuelve un array del mismo tamaño y tipo
+        margen: Radio del kernel de la operación (píxeles de solapamiento)
+        tam_mosaico: Lado de cada mosaico sin contar el margen
+
+    Returns:
+        Array con el resultado completo
+    """
+    h, w = imagen.shape[:2]
+    salida = np.empty_like(imagen)
+
+    def procesar(y0, x0):
+        y1 = min(h, y0 + tam_mosaico)
+        x1 = min(w, x0 + tam_mosaico)
+        ey0, ex0 = max(0, y0 - margen), max(0, x0 - margen)
+        ey1, ex1 = min(h, y1 + margen), min(w, x1 + margen)
+
+        resultado = funcion(imagen[ey0:ey1, ex0:ex1])
+        salida[y0:y1, x0:x1] = resultado[y0 - ey0:y1 - ey0, x0 - ex0:x1 - ex0]
+
+    pool = _obtener_pool()
+    futuros = [pool.submit(procesar, y0, x0)
+               for y0 in range(0, h, tam_mosaico)
+               for x0 in range(0, w, tam_mosaico)]
+    for futuro in futuros:
+        futuro.result()
+
+    return salida
+
+def mediana(imagen, ksize=3):
+    """cv2.medianBlur, en mosaicos si la imagen es grande"""
+    if not conviene_mosaicos(imagen):
+        return cv2.medianBlur(imagen, ksize)
+    return procesar_en_mosaicos(imagen, lambda m: cv2.medianBlur(m, ksize), ksize // 2)
+
+def umbral_adaptativo(imagen, block_size=11, c=2, en_sitio=False):
+    """
+    cv2.adaptiveThreshold gaussiano, en mosaicos si la imagen es grande
+
+    Con en_sitio el resultado se escribe sobre la entrada (solo sin
+    mosaicos: los márgenes de un mosaico leen píxeles de sus vecinos)
+    """
+    def umbral(m, dst=None):
+        return cv2.adaptiveThreshold(m, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                     cv2.THRESH_BINARY, block_size, c, dst=dst)
+
+    if not conviene_mosaicos(imagen):
+        return umbral(imagen, imagen if en_sitio else None)
+    return procesar_en_mosaicos(imagen, umbral, block_size // 2)
+
+def escala_abs(imagen, alpha, beta, en_sitio=False):
+    """
+    cv2.convertScaleAbs (operación por píxel), en mosaicos si es grande
+
+    Con en_sitio (entrada uint8) el resultado se escribe sobre la entrada
+    """
+    def escalar(m, dst=None):
+        return cv2.convertScaleAbs(m, dst, alpha=alpha, beta=beta)
+
+    if en_sitio and imagen.dtype == np.uint8:
+        if not conviene_mosaicos(imagen):
+            return escalar(imagen, imagen)
+        # Sin margen cada mosaico solo lee y escribe su propia región
+        pool = _obtener_pool()
+        h, w = imagen.shape[:2]
+        futuros = [pool.submit(escalar, imagen[y:y + TAM_MOSAICO, x:x + TAM_MOSAICO],
+                               imagen[y:y + TAM_MOSAICO, x:x + TAM_MOSAICO])
+                   for y in range(0, h, TAM_MOSAICO) for x in range(0, w, TAM_MOSAICO)]
+        for futuro in futuros:
+            futuro.result()
+        return imagen
+
+    if not conviene_mosaicos(imagen):
+        return escalar(imagen)
+    return procesar_en_mosaicos(imagen, escalar, 0)
@@ -0,0 +1,813 @@
+#!/usr/bin/env python3
+"""
+Motor OCR sin interfaz gráfica: preprocesamiento + OCR + tabla
+
+Se puede importar desde la aplicación o ejecutar como herramienta de lotes:
+
+    python -m utils.motor_ocr carpeta_imagenes -o resultados -j 8
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import contextlib
+import traceback
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import pytesseract
+from PIL import Image
+
+try:
+    from utils.configuracion import ConfigManager
+    from utils.procesador import ImageProcessor
+    from utils.backend_ocr import backend_desde_config
+    from utils.cache_ocr import cache_desde_config, hash_archivo, hash_imagen
+    from utils.etapas import cadena_por_defecto
+    from utils.instrumentacion import PERFILADOR_NULO, Perfilador
+    from utils.exportadores import crear_exportador
+    from utils.tabla_cajas import reconstruir_tabla, separar_encabezados
+    from utils.modelo_tabla import TablaOCR, encabezados_unicos
+    from utils.filtro_paginas import CONTENIDO, clasificar_origen
+    from utils.fotogramas import abrir_fotograma, contar_fotogramas, expandir_fotogramas, \
+        iterar_fotogramas
+    from utils import mosaicos
+except ImportError:
+    from configuracion import ConfigManager
+    from procesador import ImageProcessor
+    from backend_ocr import backend_desde_config
+    from cache_ocr import cache_desde_config, hash_archivo, hash_imagen
+    from etapas import cadena_por_defecto
+    from instrumentacion import PERFILADOR_NULO, Perfilador
+    from exportadores import crear_exportador
+    from tabla_cajas import reconstruir_tabla, separar_encabezados
+    from modelo_tabla import TablaOCR, encabezados_unicos
+    from filtro_paginas import CONTENIDO, clasificar_origen
+    from fotogramas import abrir_fotograma, contar_fotogramas, expandir_fotogramas, \
+        iterar_fotogramas
+    import mosaicos
+
+EXTENSIONES_IMAGEN = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff')
+EXTENSIONES_DOCUMENTO = EXTENSIONES_IMAGEN + ('.pdf',)
+
+def texto_a_tabla(texto):
+    """
+    Convertir texto OCR a tabla
+
+    Args:
+        texto: Texto devuelto por Tesseract
+
+    Returns:
+        Tupla (encabezados, filas)
+    """
+    # Dividir en líneas
+    lines = [line.strip() for line in texto.split('\n') if line.strip()]
+
+    if not lines:
+        return [], []
+
+    # Detectar separadores
+    first_line = lines[0]
+    separators = ['\t', '  ', '|', ',', ';']
+
+    detected_separator = None
+    for sep in separators:
+        if sep in first_line:
+            parts = first_line.split(sep)
+            if len(parts) > 1:
+                detected_separator = sep
+                break
+
+    filas = []
+
+    if detected_separator:
+        # Procesar como tabla con separador
+        encabezados = [h.strip() for h in first_line.split(detected_separator) if h.strip()]
+        data_lines = lines[1:] if len(encabezados) > 1 else lines
+
+        for line in data_lines:
+            cells = [c.strip() for c in line.split(detected_separator) if c.strip()]
+            if cells:
+                filas.append(cells)
+    else:
+        # Procesar como texto simple
+        encabezados = ["Texto Extraído"]
+        for line in lines:
+            filas.append([line])
+
+    return encabezados, filas
+
+def configurar_tesseract(config):
+    """
+    Configurar la ruta de Tesseract a partir de la configuración
+
+    Args:
+        config: ConfigManager (u objeto con método get)
+
+    Returns:
+        str: Ruta del ejecutable usado
+    """
+    tesseract_path = config.get("paths.tesseract", "")
+    if tesseract_path and os.path.exists(tesseract_path):
+        pytesseract.pytesseract.tesseract_cmd = tesseract_path
+    return pytesseract.pytesseract.tesseract_cmd
+
+def _tabla_de_pagina(texto, palabras, config, encabezados=None):
+    """
+    Encabezados, filas y celdas de una página (mismo criterio que procesar_imagen)
+
+    Args:
+        encabezados: Encabezados del documento (los de su primera página);
+            si se indican, la primera línea de la página es una fila de datos
+    """
+    if palabras and config.get("ocr.table_layout", "boxes") == "boxes":
+        tabla = reconstruir_tabla(palabras)
+        if encabezados is None:
+            return separar_encabezados(tabla)
+        filas = [[celda['texto'] if celda else '' for celda in fila] for fila in tabla['celdas']]
+        return encabezados, filas, tabla['celdas']
+
+    encabezados_pagina, filas = texto_a_tabla(texto)
+    if encabezados is None:
+        return encabezados_pagina, filas, None
+    if len(encabezados_pagina) > 1:
+        # texto_a_tabla tomó la primera línea como encabezado
+        filas = [encabezados_pagina] + filas
+    return encabezados, filas, None
+
+def _reescalar_cajas(palabras, factor):
+    """Multiplicar en el sitio las cajas de las palabras por un factor"""
+    for palabra in palabras:
+        izquierda = round(palabra['left'] * factor)
+        arriba = round(palabra['top'] * factor)
+        palabra['width'] = round((palabra['left'] + palabra['width']) * factor) - izquierda
+        palabra['height'] = round((palabra['top'] + palabra['height']) * factor) - arriba
+        palabra['left'] = izquierda
+        palabra['top'] = arriba
+
+def resultado_omitido(filtro):
+    """Resultado vacío de una página que el filtro previo no manda al OCR"""
+    return {'texto': '', 'palabras': [], 'encabezados': [], 'filas': [], 'escala': 1.0,
+            'omitida': filtro['clase'], 'filtro': filtro, 'desde_cache': False}
+
+def procesar_imagen(imagen, config, progreso=None, ruta_origen=None, perfilador=None,
+                    fotograma=None):
+    """
+    Ejecutar el flujo completo sobre una imagen ya cargada
+
+    Args:
+        imagen: PIL.Image a reconocer
+        config: ConfigManager (u objeto con método get)
+        progreso: Función opcional progreso(valor, mensaje); se ignora si se
+            pasa un perfilador (que ya lleva su propia función de progreso)
+        ruta_origen: Archivo de la imagen; si se indica, la clave de caché
+            se calcula sobre sus bytes en lugar de sobre los píxeles y las
+            etapas intermedias del preprocesado se memorizan
+        perfilador: Perfilador que mide cada etapa (utils.instrumentacion)
+        fotograma: Número de fotograma de ruta_origen (TIFF multipágina);
+            forma parte de las claves de caché
+
+    Returns:
+        Dict con 'texto', 'palabras', 'encabezados', 'filas', 'escala'
+        (factor aplicado por preprocessing.auto_resolution), 'desde_cache' y,
+        si la tabla sale de las cajas de palabras, 'celdas'. Las páginas en
+        blanco o separadoras (preprocessing.page_filter) no pasan por el
+        OCR: su resultado está vacío y lleva 'omitida' (la clase) y 'filtro'
+        (las medidas de la clasificación)
+    """
+    if perfilador is None:
+        # Sin perfilador solo hace falta el progreso: nada de muestrear memoria
+        perfilador = Perfilador(progreso=progreso, intervalo_rss=None) if progreso \
+            else PERFILADOR_NULO
+
+    # Ajustes fijos durante todo el trabajo (y huella para la caché)
+    if hasattr(config, 'instantanea'):
+        config = config.instantanea()
+
+    lang = config.get("ocr.language", "eng")
+    psm = config.get("ocr.psm", "6")
+    oem = config.get("ocr.oem", "3")
+    backend = backend_desde_config(config)
+
+    # Consultar la caché antes de cualquier trabajo costoso
+    cache = cache_desde_config(config)
+    clave = None
+    if cache:
+        with perfilador.etapa('cache'):
+            hash_datos = hash_archivo(ruta_origen) if ruta_origen else hash_imagen(imagen)
+            if ruta_origen and fotograma:
+                hash_datos = f"{hash_datos}:{fotograma}"
+            clave = cache.clave(hash_datos, config, backend.version(), lang, backend.nombre)
+            resultado = cache.obtener(clave)
+        if resultado is not None:
+            resultado['desde_cache'] = True
+            perfilador.terminar()
+            return resultado
+
+    # Paso 0: Descartar páginas en blanco y separadoras (versión reducida)
+    if config.get("preprocessing.page_filter", True):
+        with perfilador.etapa('preprocess.filtro'):
+            filtro = clasificar_origen(ruta_origen or imagen, fotograma, imagen.size)
+        if filtro['clase'] != CONTENIDO:
+            perfilador.terminar()
+            return resultado_omitido(filtro)
+
+    # Paso 1: Decodificar. Con archivo de origen se decodifica directamente
+    # a gris en la primera etapa del preprocesado (Image.open es perezoso y
+    # la imagen PIL no llega a cargarse)
+    clave_origen = None
+    if ruta_origen:
+        info = os.stat(ruta_origen)
+        clave_origen = f"{os.path.abspath(ruta_origen)}:{info.st_mtime_ns}:{info.st_size}"
+        if fotograma:
+            clave_origen = f"{clave_origen}:{fotograma}"
+    else:
+        with perfilador.etapa('decode'):
+            imagen.load()
+
+    # Paso 2: Preprocesar imagen (cada etapa se mide por separado)
+    procesada = ImageProcessor.preprocess_image(imagen, config, source_key=clave_origen,
+                                                perfilador=perfilador, source_path=ruta_origen,
+                                                frame=fotograma)
+
+    # Paso 3: Ejecutar OCR (texto y cajas de palabras en una pasada)
+    with perfilador.etapa('ocr'):
+        reconocido = backend.reconocer_con_cajas(procesada, idioma=lang, psm=psm, oem=oem)
+
+    # Si el preprocesado cambió la resolución, las cajas vuelven a
+    # coordenadas de la imagen original
+    escala = procesada.shape[1] / imagen.width
+    if escala != 1.0:
+        _reescalar_cajas(reconocido['palabras'], 1 / escala)
+
+    # Paso 4: Procesar resultados (rejilla a partir de las cajas de palabras)
+    with perfilador.etapa('table'):
+        encabezados, filas, celdas = _tabla_de_pagina(reconocido['texto'],
+                                                      reconocido['palabras'], config)
+
+    resultado = {
+        'texto': reconocido['texto'],
+        'palabras': reconocido['palabras'],
+        'encabezados': encabezados,
+        'filas': filas,
+        'escala': escala
+    }
+    if celdas is not None:
+        # Caja y confianza de cada celda (procedencia en modelo_tabla)
+        resultado['celdas'] = celdas
+
+    if cache:
+        with perfilador.etapa('cache.guardar'):
+            cache.guardar(clave, resultado)
+
+    resultado['desde_cache'] = False
+    perfilador.terminar()
+    return resultado
+
+def procesar_documento(ruta, config, progreso=None, perfilador=None):
+    """
+    Procesar una imagen o un PDF completo (usado por la cola de trabajos)
+
+    Args:
+        ruta: Imagen o PDF
+        config: ConfigManager (u objeto con método get)
+        progreso: Función opcional progreso(valor, mensaje); puede lanzar
+            una excepción para cancelar (se llama al empezar cada etapa o
+            cada página)
+        perfilador: Perfilador opcional; en un PDF solo mide las etapas (el
+            progreso se informa por páginas) y en un TIFF multipágina su
+            progreso se reparte por fotogramas
+
+    Returns:
+        Dict con 'texto', 'tabla' (TablaOCR), 'paginas', 'omitidas' (lista
+        de {'pagina', 'clase'} de las páginas que el filtro previo no pasó
+        al OCR) y 'desde_cache'; en PDF y TIFF multipágina los encabezados
+        son los de la primera página con tabla y la procedencia 'pagina' de
+        cada fila es su página o fotograma
+    """
+    if hasattr(config, 'instantanea'):
+        config = config.instantanea()
+
+    if ruta.lower().endswith(('.tif', '.tiff')) and contar_fotogramas(ruta) > 1:
+        return _procesar_fotogramas(ruta, config, progreso, perfilador)
+
+    if not ruta.lower().endswith('.pdf'):
+        with Image.open(ruta) as imagen:
+            resultado = procesar_imagen(imagen, config, progreso=progreso, ruta_origen=ruta,
+                                        perfilador=perfilador)
+        omitidas = [{'pagina': 1, 'clase': resultado['omitida']}] \
+            if resultado.get('omitida') else []
+        return {'texto': resultado['texto'],
+                'tabla': TablaOCR.desde_resultado(resultado),
+                'paginas': 1,
+                'omitidas': omitidas,
+                'desde_cache': resultado['desde_cache']}
+
+    try:
+        from utils.convertir_pdf import contar_paginas_pdf, extraer_texto_pdf_stream
+    except ImportError:
+        from convertir_pdf import contar_paginas_pdf, extraer_texto_pdf_stream
+
+    total = contar_paginas_pdf(ruta)
+    textos = []
+    tablas = []
+    if progreso:
+        progreso(0, f"PDF de {total} páginas")
+
+    # Con auto_resolution los DPI se eligen midiendo el texto de la primera página
+    dpi = 'auto' if config.get("preprocessing.auto_resolution", True) \
+        else int(config.get("ocr.dpi", 300))
+    paginas = extraer_texto_pdf_stream(ruta, idioma=config.get("ocr.language", "eng"), dpi=dpi,
+                                       filtrar_paginas=config.get("preprocessing.page_filter",
+                                                                  True),
+                                       psm=config.get("ocr.psm", "6"),
+                                       oem=config.get("ocr.oem", "3"),
+                                       backend=backend_desde_config(config),
+                                       cache=cache_desde_config(config), config=config,
+                                       perfilador=perfilador)
+    omitidas = []
+    encabezados_documento = None
+    desde_cache = True
+    # El progreso de un PDF va por páginas: el perfilador solo mide las etapas
+    progreso_etapas = getattr(perfilador, 'progreso', None)
+    if progreso_etapas:
+        perfilador.progreso = None
+    try:
+        # closing: al cancelar se libera el hilo de renderizado del PDF
+        with contextlib.closing(paginas):
+            for pagina in paginas:
+                desde_cache = desde_cache and pagina.get('desde_cache', False)
+                if pagina['metodo'] == 'omitida':
+                    omitidas.append({'pagina': pagina['pagina'], 'clase': pagina['clase']})
+                    if progreso:
+                        progreso(100 * pagina['pagina'] / max(total, 1),
+                                 f"Página {pagina['pagina']} de {total} omitida "
+                                 f"({pagina['clase']})")
+                    continue
+                # Los encabezados salen de la primera página con tabla; en
+                # las siguientes la primera línea ya es un dato
+                encabezados, filas, celdas = _tabla_de_pagina(pagina['texto'],
+                                                               pagina['palabras'], config,
+                                                               encabezados_documento)
+                encabezados_documento = encabezados_documento or encabezados or None
+                textos.append(pagina['texto'])
+                tablas.append(TablaOCR.desde_filas(encabezados, filas, celdas,
+                                                   pagina=pagina['pagina']))
+                if progreso:
+                    progreso(100 * pagina['pagina'] / max(total, 1),
+                             f"Página {pagina['pagina']} de {total}")
+    finally:
+        if progreso_etapas:
+            perfilador.progreso = progreso_etapas
+
+    return {'texto': '\n\f'.join(textos),
+            'tabla': TablaOCR.concatenar(tablas),
+            'paginas': total,
+            'omitidas': omitidas,
+            'desde_cache': desde_cache and bool(textos)}
+
+def _procesar_fotogramas(ruta, config, progreso=None, perfilador=None):
+    """Procesar un TIFF multipágina fotograma a fotograma (ver procesar_documento)"""
+    total = contar_fotogramas(ruta)
+    textos = []
+    tablas = []
+    omitidas = []
+    encabezados_documento = None
+    desde_cache = True
+    # El perfilador mide las etapas de todos los fotogramas; su progreso se
+    # sustituye por el del fotograma en curso (un tramo del total)
+    progreso_etapas = getattr(perfilador, 'progreso', None)
+
+    # closing: al cancelar se cierra el archivo enseguida
+    with contextlib.closing(iterar_fotogramas(ruta)) as fotogramas:
+        for numero, imagen in fotogramas:
+            def progreso_fotograma(valor, mensaje):
+                # El progreso de cada fotograma es un tramo del total
+                if progreso:
+                    progreso(100 * (numero - 1 + valor / 100) / total,
+                             f"Fotograma {numero} de {total}: {mensaje}")
+
+            if progreso_etapas:
+                perfilador.progreso = progreso_fotograma
+            try:
+                resultado = procesar_imagen(imagen, config, progreso=progreso_fotograma,
+                                            ruta_origen=ruta, perfilador=perfilador,
+                                            fotograma=numero)
+            finally:
+                imagen.close()
+                if progreso_etapas:
+                    perfilador.progreso = progreso_etapas
+
+            desde_cache = desde_cache and resultado['desde_cache']
+            if resultado.get('omitida'):
+                omitidas.append({'pagina': numero, 'clase': resultado['omitida']})
+                continue
+            textos.append(resultado['texto'])
+            if encabezados_documento is None:
+                tablas.append(TablaOCR.desde_resultado(resultado, pagina=numero))
+                encabezados_documento = resultado['encabezados'] or None
+            else:
+                # Encabezados del primer fotograma; la primera línea es un dato
+                encabezados, filas, celdas = _tabla_de_pagina(resultado['texto'],
+                                                               resultado['palabras'], config,
+                                                               encabezados_documento)
+                tablas.append(TablaOCR.desde_filas(encabezados, filas, celdas, pagina=numero))
+
+    return {'texto': '\n\f'.join(textos),
+            'tabla': TablaOCR.concatenar(tablas),
+            'paginas': total,
+            'omitidas': omitidas,
+            'desde_cache': desde_cache}
+
+def guardar_resultado(resultado, carpeta_salida, nombre_base):
+    """
+    Guardar el resultado de una imagen en disco (.txt y .json)
+
+    Args:
+        resultado: Dict devuelto por procesar_imagen
+        carpeta_salida: Carpeta destino
+        nombre_base: Nombre del archivo sin extensión
+
+    Returns:
+        str: Ruta del archivo JSON generado
+    """
+    os.makedirs(carpeta_salida, exist_ok=True)
+
+    ruta_txt = os.path.join(carpeta_salida, f"{nombre_base}.txt")
+    with open(ruta_txt, 'w', encoding='utf-8') as f:
+        f.write(resultado['texto'])
+
+    ruta_json = os.path.join(carpeta_salida, f"{nombre_base}.json")
+    with open(ruta_json, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+
+    return ruta_json
+
+def nombres_salida(rutas):
+    """
+    Nombre base de los archivos de salida de cada imagen, sin colisiones
+
+    El nombre lleva la extensión (x.png -> x_png, x.jpg -> x_jpg); si dos
+    imágenes de carpetas distintas siguen coincidiendo, se antepone su ruta
+    relativa a la carpeta común (a/x.png -> a_x_png).
+
+    Args:
+        rutas: Lista de rutas de imágenes
+
+    Returns:
+        Dict ruta -> nombre base
+    """
+    def nombre(ruta):
+        raiz, extension = os.path.splitext(ruta)
+        return f"{raiz}_{extension.lstrip('.')}" if extension else raiz
+
+    nombres = {ruta: nombre(os.path.basename(ruta)) for ruta in rutas}
+    cuenta = {}
+    for valor in nombres.values():
+        cuenta[valor] = cuenta.get(valor, 0) + 1
+
+    repetidas = [ruta for ruta in nombres if cuenta[nombres[ruta]] > 1]
+    if repetidas:
+        absolutas = {ruta: os.path.abspath(ruta) for ruta in repetidas}
+        try:
+            comun = os.path.commonpath([os.path.dirname(a) for a in absolutas.values()])
+        except ValueError:
+            # Unidades distintas (Windows): ruta completa
+            comun = None
+        for ruta, absoluta in absolutas.items():
+            relativa = os.path.relpath(absoluta, comun) if comun else absoluta
+            relativa = relativa.replace(':', '').strip(os.sep)
+            nombres[ruta] = nombre(relativa).replace(os.sep, '_')
+
+    # Última garantía (p. ej. a_x.png junto a a/x.png)
+    usados = set()
+    for ruta, valor in nombres.items():
+        unico, indice = valor, 2
+        while unico in usados:
+            unico = f"{valor}_{indice}"
+            indice += 1
+        usados.add(unico)
+        nombres[ruta] = unico
+    return nombres
+
+def procesar_archivo(ruta_imagen, config, carpeta_salida=None, carpeta_trazas=None,
+                     incluir_tabla=False, fotograma=None, nombre_base=None):
+    """
+    Procesar un archivo de imagen y, opcionalmente, guardar el resultado
+
+    Args:
+        ruta_imagen: Ruta de la imagen
+        config: ConfigManager (u objeto con método get)
+        carpeta_salida: Carpeta donde guardar .txt/.json (None para no guardar)
+        carpeta_trazas: Carpeta donde guardar la traza Chrome/JSON del
+            trabajo (None para no guardarla)
+        incluir_tabla: Añadir 'tabla' ({'encabezados', 'filas'}) al resumen
+            aunque se guarde en disco (para exportar el lote en un archivo)
+        fotograma: Fotograma a procesar en un TIFF multipágina (1-indexed);
+            se añade al resumen y al nombre de los archivos de salida
+        nombre_base: Nombre de los archivos de salida (por defecto, el de
+            nombres_salida para esta imagen sola: x.png -> x_png)
+
+    Returns:
+        Dict con el resumen del procesamiento (incluye 'etapas' con tiempo
+        real, CPU y pico de memoria por etapa)
+    """
+    inicio = time.perf_counter()
+    resumen = {'archivo': ruta_imagen}
+    if nombre_base is None:
+        nombre_base = nombres_salida([ruta_imagen])[ruta_imagen]
+    if fotograma:
+        resumen['fotograma'] = fotograma
+        nombre_base = f"{nombre_base}_f{fotograma:04d}"
+    perfilador = Perfilador(trabajo=nombre_base)
+
+    try:
+        with abrir_fotograma(ruta_imagen, fotograma) as imagen:
+            resultado = procesar_imagen(imagen, config, ruta_origen=ruta_imagen,
+                                        perfilador=perfilador, fotograma=fotograma)
+
+        resumen['filas'] = len(resultado['filas'])
+        resumen['desde_cache'] = resultado['desde_cache']
+        if resultado.get('omitida'):
+            # Se guarda igualmente (.json con las medidas) para poder auditarla
+            resumen['omitida'] = resultado['omitida']
+            resumen['filtro'] = resultado['filtro']
+
+        if carpeta_salida:
+            with perfilador.etapa('export'):
+                resumen['salida'] = guardar_resultado(resultado, carpeta_salida, nombre_base)
+            if incluir_tabla:
+                resumen['tabla'] = {'encabezados': resultado['encabezados'],
+                                    'filas': resultado['filas']}
+        else:
+            resumen['resultado'] = resultado
+
+    except Exception as e:
+        resumen['error'] = str(e)
+
+    resumen['segundos'] = time.perf_counter() - inicio
+    resumen['etapas'] = perfilador.resumen()
+
+    if carpeta_trazas:
+        try:
+            perfilador.exportar_traza(os.path.join(carpeta_trazas, f"{nombre_base}.trace.json"))
+        except Exception as e:
+            print(f"Error guardando traza: {e}")
+
+    return resumen
+
+# ============================================================================
+# PROCESAMIENTO POR LOTES
+# ============================================================================
+
+_config_trabajador = None
+
+def inicializar_trabajador(config):
+    """Preparar cada proceso del pool (un hilo por proceso)"""
+    global _config_trabajador
+
+    # Evitar sobresuscripción: el paralelismo lo dan los procesos
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+    try:
+        import cv2
+        cv2.setNumThreads(1)
+    except Exception:
+        pass
+    mosaicos.configurar_hilos(1)
+
+    # Cada imagen se procesa una sola vez: no memorizar etapas intermedias
+    cadena_por_defecto().max_bytes = 0
+
+    _config_trabajador = config
+    configurar_tesseract(config)
+
+def _procesar_en_trabajador(tarea, carpeta_salida, carpeta_trazas=None,
+                            incluir_tabla=False):
+    """Tarea (ruta, fotograma, nombre_base) ejecutada dentro del pool"""
+    ruta_imagen, fotograma, nombre_base = tarea
+    return procesar_archivo(ruta_imagen, _config_trabajador, carpeta_salida, carpeta_trazas,
+                            incluir_tabla, fotograma, nombre_base)
+
+def listar_imagenes(entradas):
+    """
+    Expandir una lista de archivos y carpetas a rutas de imágenes
+
+    Args:
+        entradas: Lista de rutas (archivos o carpetas)
+
+    Returns:
+        Lista ordenada de rutas de imágenes
+    """
+    rutas = []
+
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            for archivo in sorted(os.listdir(entrada)):
+                if archivo.lower().endswith(EXTENSIONES_IMAGEN):
+                    rutas.append(os.path.join(entrada, archivo))
+        elif os.path.isfile(entrada):
+            rutas.append(entrada)
+        else:
+            print(f"Aviso: ruta no encontrada: {entrada}")
+
+    return rutas
+
+def procesar_lote(rutas, config, carpeta_salida, procesos=None, al_terminar=None,
+                  carpeta_trazas=None, incluir_tabla=False):
+    """
+    Procesar muchas imágenes en un pool de procesos (una imagen por tarea)
+
+    Los TIFF multipágina se reparten fotograma a fotograma: cada proceso
+    abre el archivo y decodifica solo su fotograma.
+
+    Args:
+        rutas: Lista de rutas de imágenes
+        config: ConfigManager o ConfigInstantanea
+        carpeta_salida: Carpeta donde se guarda el resultado de cada imagen
+        procesos: Número de procesos (por defecto, núcleos disponibles)
+        al_terminar: Función opcional llamada con cada resumen
+        carpeta_trazas: Carpeta opcional para la traza de cada imagen
+        incluir_tabla: Devolver la tabla de cada imagen en su resumen
+
+    Returns:
+        Lista de resúmenes en el orden de finalización
+    """
+    procesos = procesos or os.cpu_count() or 1
+    # Los procesos reciben una instantánea inmutable (serializable)
+    if hasattr(config, 'instantanea'):
+        config = config.instantanea()
+    # Limitar el trabajo en vuelo para no acumular futuros en memoria
+    max_en_vuelo = procesos * 2
+
+    resumenes = []
+    # Nombres de salida únicos aunque coincidan nombres de archivo
+    nombres = nombres_salida(rutas)
+    pendientes = ((ruta, fotograma, nombres[ruta])
+                  for ruta, fotograma in expandir_fotogramas(rutas))
+    en_vuelo = set()
+
+    with ProcessPoolExecutor(max_workers=procesos,
+                             initializer=inicializar_trabajador,
+                             initargs=(config,)) as pool:
+        while True:
+            while len(en_vuelo) < max_en_vuelo:
+                tarea = next(pendientes, None)
+                if tarea is None:
+                    break
+                en_vuelo.add(pool.submit(_procesar_en_trabajador, tarea, carpeta_salida,
+                                           carpeta_trazas, incluir_tabla))
+
+            if not en_vuelo:
+                break
+
+            terminados, en_vuelo = wait(en_vuelo, return_when=FIRST_COMPLETED)
+            for futuro in terminados:
+                resumen = futuro.result()
+                resumenes.append(resumen)
+                if al_terminar:
+                    al_terminar(resumen)
+
+    return resumenes
+
+def main(argv=None):
+    """Punto de entrada de la línea de comandos"""
+    parser = argparse.ArgumentParser(
+        description="OCR por lotes sin interfaz gráfica (preprocesado + OCR + tabla)"
+    )
+    parser.add_argument('entradas', nargs='+',
+                        help="Imágenes o carpetas con imágenes")
+    parser.add_argument('-o', '--salida', default='resultados_ocr',
+                        help="Carpeta de resultados (por defecto: resultados_ocr)")
+    parser.add_argument('-j', '--procesos', type=int, default=None,
+                        help="Número de procesos (por defecto: núcleos disponibles)")
+    parser.add_argument('--config', default='config/settings.json',
+                        help="Archivo de configuración")
+    parser.add_argument('--idioma', default=None,
+                        help="Idioma de Tesseract (sobrescribe ocr.language)")
+    parser.add_argument('--trazas', default=None,
+                        help="Carpeta donde guardar una traza Chrome/JSON por imagen")
+    parser.add_argument('--exportar', default=None,
+                        help="Archivo .xlsx, .csv o .parquet con las filas de todas las "
+                             "imágenes (columnas alineadas por nombre)")
+    args = parser.parse_args(argv)
+
+    config = ConfigManager(args.config)
+    if args.idioma:
+        config.set('ocr.language', args.idioma, save=False)
+
+    rutas = listar_imagenes(args.entradas)
+    if not rutas:
+        print("Error: no se encontraron imágenes")
+        return 1
+
+    print(f"Procesando {len(rutas)} imágenes...")
+    inicio = time.perf_counter()
+    errores = 0
+    desde_cache = 0
+    paginas = 0
+    omitidas = []
+    etapas = {}
+    exportador = None
+    # Las filas van a un temporal (una línea JSON por imagen) según terminan;
+    # al final se escriben alineadas por nombre con todas las columnas vistas
+    pendientes = tempfile.TemporaryFile('w+', encoding='utf-8') if args.exportar else None
+    columnas = {}
+
+    def exportar(resumen):
+        tabla = resumen.pop('tabla', None)
+        if not tabla or not tabla['filas']:
+            return
+        n_columnas = max([len(tabla['encabezados'])] + [len(fila) for fila in tabla['filas']])
+        destino = [columnas.setdefault(nombre, len(columnas))
+                   for nombre in encabezados_unicos(tabla['encabezados'], n_columnas)]
+        pendientes.write(json.dumps([os.path.basename(resumen['archivo']),
+                                     resumen.get('fotograma'), destino, tabla['filas']],
+                                    ensure_ascii=False) + '\n')
+
+    def volcar_exportacion():
+        nonlocal exportador
+        exportador = crear_exportador(args.exportar, ['Archivo', 'Fotograma'] + list(columnas),
+                                      hoja=config.get("export_settings.sheet_name", "OCR_Data"))
+        pendientes.seek(0)
+        for linea in pendientes:
+            nombre, fotograma, destino, filas = json.loads(linea)
+            bloque = []
+            for fila in filas:
+                celdas = [None] * len(columnas)
+                for posicion, valor in zip(destino, fila):
+                    celdas[posicion] = valor
+                bloque.append([nombre, fotograma] + celdas)
+            exportador.escribir_filas(bloque)
+
+    def informar(resumen):
+        nonlocal errores, desde_cache, paginas
+        nombre = os.path.basename(resumen['archivo'])
+        if resumen.get('fotograma'):
+            nombre = f"{nombre} [{resumen['fotograma']}]"
+        paginas += 1
+        if args.exportar:
+            exportar(resumen)
+        desde_cache += 1 if resumen.get('desde_cache') else 0
+        for grupo, datos in resumen.get('etapas', {}).items():
+            total = etapas.setdefault(grupo, {'segundos': 0.0, 'cpu': 0.0, 'rss_pico_mb': 0.0})
+            total['segundos'] += datos['segundos']
+            total['cpu'] += datos['cpu']
+            total['rss_pico_mb'] = max(total['rss_pico_mb'], datos['rss_pico_mb'] or 0.0)
+        if 'error' in resumen:
+            errores += 1
+            print(f"  [ERROR] {nombre}: {resumen['error']}")
+        elif resumen.get('omitida'):
+            omitidas.append({'archivo': resumen['archivo'], 'fotograma': resumen.get('fotograma'),
+                             'clase': resumen['omitida'], 'filtro': resumen['filtro']})
+            print(f"  [OMITIDA] {nombre}: {resumen['omitida']} "
+                  f"(tinta {resumen['filtro']['tinta']:.2%}, {resumen['filtro']['ms']:.0f} ms)")
+        else:
+            origen = " [caché]" if resumen.get('desde_cache') else ""
+            print(f"  [OK] {nombre}: {resumen['filas']} filas ({resumen['segundos']:.2f}s){origen}")
+
+    try:
+        procesar_lote(rutas, config, args.salida, args.procesos, informar, args.trazas,
+                      incluir_tabla=bool(args.exportar))
+        if pendientes is not None:
+            volcar_exportacion()
+    except Exception:
+        print(traceback.format_exc())
+        return 1
+    finally:
+        if exportador is not None:
+            exportador.cerrar()
+        if pendientes is not None:
+            pendientes.close()
+
+    total = time.perf_counter() - inicio
+    # El rendimiento solo cuenta las páginas terminadas sin error
+    correctas = paginas - errores
+    print(f"\nCompletado: {paginas} páginas de {len(rutas)} archivos en {total:.1f}s "
+          f"({correctas / total:.2f} pág/s correctas), {errores} errores, "
+          f"{desde_cache} desde caché, {len(omitidas)} omitidas")
+
+    if omitidas:
+        # Registro de las páginas sin OCR (en blanco o separadoras)
+        ruta_omitidas = os.path.join(args.salida, 'omitidas.json')
+        with open(ruta_omitidas, 'w', encoding='utf-8') as f:
+            json.dump(omitidas, f, indent=2, ensure_ascii=False)
+        print(f"Páginas omitidas registradas en: {ruta_omitidas}")
+
+    if etapas:
+        print(f"\n{'etapa':<12} {'real (s)':>9} {'CPU (s)':>9} {'pico RSS (MB)':>14}")
+        for grupo, datos in etapas.items():
+            print(f"{grupo:<12} {datos['segundos']:>9.2f} {datos['cpu']:>9.2f} "
+                  f"{datos['rss_pico_mb']:>14.1f}")
+
+    print(f"Resultados en: {args.salida}")
+    if exportador is not None:
+        print(f"Exportadas {exportador.filas_escritas} filas a: {args.exportar}")
+    if args.trazas:
+        print(f"Trazas en: {args.trazas}")
+
+    return 1 if errores else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
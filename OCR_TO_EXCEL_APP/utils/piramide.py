@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Pirámide de resoluciones para la vista previa (sin dependencias de la GUI)
+
+El nivel n es la imagen reducida a 1/2^n. Los niveles se calculan al
+pedirlos y se memorizan:
+- JPEG: los niveles 1-3 se decodifican directamente a 1/2, 1/4 u 1/8 con
+  el modo draft de PIL (el decodificador DCT reduce al leer), sin pasar
+  nunca por la resolución completa.
+- Resto de formatos: el nivel 0 se decodifica una vez y cada nivel se
+  obtiene del anterior con Image.reduce(2).
+Un cambio de zoom solo reescala teselas de un nivel ya calculado.
+"""
+
+import math
+import threading
+
+from PIL import Image
+
+# Modos que se muestran tal cual; el resto se convierte a RGB (o L si es
+# de un solo canal)
+MODOS_DIRECTOS = ('L', 'RGB')
+
+def _modo_vista(imagen):
+    if imagen.mode in MODOS_DIRECTOS:
+        return imagen.mode
+    if imagen.mode in ('1', 'I', 'I;16', 'F') or imagen.mode.startswith('I;'):
+        return 'L'
+    return 'RGB'
+
+class PiramideImagen:
+    """Niveles 1/2^n de una imagen, calculados bajo demanda"""
+
+    def __init__(self, imagen, ruta=None, min_lado=64):
+        """
+        Args:
+            imagen: PIL.Image (puede estar sin decodificar: Image.open)
+            ruta: Archivo de la imagen; si es JPEG permite decodificar los
+                niveles reducidos directamente del archivo
+            min_lado: El último nivel es el primero con el lado mayor por
+                debajo de este valor
+        """
+        self.imagen = imagen
+        self.ruta = ruta
+        self.ancho, self.alto = imagen.size
+        self.modo = _modo_vista(imagen)
+        self.es_jpeg = imagen.format == 'JPEG' and ruta is not None
+        self.num_niveles = max(1, math.ceil(math.log2(max(self.ancho, self.alto, 1)
+                                                      / min_lado)) + 1)
+        self._niveles = {}
+        # Un cerrojo por nivel: calcular un nivel no bloquea a quien pide otro
+        self._cerrojos = [threading.Lock() for _ in range(self.num_niveles)]
+
+    def tamano_nivel(self, n):
+        """(ancho, alto) del nivel n"""
+        factor = 2 ** n
+        return max(1, -(-self.ancho // factor)), max(1, -(-self.alto // factor))
+
+    def nivel_para(self, zoom):
+        """
+        Nivel más reducido con al menos la resolución pedida
+
+        Args:
+            zoom: Píxeles de pantalla por píxel de la imagen original
+
+        Returns:
+            Tupla (nivel, escala del nivel respecto al original)
+        """
+        n = 0 if zoom >= 1 else int(math.floor(math.log2(1 / zoom)))
+        n = min(n, self.num_niveles - 1)
+        return n, 1 / 2 ** n
+
+    def tiene_nivel(self, n):
+        return n in self._niveles
+
+    def nivel(self, n):
+        """
+        Imagen del nivel n (se calcula la primera vez; seguro entre hilos)
+
+        Los niveles ya calculados se devuelven sin esperar a ningún cerrojo:
+        la interfaz los pide mientras otro hilo calcula un nivel nuevo.
+
+        Returns:
+            PIL.Image en modo L o RGB
+        """
+        resultado = self._niveles.get(n)
+        if resultado is not None:
+            return resultado
+        return self._calcular(n)
+
+    def _calcular(self, n):
+        # Los cerrojos se toman de mayor a menor nivel (sin interbloqueos)
+        with self._cerrojos[n]:
+            if n in self._niveles:
+                return self._niveles[n]
+
+            if n == 0:
+                resultado = self.imagen.convert(self.modo) if self.imagen.mode != self.modo \
+                    else self.imagen.copy()
+            elif self.es_jpeg and n <= 3 and 0 not in self._niveles:
+                resultado = self._decodificar_jpeg(n)
+            else:
+                resultado = self._calcular(n - 1).reduce(2)
+
+            self._niveles[n] = resultado
+            return resultado
+
+    def _decodificar_jpeg(self, n):
+        """Decodificar un nivel 1-3 a escala reducida (modo draft)"""
+        tamano = self.tamano_nivel(n)
+        with Image.open(self.ruta) as archivo:
+            archivo.draft(self.modo, tamano)
+            reducida = archivo.convert(self.modo)
+        # draft redondea a la escala DCT más cercana por arriba
+        if reducida.size != tamano:
+            reducida = reducida.resize(tamano, Image.Resampling.BILINEAR)
+        return reducida
+
+    def recorte(self, zoom, x, y, ancho, alto):
+        """
+        Región de la imagen tal como se ve con un zoom dado
+
+        Args:
+            zoom: Píxeles de pantalla por píxel original
+            x, y: Esquina en coordenadas de pantalla (imagen ya escalada)
+            ancho, alto: Tamaño en pantalla
+
+        Returns:
+            PIL.Image de como mucho ancho x alto (recortada en los bordes),
+            o None si la región cae fuera de la imagen
+        """
+        n, escala = self.nivel_para(zoom)
+        base = self.nivel(n)
+        factor = zoom / escala
+
+        # Región equivalente en el nivel n
+        izquierda = x / factor
+        arriba = y / factor
+        derecha = min((x + ancho) / factor, base.width)
+        abajo = min((y + alto) / factor, base.height)
+        if derecha <= izquierda or abajo <= arriba:
+            return None
+
+        destino = (max(1, round((derecha - izquierda) * factor)),
+                   max(1, round((abajo - arriba) * factor)))
+        return base.resize(destino, Image.Resampling.BILINEAR,
+                           box=(izquierda, arriba, derecha, abajo))
+
+    def miniatura(self, max_ancho, max_alto):
+        """Imagen completa ajustada a un recuadro (desde el nivel adecuado)"""
+        zoom = min(max_ancho / self.ancho, max_alto / self.alto, 1.0)
+        return self.recorte(zoom, 0, 0, math.ceil(self.ancho * zoom),
+                            math.ceil(self.alto * zoom))
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Cola de trabajos con prioridades, hilos acotados y cancelación cooperativa
+
+Los trabajos esperan en un montículo ordenado por prioridad (mayor primero)
+y orden de llegada. Un número fijo de hilos los va ejecutando; cambiar la
+prioridad de un trabajo pendiente lo recoloca en la cola. La cancelación es
+cooperativa: la función del trabajo llama a trabajo.avisar() o
+trabajo.comprobar() entre etapas y, si se ha pedido cancelar, se lanza
+TrabajoCancelado.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+
+PENDIENTE = 'pendiente'
+EN_CURSO = 'en curso'
+COMPLETADO = 'completado'
+CANCELADO = 'cancelado'
+ERROR = 'error'
+
+ESTADOS_FINALES = (COMPLETADO, CANCELADO, ERROR)
+
+class TrabajoCancelado(Exception):
+    """Se lanza dentro de un trabajo cuya cancelación se ha pedido"""
+
+class Trabajo:
+    """Un documento en la cola con su estado y progreso"""
+
+    def __init__(self, id, ruta, prioridad=0, **datos):
+        self.id = id
+        self.ruta = ruta
+        self.prioridad = prioridad
+        self.datos = datos
+        self.estado = PENDIENTE
+        self.progreso = 0.0
+        self.mensaje = "En cola"
+        self.resultado = None
+        self.error = None
+        self.creado = time.time()
+        self.inicio = None
+        self.fin = None
+        self._cancelar = threading.Event()
+        self._planificador = None
+
+    @property
+    def cancelacion_pedida(self):
+        return self._cancelar.is_set()
+
+    def comprobar(self):
+        """Lanzar TrabajoCancelado si se ha pedido cancelar"""
+        if self._cancelar.is_set():
+            raise TrabajoCancelado(f"Trabajo {self.id} cancelado")
+
+    def avisar(self, progreso, mensaje=None):
+        """
+        Informar del progreso (0-100); es también punto de cancelación
+
+        Se puede pasar directamente como función de progreso al motor OCR.
+        """
+        self.comprobar()
+        self.progreso = progreso
+        if mensaje:
+            self.mensaje = mensaje
+        if self._planificador:
+            self._planificador._notificar(self)
+
+    def segundos(self):
+        """Duración de la ejecución (hasta ahora si sigue en curso)"""
+        if self.inicio is None:
+            return 0.0
+        return (self.fin or time.time()) - self.inicio
+
+class Planificador:
+    """Ejecutor de trabajos con prioridad sobre un número fijo de hilos"""
+
+    def __init__(self, funcion, hilos=2, al_cambiar=None):
+        """
+        Args:
+            funcion: funcion(trabajo) -> resultado; debe llamar a
+                trabajo.avisar()/comprobar() para admitir cancelación
+            hilos: Número de trabajos simultáneos
+            al_cambiar: Función opcional al_cambiar(trabajo), llamada desde
+                los hilos de trabajo en cada cambio de estado o progreso
+        """
+        self.funcion = funcion
+        self.al_cambiar = al_cambiar
+        self._trabajos = {}
+        self._cola = []
+        self._versiones = {}
+        self._ids = itertools.count(1)
+        self._orden = itertools.count()
+        self._condicion = threading.Condition()
+        self._cerrado = False
+
+        self._hilos = [threading.Thread(target=self._bucle, name=f"trabajo-{i + 1}", daemon=True)
+                       for i in range(max(1, hilos))]
+        for hilo in self._hilos:
+            hilo.start()
+
+    def _notificar(self, trabajo):
+        if self.al_cambiar:
+            try:
+                self.al_cambiar(trabajo)
+            except Exception as e:
+                print(f"Error notificando trabajo {trabajo.id}: {e}")
+
+    def _apilar(self, trabajo):
+        """Meter (o recolocar) un trabajo en el montículo; la entrada vieja caduca"""
+        version = self._versiones.get(trabajo.id, 0) + 1
+        self._versiones[trabajo.id] = version
+        heapq.heappush(self._cola, (-trabajo.prioridad, next(self._orden), trabajo.id, version))
+        self._condicion.notify()
+
+    def encolar(self, ruta, prioridad=0, **datos):
+        """
+        Añadir un trabajo
+
+        Args:
+            ruta: Archivo a procesar
+            prioridad: Mayor = antes
+            **datos: Información adicional accesible en trabajo.datos
+
+        Returns:
+            Trabajo
+        """
+        with self._condicion:
+            if self._cerrado:
+                raise RuntimeError("El planificador está cerrado")
+            trabajo = Trabajo(next(self._ids), ruta, prioridad, **datos)
+            trabajo._planificador = self
+            self._trabajos[trabajo.id] = trabajo
+            self._apilar(trabajo)
+        self._notificar(trabajo)
+        return trabajo
+
+    def cambiar_prioridad(self, id_trabajo, prioridad):
+        """Cambiar la prioridad de un trabajo pendiente"""
+        with self._condicion:
+            trabajo = self._trabajos.get(id_trabajo)
+            if trabajo is None or trabajo.estado != PENDIENTE:
+                return False
+            trabajo.prioridad = prioridad
+            self._apilar(trabajo)
+        self._notificar(trabajo)
+        return True
+
+    def cancelar(self, id_trabajo):
+        """
+        Cancelar un trabajo pendiente (inmediato) o en curso (en su
+        siguiente punto de cancelación)
+        """
+        with self._condicion:
+            trabajo = self._trabajos.get(id_trabajo)
+            if trabajo is None or trabajo.estado in ESTADOS_FINALES:
+                return False
+            trabajo._cancelar.set()
+            if trabajo.estado == PENDIENTE:
+                trabajo.estado = CANCELADO
+                trabajo.mensaje = "Cancelado"
+                trabajo.fin = time.time()
+                self._versiones[trabajo.id] = -1
+            else:
+                trabajo.mensaje = "Cancelando..."
+        self._notificar(trabajo)
+        return True
+
+    def cancelar_todos(self):
+        """Cancelar todos los trabajos pendientes y en curso"""
+        for trabajo in self.trabajos():
+            self.cancelar(trabajo.id)
+
+    def quitar_terminados(self):
+        """Olvidar los trabajos terminados (y sus resultados)"""
+        with self._condicion:
+            for id_trabajo in [t.id for t in self._trabajos.values()
+                               if t.estado in ESTADOS_FINALES]:
+                del self._trabajos[id_trabajo]
+                self._versiones.pop(id_trabajo, None)
+
+    def trabajo(self, id_trabajo):
+        return self._trabajos.get(id_trabajo)
+
+    def trabajos(self):
+        """Todos los trabajos en orden de llegada"""
+        with self._condicion:
+            return sorted(self._trabajos.values(), key=lambda t: t.id)
+
+    def _siguiente(self):
+        """Sacar el trabajo pendiente de mayor prioridad (None al cerrar)"""
+        with self._condicion:
+            while True:
+                while self._cola:
+                    _, _, id_trabajo, version = heapq.heappop(self._cola)
+                    if self._versiones.get(id_trabajo) != version:
+                        continue  # entrada caducada (recolocado o cancelado)
+                    trabajo = self._trabajos[id_trabajo]
+                    trabajo.estado = EN_CURSO
+                    trabajo.mensaje = "Iniciando..."
+                    trabajo.inicio = time.time()
+                    return trabajo
+                if self._cerrado:
+                    return None
+                self._condicion.wait()
+
+    def _bucle(self):
+        while True:
+            trabajo = self._siguiente()
+            if trabajo is None:
+                return
+            self._notificar(trabajo)
+
+            try:
+                trabajo.resultado = self.funcion(trabajo)
+                trabajo.comprobar()
+                trabajo.estado = COMPLETADO
+                trabajo.progreso = 100.0
+                trabajo.mensaje = "Completado"
+            except TrabajoCancelado:
+                trabajo.estado = CANCELADO
+                trabajo.resultado = None
+                trabajo.mensaje = "Cancelado"
+            except Exception as e:
+                trabajo.estado = ERROR
+                trabajo.error = str(e)
+                trabajo.mensaje = f"Error: {e}"
+
+            trabajo.fin = time.time()
+            self._notificar(trabajo)
+
+    def cerrar(self, cancelar=True, esperar=False):
+        """
+        Detener el planificador
+
+        Args:
+            cancelar: Cancelar los trabajos pendientes y en curso
+            esperar: Esperar a que terminen los hilos
+        """
+        if cancelar:
+            self.cancelar_todos()
+        with self._condicion:
+            self._cerrado = True
+            self._condicion.notify_all()
+        if esperar:
+            for hilo in self._hilos:
+                hilo.join()
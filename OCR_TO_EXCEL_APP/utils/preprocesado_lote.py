@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Preprocesamiento por lotes de páginas del mismo tamaño
+
+Las páginas de pdf_a_imagenes comparten tamaño; en lugar de pasar cada una
+por mejorar_imagen_ocr (una conversión y una cadena de llamadas Python por
+página) se apilan en un único array contiguo (N, alto, ancho) uint8:
+- Brillo: una sola tabla (LUT) aplicada a toda la pila de una vez.
+- Contraste: las medias de todas las páginas se calculan con una reducción
+  sobre la pila; cada página recibe su LUT (una por media distinta).
+  Las tablas son las de preprocesar_imagen.tabla_mezcla: mismo resultado
+  que ImageEnhance, saturado a 0-255.
+- Umbral fijo: una sola llamada sobre toda la pila.
+- Ruido, umbral adaptativo/Otsu y enderezado son operaciones locales de
+  cada página: se reparten entre los hilos del pool de mosaicos.
+
+Las fórmulas son las del camino por página (preprocesar_imagen), así que el
+resultado es idéntico píxel a píxel al de mejorar_imagen_ocr.
+"""
+
+import cv2
+import numpy as np
+from PIL import Image
+
+try:
+    from utils.ingesta import leer_gris
+    from utils.instrumentacion import PERFILADOR_NULO
+    from utils.preprocesar_imagen import (CONFIG_MEJORA, mejorar_imagen_ocr, tabla_mezcla,
+                                          corregir_inclinacion, eliminar_sombras)
+    from utils import mosaicos
+except ImportError:
+    from ingesta import leer_gris
+    from instrumentacion import PERFILADOR_NULO
+    from preprocesar_imagen import (CONFIG_MEJORA, mejorar_imagen_ocr, tabla_mezcla,
+                                    corregir_inclinacion, eliminar_sombras)
+    import mosaicos
+
+# Páginas por pila: 8 páginas A4 a 300 DPI son unos 70 MB
+TAM_LOTE = 8
+
+def apilar(origenes):
+    """
+    Decodificar páginas del mismo tamaño en una pila contigua
+
+    Args:
+        origenes: Rutas, PIL.Image o arrays (ver ingesta.leer_gris)
+
+    Returns:
+        numpy.ndarray (N, alto, ancho) uint8
+    """
+    pila = None
+    for i, origen in enumerate(origenes):
+        gris = leer_gris(origen)
+        if pila is None:
+            pila = np.empty((len(origenes),) + gris.shape, dtype=np.uint8)
+        elif gris.shape != pila.shape[1:]:
+            raise ValueError(f"La página {i + 1} mide {gris.shape} y la pila {pila.shape[1:]}")
+        pila[i] = gris
+    if pila is None:
+        raise ValueError("No hay páginas que apilar")
+    return pila
+
+def ajustar_brillo_contraste(pila, brillo=1.0, contraste=1.5):
+    """
+    Brillo y contraste de toda la pila con tablas de consulta (en el sitio)
+
+    Equivale a preprocesar_imagen._ajustar_brillo_gris y
+    _ajustar_contraste_gris aplicadas a cada página.
+
+    Returns:
+        La misma pila
+    """
+    n = pila.shape[0]
+    plano = pila.reshape(-1, pila.shape[-1])
+
+    if brillo != 1.0:
+        cv2.LUT(plano, tabla_mezcla(brillo), dst=plano)
+
+    if contraste != 1.0:
+        # Media redondeada de cada página, como preprocesar_imagen.media_gris
+        sumas = pila.reshape(n, -1).sum(axis=1, dtype=np.int64)
+        medias = (sumas / pila[0].size + 0.5).astype(np.int64)
+        tablas = {}
+        for i, media in enumerate(medias.tolist()):
+            if media not in tablas:
+                tablas[media] = tabla_mezcla(contraste, media)
+            cv2.LUT(pila[i], tablas[media], dst=pila[i])
+
+    return pila
+
+def _procesar_pagina(pagina, denoise, umbral, deskew, bordes, sombras):
+    """Operaciones locales de una página; escribe el resultado en pagina"""
+    if denoise:
+        pagina[...] = cv2.medianBlur(pagina, 3)
+
+    if umbral == 'adaptive':
+        cv2.adaptiveThreshold(pagina, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                              cv2.THRESH_BINARY, 11, 2, dst=pagina)
+    elif umbral == 'otsu':
+        cv2.threshold(pagina, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=pagina)
+
+    resultado = pagina
+    if deskew:
+        resultado = corregir_inclinacion(resultado)
+    if bordes:
+        resultado = cv2.Canny(resultado, 50, 150)
+    if sombras:
+        resultado = eliminar_sombras(resultado)
+    if resultado is not pagina:
+        pagina[...] = resultado
+
+def preprocesar_pila(pila, config=None, perfilador=None):
+    """
+    Preprocesar una pila de páginas en gris (en el sitio)
+
+    Args:
+        pila: numpy.ndarray (N, alto, ancho) uint8 contiguo (ver apilar)
+        config: Configuración de mejorar_imagen_ocr (se ignora 'grayscale')
+        perfilador: Perfilador opcional (utils.instrumentacion)
+
+    Returns:
+        La misma pila, preprocesada
+    """
+    ajustes = dict(CONFIG_MEJORA)
+    if config:
+        ajustes.update(config)
+    perfilador = perfilador or PERFILADOR_NULO
+
+    with perfilador.etapa('preprocess.lote_contraste'):
+        ajustar_brillo_contraste(pila, ajustes['brightness'], ajustes['contrast'])
+
+    umbral = ajustes['threshold']
+    if umbral not in ('adaptive', 'otsu'):
+        # Umbral simple: operación por píxel, una llamada para toda la pila
+        with perfilador.etapa('preprocess.lote_umbral'):
+            plano = pila.reshape(-1, pila.shape[-1])
+            cv2.threshold(plano, 150, 255, cv2.THRESH_BINARY, dst=plano)
+
+    if ajustes['denoise'] or umbral in ('adaptive', 'otsu') or ajustes['deskew'] \
+            or ajustes['enhance_edges'] or ajustes['remove_shadows']:
+        with perfilador.etapa('preprocess.lote_paginas'):
+            mosaicos.mapear(
+                lambda pagina: _procesar_pagina(pagina, ajustes['denoise'], umbral,
+                                                ajustes['deskew'], ajustes['enhance_edges'],
+                                                ajustes['remove_shadows']),
+                pila)
+
+    return pila
+
+def mejorar_imagenes_ocr(origenes, config=None, tam_lote=TAM_LOTE, perfilador=None):
+    """
+    Preprocesar varias páginas por lotes (p. ej. las de pdf_a_imagenes)
+
+    Las páginas consecutivas del mismo tamaño se apilan de tam_lote en
+    tam_lote; una página de otro tamaño empieza una pila nueva. Con
+    'grayscale' desactivado se usa mejorar_imagen_ocr página a página.
+
+    Args:
+        origenes: Rutas de imagen (o PIL.Image / arrays)
+        config: Configuración de mejorar_imagen_ocr
+        tam_lote: Máximo de páginas por pila
+        perfilador: Perfilador opcional (utils.instrumentacion)
+
+    Returns:
+        Lista de PIL.Image, en el orden de origenes
+    """
+    origenes = list(origenes)
+    if config and not config.get('grayscale', True):
+        return [mejorar_imagen_ocr(origen, config, perfilador) for origen in origenes]
+
+    perfilador = perfilador or PERFILADOR_NULO
+    resultados = []
+    pendientes = []
+    forma = None
+
+    def vaciar():
+        pila = apilar(pendientes)
+        preprocesar_pila(pila, config, perfilador)
+        resultados.extend(Image.fromarray(pagina) for pagina in pila)
+        pendientes.clear()
+
+    for origen in origenes:
+        with perfilador.etapa('decode.cargar'):
+            gris = leer_gris(origen)
+        if pendientes and (gris.shape != forma or len(pendientes) >= tam_lote):
+            vaciar()
+        forma = gris.shape
+        pendientes.append(gris)
+
+    if pendientes:
+        vaciar()
+
+    return resultados
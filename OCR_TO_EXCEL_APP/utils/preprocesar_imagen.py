@@ -8,29 +8,46 @@ import numpy as np
 from PIL import Image, ImageEnhance, ImageFilter
 import os
 
-def mejorar_imagen_ocr(ruta_imagen, config=None):
+try:
+    from utils.etapas import Etapa, cadena_por_defecto
+    from utils.inclinacion import enderezar_imagen
+    from utils.tablas_regladas import detectar_tablas
+    from utils.ingesta import leer_gris, en_sitio
+    from utils import mosaicos
+except ImportError:
+    from etapas import Etapa, cadena_por_defecto
+    from inclinacion import enderezar_imagen
+    from tablas_regladas import detectar_tablas
+    from ingesta import leer_gris, en_sitio
+    import mosaicos
+
+# Configuración por defecto de mejorar_imagen_ocr (y de preprocesado_lote)
+CONFIG_MEJORA = {
+    'grayscale': True,
+    'contrast': 1.5,
+    'brightness': 1.0,
+    'denoise': True,
+    'threshold': 'adaptive',
+    'deskew': True,
+    'remove_shadows': False,
+    'enhance_edges': False
+}
+
+def mejorar_imagen_ocr(ruta_imagen, config=None, perfilador=None):
     """
     Preprocesar imagen para mejorar resultados de OCR
     
     Args:
         ruta_imagen: Ruta de la imagen a procesar
         config: Diccionario con configuración de procesamiento
+        perfilador: Perfilador opcional (utils.instrumentacion)
     
     Returns:
         PIL.Image: Imagen procesada
     """
     
     # Configuración por defecto
-    default_config = {
-        'grayscale': True,
-        'contrast': 1.5,
-        'brightness': 1.0,
-        'denoise': True,
-        'threshold': 'adaptive',
-        'deskew': True,
-        'remove_shadows': False,
-        'enhance_edges': False
-    }
+    default_config = dict(CONFIG_MEJORA)
     
     if config:
         default_config.update(config)
@@ -38,108 +55,177 @@ def mejorar_imagen_ocr(ruta_imagen, config=None):
     config = default_config
     
     try:
-        # Abrir imagen con PIL
-        img_pil = Image.open(ruta_imagen)
-        
-        # Convertir a RGB si es necesario
-        if img_pil.mode != 'RGB':
-            img_pil = img_pil.convert('RGB')
-        
-        # 1. Convertir a escala de grises si está configurado
-        if config['grayscale']:
-            img_pil = img_pil.convert('L')
-        
-        # 2. Ajustar brillo y contraste
-        enhancer = ImageEnhance.Brightness(img_pil)
-        img_pil = enhancer.enhance(config['brightness'])
-        
-        enhancer = ImageEnhance.Contrast(img_pil)
-        img_pil = enhancer.enhance(config['contrast'])
-        
-        # Convertir a OpenCV para procesamiento avanzado
-        img_cv = np.array(img_pil)
-        
-        if len(img_cv.shape) == 2:  # Si es escala de grises
-            img_cv = cv2.cvtColor(img_cv, cv2.COLOR_GRAY2BGR)
+        info = os.stat(ruta_imagen)
+        clave_origen = f"{os.path.abspath(ruta_imagen)}:{info.st_mtime_ns}:{info.st_size}"
         
-        # 3. Reducir ruido
-        if config['denoise']:
-            img_cv = cv2.medianBlur(img_cv, 3)
-        
-        # 4. Umbralización
-        gray = cv2.cvtColor(img_cv, cv2.COLOR_BGR2GRAY)
-        
-        if config['threshold'] == 'adaptive':
-            # Umbral adaptativo
-            thresh = cv2.adaptiveThreshold(
-                gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-                cv2.THRESH_BINARY, 11, 2
-            )
-        elif config['threshold'] == 'otsu':
-            # Umbral Otsu
-            _, thresh = cv2.threshold(
-                gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU
-            )
-        else:
-            # Umbral simple
-            _, thresh = cv2.threshold(gray, 150, 255, cv2.THRESH_BINARY)
-        
-        # 5. Enderezar imagen (deskew)
-        if config['deskew']:
-            thresh = corregir_inclinacion(thresh)
-        
-        # 6. Mejorar bordes
-        if config['enhance_edges']:
-            thresh = cv2.Canny(thresh, 50, 150)
-        
-        # 7. Eliminar sombras (si está habilitado)
-        if config['remove_shadows']:
-            thresh = eliminar_sombras(thresh)
-        
-        # Convertir de vuelta a PIL
-        img_procesada = Image.fromarray(thresh)
-        
-        return img_procesada
+        # Las etapas ya calculadas con los mismos ajustes se reutilizan
+        etapas = etapas_mejora(config)
+        return cadena_por_defecto().ejecutar(clave_origen, ruta_imagen, etapas, perfilador)
         
     except Exception as e:
         print(f"Error procesando imagen: {e}")
         # Devolver imagen original si hay error
         return Image.open(ruta_imagen)
 
-def corregir_inclinacion(imagen):
+def etapas_mejora(config):
     """
-    Corregir inclinación de texto en imagen
+    Construir la cadena de etapas de mejorar_imagen_ocr
     
     Args:
-        imagen: Imagen en escala de grises
+        config: Diccionario de configuración completo
     
     Returns:
-        Imagen corregida
+        Lista de Etapa
     """
-    # Encontrar contornos de texto
-    coords = np.column_stack(np.where(imagen > 0))
+    if config['grayscale']:
+        # 1. Decodificar directamente a gris (ndarray) y trabajar en el
+        #    sitio: sin ida y vuelta PIL -> BGR -> gris
+        etapas = [Etapa('cargar', _cargar_gris)]
+        
+        # 2. Ajustar brillo y contraste (mismas fórmulas que ImageEnhance)
+        etapas.append(Etapa('brillo', _ajustar_brillo_gris, factor=config['brightness']))
+        etapas.append(Etapa('contraste', _ajustar_contraste_gris, factor=config['contrast']))
+    else:
+        etapas = [Etapa('cargar', _cargar_rgb)]
+        
+        # 2. Ajustar brillo y contraste
+        etapas.append(Etapa('brillo', _ajustar_brillo, factor=config['brightness']))
+        etapas.append(Etapa('contraste', _ajustar_contraste, factor=config['contrast']))
+        
+        # Convertir a OpenCV para procesamiento avanzado
+        etapas.append(Etapa('opencv', _pil_a_opencv))
     
-    if len(coords) < 10:  # No hay suficiente texto para corregir
-        return imagen
+    # 3. Reducir ruido
+    if config['denoise']:
+        etapas.append(Etapa('denoise', _reducir_ruido))
     
-    # Calcular ángulo de inclinación
-    angle = cv2.minAreaRect(coords)[-1]
+    # 4. Umbralización
+    etapas.append(Etapa('umbral', _umbralizar, tipo=config['threshold']))
     
-    if angle < -45:
-        angle = 90 + angle
-    elif angle > 45:
-        angle = angle - 90
+    # 5. Enderezar imagen (deskew)
+    if config['deskew']:
+        etapas.append(Etapa('deskew', corregir_inclinacion))
     
-    # Rotar imagen para corregir
-    if abs(angle) > 1.0:  # Solo corregir si hay inclinación significativa
-        (h, w) = imagen.shape[:2]
-        center = (w // 2, h // 2)
-        M = cv2.getRotationMatrix2D(center, angle, 1.0)
-        imagen = cv2.warpAffine(imagen, M, (w, h),
-                               flags=cv2.INTER_CUBIC,
-                               borderMode=cv2.BORDER_REPLICATE)
+    # 6. Mejorar bordes
+    if config['enhance_edges']:
+        etapas.append(Etapa('bordes', _mejorar_bordes))
     
-    return imagen
+    # 7. Eliminar sombras (si está habilitado)
+    if config['remove_shadows']:
+        etapas.append(Etapa('sombras', eliminar_sombras))
+    
+    # Convertir de vuelta a PIL
+    etapas.append(Etapa('pil', Image.fromarray))
+    
+    return etapas
+
+def _cargar_rgb(ruta_imagen):
+    img_pil = Image.open(ruta_imagen)
+    
+    # Convertir a RGB si es necesario
+    if img_pil.mode != 'RGB':
+        img_pil = img_pil.convert('RGB')
+    
+    img_pil.load()
+    return img_pil
+
+def _cargar_gris(ruta_imagen):
+    return leer_gris(ruta_imagen)
+
+_RAMPA = np.arange(256, dtype=np.float32)
+
+def tabla_mezcla(factor, base=0):
+    """
+    Tabla (LUT) de ImageEnhance: Image.blend de una imagen uniforme de valor
+    base con la imagen, con el mismo cálculo que Pillow (float32, truncado
+    y saturado a 0-255)
+
+    Args:
+        factor: Factor de ImageEnhance
+        base: 0 para Brightness, la media redondeada para Contrast
+
+    Returns:
+        numpy.ndarray (256,) uint8
+    """
+    base = np.float32(base)
+    valores = base + np.float32(factor) * (_RAMPA - base)
+    return np.clip(valores, 0, 255).astype(np.uint8)
+
+def media_gris(gris):
+    """Media redondeada de una imagen en gris, como ImageEnhance.Contrast"""
+    return int(int(gris.sum(dtype=np.int64)) / gris.size + 0.5)
+
+def _ajustar_brillo_gris(gris, factor):
+    # ImageEnhance.Brightness: mezcla con negro -> gris * factor
+    if factor == 1.0:
+        return gris
+    destino = gris if en_sitio(gris) else None
+    return cv2.LUT(gris, tabla_mezcla(factor), dst=destino)
+
+def _ajustar_contraste_gris(gris, factor):
+    # ImageEnhance.Contrast: mezcla con la media -> media + factor * (gris - media),
+    # saturada (convertScaleAbs devolvería el valor absoluto de los negativos)
+    if factor == 1.0:
+        return gris
+    destino = gris if en_sitio(gris) else None
+    return cv2.LUT(gris, tabla_mezcla(factor, media_gris(gris)), dst=destino)
+
+def _ajustar_brillo(img_pil, factor):
+    return ImageEnhance.Brightness(img_pil).enhance(factor)
+
+def _ajustar_contraste(img_pil, factor):
+    return ImageEnhance.Contrast(img_pil).enhance(factor)
+
+def _pil_a_opencv(img_pil):
+    img_cv = np.array(img_pil)
+    
+    if len(img_cv.shape) == 2:  # Si es escala de grises
+        img_cv = cv2.cvtColor(img_cv, cv2.COLOR_GRAY2BGR)
+    
+    return img_cv
+
+def _reducir_ruido(img_cv):
+    # En imágenes grandes (p. ej. pdf_a_imagen_unica) se divide en mosaicos
+    return mosaicos.mediana(img_cv, 3)
+
+def _umbralizar(img_cv, tipo):
+    # Desde la ingesta en gris la imagen ya llega con un solo canal
+    if img_cv.ndim == 2:
+        gray = img_cv
+        destino = gray if en_sitio(gray) else None
+    else:
+        gray = cv2.cvtColor(img_cv, cv2.COLOR_BGR2GRAY)
+        destino = gray
+    
+    if tipo == 'adaptive':
+        # Umbral adaptativo
+        thresh = mosaicos.umbral_adaptativo(gray, 11, 2, en_sitio=destino is not None)
+    elif tipo == 'otsu':
+        # Umbral Otsu
+        _, thresh = cv2.threshold(
+            gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=destino
+        )
+    else:
+        # Umbral simple
+        _, thresh = cv2.threshold(gray, 150, 255, cv2.THRESH_BINARY, dst=destino)
+    
+    return thresh
+
+def _mejorar_bordes(thresh):
+    return cv2.Canny(thresh, 50, 150)
+
+def corregir_inclinacion(imagen):
+    """
+    Corregir inclinación de texto en imagen
+    
+    Args:
+        imagen: Imagen en escala de grises
+    
+    Returns:
+        Imagen corregida
+    """
+    # Solo corrige si hay inclinación significativa (> 1 grado) y fiable
+    return enderezar_imagen(imagen, umbral_grados=1.0)
 
 def eliminar_sombras(imagen):
     """
@@ -188,28 +274,26 @@ def redimensionar_imagen(imagen, ancho_max=2000, alto_max=2000):
 
 def extraer_tabla_imagen(ruta_imagen):
     """
-    Intentar extraer tabla de imagen usando detección de bordes
-    
+    Marcar las tablas regladas y sus celdas detectadas en la imagen
+
     Args:
         ruta_imagen: Ruta de la imagen
     
     Returns:
-        Lista de imágenes de celdas detectadas
+        PIL.Image: Imagen con las tablas (rojo) y las celdas (verde) dibujadas
     """
     img = cv2.imread(ruta_imagen)
     gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
     
-    # Detectar bordes
-    edges = cv2.Canny(gray, 50, 150, apertureSize=3)
-    
-    # Detectar líneas
-    lines = cv2.HoughLinesP(edges, 1, np.pi/180, 100, minLineLength=100, maxLineGap=10)
+    tablas, _ = detectar_tablas(gray)
     
-    if lines is not None:
-        # Dibujar líneas detectadas
-        for line in lines:
-            x1, y1, x2, y2 = line[0]
-            cv2.line(img, (x1, y1), (x2, y2), (0, 255, 0), 2)
+    for tabla in tablas:
+        for celda in tabla['celdas']:
+            x, y = celda['left'], celda['top']
+            cv2.rectangle(img, (x, y), (x + celda['width'], y + celda['height']), (0, 255, 0), 2)
+        cv2.rectangle(img, (tabla['left'], tabla['top']),
+                      (tabla['left'] + tabla['width'], tabla['top'] + tabla['height']),
+                      (0, 0, 255), 3)
     
     return Image.fromarray(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
 
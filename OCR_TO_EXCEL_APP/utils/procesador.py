@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Procesador de imágenes para OCR (sin dependencias de la GUI)
+"""
+
+import cv2
+import numpy as np
+from PIL import Image
+
+try:
+    from utils.etapas import Etapa, cadena_por_defecto
+    from utils.inclinacion import enderezar_imagen
+    from utils.ingesta import leer_gris, en_sitio
+    from utils.resolucion import ajustar_resolucion
+    from utils import mosaicos
+except ImportError:
+    from etapas import Etapa, cadena_por_defecto
+    from inclinacion import enderezar_imagen
+    from ingesta import leer_gris, en_sitio
+    from resolucion import ajustar_resolucion
+    import mosaicos
+
+def _a_gris(image):
+    """Convertir PIL a escala de grises OpenCV (una sola conversión)"""
+    gray = leer_gris(image)
+    # Un array gris de entrada se devuelve tal cual: copiarlo para que las
+    # etapas en el sitio no modifiquen el del llamador
+    return gray.copy() if gray is image else gray
+
+def _cargar_gris(ruta, fotograma=None):
+    """Decodificar el archivo directamente a gris (sin pasar por PIL/RGB)"""
+    return leer_gris(ruta, fotograma)
+
+# Las operaciones locales se dividen en mosaicos en imágenes grandes.
+# Las etapas por píxel escriben sobre su entrada cuando es propia (no
+# memorizada), sin reservar otra imagen completa.
+def _reducir_ruido(gray):
+    return mosaicos.mediana(gray, 3)
+
+def _ajustar_contraste(gray, alpha, beta):
+    return mosaicos.escala_abs(gray, alpha, beta, en_sitio=en_sitio(gray))
+
+def _umbralizar(gray, tipo):
+    if tipo == 'adaptive':
+        return mosaicos.umbral_adaptativo(gray, 11, 2, en_sitio=en_sitio(gray))
+    destino = gray if en_sitio(gray) else None
+    if tipo == 'otsu':
+        _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=destino)
+    else:
+        _, thresh = cv2.threshold(gray, 150, 255, cv2.THRESH_BINARY, dst=destino)
+    return thresh
+
+def _enderezar(thresh):
+    return ImageProcessor.deskew_image(thresh)
+
+class ImageProcessor:
+    """Procesador de imágenes para OCR"""
+
+    @staticmethod
+    def preprocessing_stages(config):
+        """Etapas de preprocesamiento activas según la configuración"""
+        etapas = [Etapa('gris', _a_gris)]
+
+        # Llevar el texto a la altura óptima para Tesseract (antes de las
+        # etapas costosas, que así procesan solo los píxeles necesarios)
+        if config.get('preprocessing.auto_resolution', True):
+            etapas.append(Etapa('resolucion', ajustar_resolucion))
+
+        if config.get('preprocessing.denoise', True):
+            etapas.append(Etapa('denoise', _reducir_ruido))
+
+        # Ajustar brillo y contraste
+        alpha = config.get('preprocessing.contrast', 1.5)
+        beta = config.get('preprocessing.brightness', 1.0) * 50 - 50
+        etapas.append(Etapa('contraste', _ajustar_contraste, alpha=alpha, beta=beta))
+
+        # Umbralización
+        threshold_type = config.get('preprocessing.threshold', 'adaptive')
+        etapas.append(Etapa('umbral', _umbralizar, tipo=threshold_type))
+
+        # Enderezar imagen si está configurado
+        if config.get('preprocessing.deskew', True):
+            etapas.append(Etapa('deskew', _enderezar))
+
+        return etapas
+
+    @staticmethod
+    def preprocess_image(image, config, source_key=None, perfilador=None, source_path=None,
+                         frame=None):
+        """
+        Preprocesar imagen para mejorar OCR
+
+        Con source_key (p. ej. ruta + mtime) los resultados intermedios se
+        memorizan y al cambiar un ajuste solo se recalculan las etapas
+        posteriores a él. Con perfilador se mide cada etapa calculada.
+        Con source_path la primera etapa decodifica el archivo directamente
+        a gris (image puede estar sin cargar y no se decodifica).
+        """
+        try:
+            etapas = ImageProcessor.preprocessing_stages(config)
+            origen = image
+            if source_path:
+                etapas[0] = Etapa('cargar', _cargar_gris, fotograma=frame)
+                origen = source_path
+            return cadena_por_defecto().ejecutar(source_key, origen, etapas, perfilador)
+
+        except Exception as e:
+            print(f"Error en preprocesamiento: {e}")
+            return np.array(image.convert('L'))
+
+    @staticmethod
+    def deskew_image(image):
+        """Enderezar imagen inclinada"""
+        try:
+            # Estimador por perfiles de proyección sobre una versión reducida
+            return enderezar_imagen(image)
+
+        except:
+            return image
+
+    @staticmethod
+    def resize_for_display(image, max_width=800, max_height=600):
+        """Redimensionar imagen para visualización"""
+        width, height = image.size
+
+        if width > max_width or height > max_height:
+            ratio = min(max_width/width, max_height/height)
+            new_width = int(width * ratio)
+            new_height = int(height * ratio)
+            return image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+
+        return image
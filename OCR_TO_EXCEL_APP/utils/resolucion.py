@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Elección de la resolución de OCR a partir del tamaño medido del texto
+
+Tesseract acierta más cuando la altura de las minúsculas está entre unos
+20 y 40 píxeles: por debajo pierde detalle y por encima solo procesa más
+píxeles. La altura se estima con componentes conexas sobre una miniatura
+(milisegundos) y con ella se elige:
+- Imágenes (fotos, escaneos): el factor de escala antes del preprocesado.
+- PDF: los DPI de renderizado, a partir de una página renderizada a baja
+  resolución.
+"""
+
+import os
+import math
+
+import cv2
+import numpy as np
+
+# Altura mediana de los caracteres (≈ altura de las minúsculas) buscada
+ALTURA_OBJETIVO = 28
+# Dentro de este rango no se reescala
+RANGO_OPTIMO = (20, 40)
+
+ESCALA_MIN = 0.25
+ESCALA_MAX = 4.0
+# Píxeles máximos de la imagen ampliada (unos 40 MB en gris): una foto
+# grande con texto pequeño no se amplía hasta agotar la memoria
+MAX_PIXELES = 40_000_000
+
+# Lado mayor de la miniatura de medición
+LADO_MINIATURA = 1600
+# Por debajo de esta altura en la miniatura se mide sobre un recorte central
+# a resolución completa (los caracteres pequeños se funden al reducir)
+ALTURA_MIN_MINIATURA = 6
+MIN_COMPONENTES = 30
+
+# Renderizado de PDF
+DPI_SONDA = 100
+DPI_MIN = 150
+DPI_MAX = 600
+DPI_PASO = 25
+
+def _alturas_componentes(gris):
+    """Alturas de las componentes conexas con aspecto de carácter"""
+    # Tinta oscura sobre fondo claro -> primer plano blanco
+    _, binaria = cv2.threshold(gris, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    n, _, stats, _ = cv2.connectedComponentsWithStats(binaria, connectivity=8)
+
+    anchos = stats[1:, cv2.CC_STAT_WIDTH]
+    altos = stats[1:, cv2.CC_STAT_HEIGHT]
+    areas = stats[1:, cv2.CC_STAT_AREA]
+
+    # Fuera: motas, líneas de tabla, imágenes y bloques rellenos
+    validas = ((areas >= 4) & (altos >= 2) &
+               (altos <= gris.shape[0] // 8) &
+               (anchos <= 20 * altos) & (altos <= 15 * anchos) &
+               (areas < 0.9 * anchos * altos))
+    return altos[validas]
+
+def estimar_altura_texto(gris, lado_miniatura=LADO_MINIATURA):
+    """
+    Estimar la altura típica del texto de una imagen
+
+    Args:
+        gris: numpy.ndarray uint8 en escala de grises
+        lado_miniatura: Lado mayor de la imagen de medición
+
+    Returns:
+        Dict con 'altura' (píxeles de la imagen original) y 'componentes',
+        o None si no hay texto suficiente para medir
+    """
+    alto, ancho = gris.shape[:2]
+    factor = min(1.0, lado_miniatura / max(alto, ancho, 1))
+
+    if factor < 1.0:
+        miniatura = cv2.resize(gris, (max(1, round(ancho * factor)), max(1, round(alto * factor))),
+                               interpolation=cv2.INTER_AREA)
+    else:
+        miniatura = gris
+    alturas = _alturas_componentes(miniatura)
+
+    if factor < 1.0 and (len(alturas) < MIN_COMPONENTES or
+                         np.median(alturas) < ALTURA_MIN_MINIATURA):
+        # Texto pequeño: recorte central sin reducir
+        y0 = max(0, (alto - lado_miniatura) // 2)
+        x0 = max(0, (ancho - lado_miniatura) // 2)
+        alturas = _alturas_componentes(gris[y0:y0 + lado_miniatura, x0:x0 + lado_miniatura])
+        factor = 1.0
+
+    if len(alturas) < MIN_COMPONENTES:
+        return None
+
+    return {'altura': float(np.median(alturas)) / factor, 'componentes': int(len(alturas))}
+
+def escala_para_altura(altura, objetivo=ALTURA_OBJETIVO, rango=RANGO_OPTIMO,
+                       minima=ESCALA_MIN, maxima=ESCALA_MAX):
+    """
+    Factor de escala que lleva una altura de texto al rango óptimo
+
+    Returns:
+        float (1.0 si ya está dentro del rango)
+    """
+    if rango[0] <= altura <= rango[1]:
+        return 1.0
+    return min(max(objetivo / altura, minima), maxima)
+
+def ajustar_resolucion(gris, etiqueta=None):
+    """
+    Reescalar una imagen en gris para que el texto tenga la altura óptima
+
+    La ampliación se limita para no pasar de MAX_PIXELES.
+
+    Args:
+        gris: numpy.ndarray uint8
+        etiqueta: Nombre para el registro (p. ej. el archivo)
+
+    Returns:
+        La imagen reescalada (o la misma si no hace falta)
+    """
+    medida = estimar_altura_texto(gris)
+    nombre = f" de {etiqueta}" if etiqueta else ""
+    if medida is None:
+        print(f"Resolución{nombre}: sin texto medible, se mantiene el tamaño")
+        return gris
+
+    alto, ancho = gris.shape[:2]
+    escala = escala_para_altura(medida['altura'])
+    if escala > 1.0:
+        escala = max(1.0, min(escala, math.sqrt(MAX_PIXELES / (alto * ancho))))
+    print(f"Resolución{nombre}: texto de {medida['altura']:.1f} px "
+          f"({medida['componentes']} componentes), escala {escala:.2f}")
+    if escala == 1.0:
+        return gris
+
+    # Reducir promediando; ampliar con interpolación cúbica
+    interpolacion = cv2.INTER_AREA if escala < 1 else cv2.INTER_CUBIC
+    return cv2.resize(gris, (max(1, round(ancho * escala)), max(1, round(alto * escala))),
+                      interpolation=interpolacion)
+
+def dpi_para_pdf(ruta_pdf, pagina=1, dpi_defecto=300, dpi_sonda=DPI_SONDA,
+                 dpi_min=DPI_MIN, dpi_max=DPI_MAX):
+    """
+    Elegir los DPI de renderizado de un PDF por la altura de su texto
+
+    Se renderiza una página a dpi_sonda en gris, se mide el texto y se
+    calcula la resolución que lo deja a la altura objetivo.
+
+    Args:
+        ruta_pdf: Ruta del PDF
+        pagina: Página de muestra (1-indexed)
+        dpi_defecto: DPI si no se puede medir (página sin texto)
+
+    Returns:
+        int: DPI, múltiplo de DPI_PASO entre dpi_min y dpi_max
+    """
+    from pdf2image import convert_from_path
+
+    nombre = os.path.basename(ruta_pdf)
+    try:
+        muestra = convert_from_path(ruta_pdf, dpi=dpi_sonda, first_page=pagina,
+                                    last_page=pagina, grayscale=True, thread_count=1)
+    except Exception as e:
+        print(f"Resolución de {nombre}: no se pudo renderizar la muestra ({e}), {dpi_defecto} DPI")
+        return dpi_defecto
+
+    if not muestra:
+        return dpi_defecto
+    with muestra[0] as imagen:
+        medida = estimar_altura_texto(np.asarray(imagen))
+
+    if medida is None:
+        print(f"Resolución de {nombre}: sin texto medible en la página {pagina}, "
+              f"{dpi_defecto} DPI")
+        return dpi_defecto
+
+    altura = medida['altura']
+    if RANGO_OPTIMO[0] <= altura * dpi_defecto / dpi_sonda <= RANGO_OPTIMO[1]:
+        dpi = dpi_defecto
+    else:
+        dpi = dpi_sonda * ALTURA_OBJETIVO / altura
+        dpi = min(max(DPI_PASO * math.floor(dpi / DPI_PASO + 0.5), dpi_min), dpi_max)
+    print(f"Resolución de {nombre}: texto de {altura:.1f} px a {dpi_sonda} DPI "
+          f"({medida['componentes']} componentes), se renderiza a {dpi} DPI")
+    return int(dpi)
+
+def resolver_dpi(ruta_pdf, dpi, pagina=1):
+    """
+    DPI numéricos a partir de un valor que puede ser 'auto'
+
+    Returns:
+        int
+    """
+    if isinstance(dpi, str) and dpi.strip().lower() == 'auto':
+        return dpi_para_pdf(ruta_pdf, pagina)
+    return int(dpi)
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Reconstrucción de tablas a partir de las cajas de palabras de Tesseract
+
+En lugar de adivinar un separador en la primera línea del texto, usa la
+posición de cada palabra (image_to_data / TSV, obtenido en la misma pasada
+de OCR): las filas se agrupan por el centro vertical y los límites de
+columna salen de los huecos horizontales que no cubre ninguna palabra en
+(casi) ninguna fila. Todo el agrupamiento es vectorizado con NumPy.
+"""
+
+import numpy as np
+
+def _filas_por_altura(centros_y, tolerancia):
+    """
+    Asignar un número de fila a cada palabra según su centro vertical
+
+    Returns:
+        ndarray con el índice de fila de cada palabra (0..n_filas-1)
+    """
+    orden = np.argsort(centros_y, kind='stable')
+    saltos = np.diff(centros_y[orden]) > tolerancia
+    filas_ordenadas = np.concatenate(([0], np.cumsum(saltos)))
+    filas = np.empty_like(filas_ordenadas)
+    filas[orden] = filas_ordenadas
+    return filas
+
+def _cortes_columnas(izquierdas, derechas, n_filas, min_hueco, max_cobertura):
+    """
+    Calcular las coordenadas x que separan columnas
+
+    Args:
+        izquierdas, derechas: Extremos horizontales de cada palabra
+        n_filas: Número de filas detectadas
+        min_hueco: Ancho mínimo (px) de un hueco entre columnas
+        max_cobertura: Proporción de filas que puede invadir un hueco
+            (títulos o celdas que abarcan varias columnas)
+
+    Returns:
+        ndarray con la x central de cada hueco, ordenada
+    """
+    origen = int(izquierdas.min())
+    ancho = int(derechas.max()) - origen + 2
+
+    # Cobertura por columna de píxeles: +1 al entrar en una palabra, -1 al salir
+    deltas = np.zeros(ancho, dtype=np.int32)
+    np.add.at(deltas, izquierdas - origen, 1)
+    np.add.at(deltas, derechas - origen + 1, -1)
+    cobertura = np.cumsum(deltas)[:-1]
+
+    libre = cobertura <= int(max_cobertura * n_filas)
+    if not libre.any():
+        return np.empty(0)
+
+    # Tramos consecutivos de píxeles libres
+    cambios = np.diff(libre.astype(np.int8))
+    inicios = np.flatnonzero(cambios == 1) + 1
+    finales = np.flatnonzero(cambios == -1) + 1
+    if libre[0]:
+        inicios = np.concatenate(([0], inicios))
+    if libre[-1]:
+        finales = np.concatenate((finales, [len(libre)]))
+
+    anchos = finales - inicios
+    # Los tramos de los bordes no separan nada
+    interiores = (inicios > 0) & (finales < len(libre)) & (anchos >= min_hueco)
+    return origen + (inicios[interiores] + finales[interiores]) / 2.0
+
+def reconstruir_tabla(palabras, min_hueco=None, max_cobertura=0.05):
+    """
+    Construir la rejilla de celdas a partir de las palabras reconocidas
+
+    Args:
+        palabras: Lista de dicts con 'texto', 'conf', 'left', 'top', 'width'
+            y 'height' (backend_ocr.palabras_desde_tsv o capa de texto PDF)
+        min_hueco: Ancho mínimo de hueco entre columnas en píxeles (por
+            defecto, la altura mediana de las palabras: mayor que el espacio
+            entre palabras de una misma celda)
+        max_cobertura: Proporción de filas que puede cruzar un hueco de
+            columna sin anularlo
+
+    Returns:
+        Dict con 'cortes' (x de separación entre columnas) y 'celdas': lista
+        de filas, cada una con n_columnas elementos None o dict con 'texto',
+        'conf' (media), 'left', 'top', 'width' y 'height'
+    """
+    palabras = [p for p in palabras if p.get('texto', '').strip()]
+    if not palabras:
+        return {'cortes': [], 'celdas': []}
+
+    izquierdas = np.fromiter((p['left'] for p in palabras), dtype=np.int64, count=len(palabras))
+    arribas = np.fromiter((p['top'] for p in palabras), dtype=np.int64, count=len(palabras))
+    anchos = np.fromiter((p['width'] for p in palabras), dtype=np.int64, count=len(palabras))
+    altos = np.fromiter((p['height'] for p in palabras), dtype=np.int64, count=len(palabras))
+    confs = np.fromiter((p.get('conf', -1) for p in palabras), dtype=np.float64, count=len(palabras))
+
+    derechas = izquierdas + np.maximum(anchos, 1) - 1
+    abajos = arribas + np.maximum(altos, 1)
+    alto_tipico = max(1.0, float(np.median(altos)))
+
+    filas = _filas_por_altura(arribas + altos / 2.0, alto_tipico * 0.5)
+    n_filas = int(filas.max()) + 1
+
+    if min_hueco is None:
+        min_hueco = alto_tipico
+    cortes = _cortes_columnas(izquierdas, derechas, n_filas, min_hueco, max_cobertura)
+    columnas = np.searchsorted(cortes, (izquierdas + derechas) / 2.0)
+    n_columnas = len(cortes) + 1
+
+    # Ordenar por fila, columna y x para unir las palabras de cada celda
+    orden = np.lexsort((izquierdas, columnas, filas))
+    celda_id = filas[orden] * n_columnas + columnas[orden]
+    limites = np.flatnonzero(np.diff(celda_id)) + 1
+    grupos = np.split(orden, limites)
+
+    celdas = [[None] * n_columnas for _ in range(n_filas)]
+    for grupo in grupos:
+        fila = int(filas[grupo[0]])
+        columna = int(columnas[grupo[0]])
+        x0 = int(izquierdas[grupo].min())
+        y0 = int(arribas[grupo].min())
+        validas = confs[grupo][confs[grupo] >= 0]
+        celdas[fila][columna] = {
+            'texto': ' '.join(palabras[i]['texto'] for i in grupo),
+            'conf': float(validas.mean()) if len(validas) else -1.0,
+            'left': x0,
+            'top': y0,
+            'width': int(derechas[grupo].max()) - x0 + 1,
+            'height': int(abajos[grupo].max()) - y0,
+        }
+
+    # Quitar filas vacías (no debería haber, pero por seguridad)
+    celdas = [fila for fila in celdas if any(celda is not None for celda in fila)]
+
+    return {'cortes': cortes.tolist(), 'celdas': celdas}
+
+def separar_encabezados(tabla):
+    """
+    Separar una tabla reconstruida en encabezados, filas de texto y celdas
+
+    Mismo formato que texto_a_tabla: con una sola columna se devuelve
+    "Texto Extraído" y una fila por línea.
+
+    Args:
+        tabla: Dict devuelto por reconstruir_tabla
+
+    Returns:
+        Tupla (encabezados, filas, celdas) donde celdas son las celdas
+        (dicts o None) de las filas de datos, alineadas con filas
+    """
+    celdas = tabla['celdas']
+
+    if not celdas:
+        return [], [], []
+
+    filas = [[celda['texto'] if celda else '' for celda in fila] for fila in celdas]
+
+    if len(tabla['cortes']) == 0:
+        return ["Texto Extraído"], filas, celdas
+
+    encabezados = [texto or f"Columna {i + 1}" for i, texto in enumerate(filas[0])]
+    return encabezados, filas[1:], celdas[1:]
+
+def tabla_desde_palabras(palabras, min_hueco=None, max_cobertura=0.05):
+    """
+    Convertir las palabras reconocidas en encabezados y filas de texto
+
+    Returns:
+        Tupla (encabezados, filas)
+    """
+    encabezados, filas, _ = separar_encabezados(
+        reconstruir_tabla(palabras, min_hueco, max_cobertura))
+    return encabezados, filas
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Tabla virtualizada sobre ttk.Treeview
+
+El Treeview solo contiene tantos ítems como filas caben en pantalla; al
+desplazarse se reescriben sus valores con la ventana visible de los datos.
+Mostrar o desplazarse por 50.000 filas cuesta lo mismo que por 50.
+"""
+
+import tkinter as tk
+from tkinter import ttk
+
+class TablaVirtual(ttk.Frame):
+    """Treeview que renderiza solo las filas visibles de unos datos externos"""
+
+    def __init__(self, parent, ancho_columna=150):
+        """
+        Args:
+            parent: Widget contenedor
+            ancho_columna: Ancho inicial de cada columna en píxeles
+        """
+        super().__init__(parent)
+        self.ancho_columna = ancho_columna
+        self.encabezados = []
+        self.filas = []
+        self.inicio = 0
+        self.visibles = 1
+
+        # Scrollbars (la vertical la gestiona la tabla, no el Treeview)
+        self.v_scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._desplazar)
+        h_scrollbar = ttk.Scrollbar(self, orient=tk.HORIZONTAL)
+
+        self.tree = ttk.Treeview(self,
+                                 xscrollcommand=h_scrollbar.set,
+                                 selectmode='extended',
+                                 show='headings')
+        h_scrollbar.config(command=self.tree.xview)
+
+        self.tree.grid(row=0, column=0, sticky=tk.NSEW)
+        self.v_scrollbar.grid(row=0, column=1, sticky=tk.NS)
+        h_scrollbar.grid(row=1, column=0, sticky=tk.EW)
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+
+        self.tree.bind('<Configure>', self._al_redimensionar)
+        self.tree.bind('<MouseWheel>', self._rueda)
+        self.tree.bind('<Button-4>', lambda e: self._mover(-3))
+        self.tree.bind('<Button-5>', lambda e: self._mover(3))
+        self.tree.bind('<Up>', lambda e: self._tecla(-1))
+        self.tree.bind('<Down>', lambda e: self._tecla(1))
+        self.tree.bind('<Prior>', lambda e: self._mover(-self.visibles))
+        self.tree.bind('<Next>', lambda e: self._mover(self.visibles))
+        self.tree.bind('<Control-Home>', lambda e: self._ir_a(0))
+        self.tree.bind('<Control-End>', lambda e: self._ir_a(len(self.filas)))
+
+    def _alto_fila(self):
+        """Alto de fila del estilo actual del Treeview"""
+        try:
+            alto = int(ttk.Style().lookup('Treeview', 'rowheight') or 0)
+        except (tk.TclError, ValueError):
+            alto = 0
+        return alto or 20
+
+    def mostrar(self, encabezados, filas):
+        """
+        Mostrar unos datos (no se copian)
+
+        Args:
+            encabezados: Lista de nombres de columna
+            filas: Secuencia de filas (len() y [i]); cada fila es una lista
+                que puede tener menos columnas que encabezados
+        """
+        self.encabezados = list(encabezados)
+        self.filas = filas
+        self.inicio = 0
+
+        self.tree.delete(*self.tree.get_children())
+        self.tree['columns'] = []
+
+        if self.encabezados and len(self.filas):
+            self.tree['columns'] = self.encabezados
+            for header in self.encabezados:
+                self.tree.heading(header, text=header)
+                self.tree.column(header, width=self.ancho_columna, anchor='w', stretch=True)
+
+        self._renderizar()
+
+    def _valores(self, indice):
+        fila = list(self.filas[indice])
+        return fila + [''] * (len(self.encabezados) - len(fila))
+
+    def _renderizar(self):
+        """Reescribir los ítems visibles con la ventana actual de datos"""
+        total = len(self.filas) if self.encabezados else 0
+        self.inicio = max(0, min(self.inicio, total - self.visibles))
+        necesarios = min(self.visibles, total - self.inicio)
+
+        items = self.tree.get_children()
+        if len(items) > necesarios:
+            self.tree.delete(*items[necesarios:])
+            items = items[:necesarios]
+        for _ in range(necesarios - len(items)):
+            self.tree.insert('', 'end')
+        items = self.tree.get_children()
+
+        for i, item in enumerate(items):
+            self.tree.item(item, values=self._valores(self.inicio + i))
+
+        if total:
+            self.v_scrollbar.set(self.inicio / total, (self.inicio + necesarios) / total)
+        else:
+            self.v_scrollbar.set(0, 1)
+
+    def _al_redimensionar(self, event):
+        # Filas que caben debajo de los encabezados
+        visibles = max(1, event.height // self._alto_fila() - 1)
+        if visibles != self.visibles:
+            self.visibles = visibles
+            self._renderizar()
+
+    def _ir_a(self, inicio):
+        self.inicio = inicio
+        self._renderizar()
+        return 'break'
+
+    def _mover(self, filas):
+        return self._ir_a(self.inicio + filas)
+
+    def _desplazar(self, accion, cantidad, unidad=None):
+        """Comando de la scrollbar vertical ('moveto' o 'scroll')"""
+        if accion == 'moveto':
+            self._ir_a(int(float(cantidad) * len(self.filas)))
+        elif accion == 'scroll':
+            paso = self.visibles if unidad == 'pages' else 1
+            self._mover(int(cantidad) * paso)
+
+    def _rueda(self, event):
+        return self._mover(-3 if event.delta > 0 else 3)
+
+    def _tecla(self, paso):
+        """Mover la selección con las flechas desplazando en los bordes"""
+        items = self.tree.get_children()
+        seleccion = self.tree.focus()
+        if not items or not seleccion:
+            return None
+
+        posicion = self.tree.index(seleccion) + paso
+        if 0 <= posicion < len(items):
+            return None  # comportamiento normal del Treeview
+
+        self._mover(paso)
+        destino = items[0] if paso < 0 else items[-1]
+        self.tree.focus(destino)
+        self.tree.selection_set(destino)
+        return 'break'
+
+    def indice_fila(self, item):
+        """Índice en los datos de un ítem visible del Treeview"""
+        return self.inicio + self.tree.index(item)
+
+    def actualizar_fila(self, indice):
+        """Volver a pintar una fila de datos si está visible"""
+        posicion = indice - self.inicio
+        items = self.tree.get_children()
+        if 0 <= posicion < len(items):
+            self.tree.item(items[posicion], values=self._valores(indice))
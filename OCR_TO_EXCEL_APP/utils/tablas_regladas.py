@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+Reconocimiento de tablas regladas (con líneas) por celdas
+
+1. Las reglas horizontales y verticales se extraen con apertura morfológica.
+2. Con sus posiciones se construye la rejilla; si falta el tramo de línea
+   entre dos celdas vecinas, se fusionan (celdas combinadas).
+3. Los recortes de todas las celdas se apilan en una o pocas imágenes
+   compuestas con desplazamientos conocidos, de modo que una tabla entera
+   se reconoce con un puñado de llamadas a Tesseract en lugar de una por
+   celda. Cada palabra vuelve a su celda por su posición vertical.
+"""
+
+import cv2
+import numpy as np
+from PIL import Image
+
+try:
+    from utils.backend_ocr import obtener_backend
+    from utils import mosaicos
+except ImportError:
+    from backend_ocr import obtener_backend
+    import mosaicos
+
+def _a_gris(imagen):
+    """PIL.Image o ndarray -> ndarray uint8 en escala de grises"""
+    if isinstance(imagen, Image.Image):
+        return np.asarray(imagen.convert('L'))
+    if imagen.ndim == 3:
+        return cv2.cvtColor(imagen, cv2.COLOR_BGR2GRAY)
+    return imagen
+
+def extraer_reglas(tinta, proporcion=40):
+    """
+    Separar las líneas horizontales y verticales de una imagen de tinta
+
+    Args:
+        tinta: Imagen binaria con la tinta a 255 (texto y líneas)
+        proporcion: El elemento estructurante mide 1/proporcion del lado;
+            solo sobreviven trazos más largos que eso (no letras)
+
+    Returns:
+        Tupla (horizontales, verticales) de imágenes binarias
+    """
+    alto, ancho = tinta.shape[:2]
+    largo_h = max(10, ancho // proporcion)
+    largo_v = max(10, alto // proporcion)
+
+    horizontales = cv2.morphologyEx(tinta, cv2.MORPH_OPEN,
+                                    cv2.getStructuringElement(cv2.MORPH_RECT, (largo_h, 1)))
+    verticales = cv2.morphologyEx(tinta, cv2.MORPH_OPEN,
+                                  cv2.getStructuringElement(cv2.MORPH_RECT, (1, largo_v)))
+    return horizontales, verticales
+
+def _posiciones(perfil, minimo, tolerancia=3):
+    """
+    Centros de los tramos de un perfil de proyección que superan 'minimo'
+
+    Tramos separados por menos de 'tolerancia' píxeles se unen (líneas
+    gruesas o ligeramente torcidas).
+    """
+    indices = np.flatnonzero(perfil >= minimo)
+    if len(indices) == 0:
+        return np.empty(0, dtype=np.int64)
+
+    cortes = np.flatnonzero(np.diff(indices) > tolerancia) + 1
+    inicios = indices[np.concatenate(([0], cortes))]
+    finales = indices[np.concatenate((cortes - 1, [len(indices) - 1]))]
+    return ((inicios + finales) // 2).astype(np.int64)
+
+def _completar_bordes(posiciones, largo, tolerancia):
+    """Añadir los bordes de la tabla si falta la línea exterior"""
+    if len(posiciones) == 0:
+        return np.array([0, largo - 1])
+    if posiciones[0] > tolerancia:
+        posiciones = np.concatenate(([0], posiciones))
+    if largo - 1 - posiciones[-1] > tolerancia:
+        posiciones = np.concatenate((posiciones, [largo - 1]))
+    return posiciones
+
+def _cobertura_tramos(mascara, posicion, inicios, finales, grosor):
+    """
+    Proporción de cada tramo [inicio, fin) cubierta por una línea
+
+    Args:
+        mascara: Banda de líneas ya orientada (filas = dirección del tramo)
+        posicion: Coordenada de la línea en la otra dirección
+        inicios, finales: Extremos de los tramos a comprobar
+        grosor: Píxeles a cada lado de 'posicion' que cuentan como línea
+
+    Returns:
+        ndarray con la cobertura de cada tramo en [0, 1]
+    """
+    banda = mascara[:, max(0, posicion - grosor):posicion + grosor + 1].any(axis=1)
+    acumulado = np.concatenate(([0], np.cumsum(banda)))
+    largos = np.maximum(finales - inicios, 1)
+    return (acumulado[finales] - acumulado[inicios]) / largos
+
+def _raiz(padres, i):
+    while padres[i] != i:
+        padres[i] = padres[padres[i]]
+        i = padres[i]
+    return i
+
+def construir_rejilla(horizontales, verticales, min_cobertura=0.6, grosor=3):
+    """
+    Construir la rejilla de celdas (con celdas combinadas) de una tabla
+
+    Args:
+        horizontales, verticales: Líneas de la región de la tabla
+        min_cobertura: Proporción mínima del tramo cubierta por línea para
+            considerar que dos celdas vecinas están separadas
+        grosor: Tolerancia en píxeles alrededor de cada línea
+
+    Returns:
+        Dict con 'ys', 'xs' (posiciones de líneas) y 'celdas': lista de
+        dicts con 'fila', 'columna', 'filas_ocupadas', 'columnas_ocupadas',
+        'left', 'top', 'width', 'height' (relativos a la región), o None si
+        no hay al menos una celda
+    """
+    alto, ancho = horizontales.shape[:2]
+
+    ys = _posiciones((horizontales > 0).sum(axis=1), max(10, ancho // 10))
+    xs = _posiciones((verticales > 0).sum(axis=0), max(10, alto // 10))
+    ys = _completar_bordes(ys, alto, grosor * 3)
+    xs = _completar_bordes(xs, ancho, grosor * 3)
+
+    n_filas = len(ys) - 1
+    n_columnas = len(xs) - 1
+    if n_filas < 1 or n_columnas < 1:
+        return None
+
+    # Los tramos se miden dejando fuera las esquinas (cruces de líneas)
+    margen = grosor + 1
+    y_ini = np.minimum(ys[:-1] + margen, ys[1:])
+    y_fin = np.maximum(ys[1:] - margen, y_ini)
+    x_ini = np.minimum(xs[:-1] + margen, xs[1:])
+    x_fin = np.maximum(xs[1:] - margen, x_ini)
+
+    # Paredes verticales interiores: (n_filas, n_columnas - 1)
+    paredes_v = np.ones((n_filas, max(n_columnas - 1, 0)), dtype=bool)
+    for c in range(1, n_columnas):
+        paredes_v[:, c - 1] = _cobertura_tramos(verticales, int(xs[c]), y_ini, y_fin,
+                                                grosor) >= min_cobertura
+
+    # Paredes horizontales interiores: (n_filas - 1, n_columnas)
+    paredes_h = np.ones((max(n_filas - 1, 0), n_columnas), dtype=bool)
+    traspuesta = horizontales.T
+    for r in range(1, n_filas):
+        paredes_h[r - 1, :] = _cobertura_tramos(traspuesta, int(ys[r]), x_ini, x_fin,
+                                                grosor) >= min_cobertura
+
+    # Unir celdas vecinas sin línea entre ellas (union-find)
+    padres = list(range(n_filas * n_columnas))
+    for r, c in zip(*np.nonzero(~paredes_v)):
+        a, b = _raiz(padres, r * n_columnas + c), _raiz(padres, r * n_columnas + c + 1)
+        padres[b] = a
+    for r, c in zip(*np.nonzero(~paredes_h)):
+        a, b = _raiz(padres, r * n_columnas + c), _raiz(padres, (r + 1) * n_columnas + c)
+        padres[b] = a
+
+    grupos = {}
+    for indice in range(n_filas * n_columnas):
+        r, c = divmod(indice, n_columnas)
+        raiz = _raiz(padres, indice)
+        r0, c0, r1, c1 = grupos.get(raiz, (r, c, r, c))
+        grupos[raiz] = (min(r0, r), min(c0, c), max(r1, r), max(c1, c))
+
+    celdas = []
+    for r0, c0, r1, c1 in sorted(grupos.values()):
+        celdas.append({
+            'fila': int(r0),
+            'columna': int(c0),
+            'filas_ocupadas': int(r1 - r0 + 1),
+            'columnas_ocupadas': int(c1 - c0 + 1),
+            'left': int(xs[c0]),
+            'top': int(ys[r0]),
+            'width': int(xs[c1 + 1] - xs[c0]),
+            'height': int(ys[r1 + 1] - ys[r0]),
+        })
+
+    return {'ys': ys.tolist(), 'xs': xs.tolist(), 'celdas': celdas}
+
+def detectar_tablas(imagen, min_lado=60, proporcion=40):
+    """
+    Localizar las tablas regladas de una página y construir sus rejillas
+
+    Args:
+        imagen: PIL.Image o ndarray (escala de grises o BGR), ya enderezada
+        min_lado: Ancho/alto mínimo de una tabla en píxeles
+        proporcion: Ver extraer_reglas
+
+    Returns:
+        Tupla (tablas, sin_reglas): lista de dicts con 'left', 'top',
+        'width', 'height', 'filas', 'columnas' y 'celdas' (coordenadas de
+        página) e imagen en grises con las reglas borradas (para OCR)
+    """
+    gris = _a_gris(imagen)
+    tinta = cv2.bitwise_not(mosaicos.umbral_adaptativo(gris, 15, 10))
+    horizontales, verticales = extraer_reglas(tinta, proporcion)
+    del tinta
+
+    # Cada componente conexo de la unión de reglas es una tabla candidata
+    reglas = cv2.dilate(cv2.bitwise_or(horizontales, verticales),
+                        cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3)))
+    n, _, estadisticas, _ = cv2.connectedComponentsWithStats(reglas, connectivity=8)
+
+    tablas = []
+    for i in range(1, n):
+        x, y, w, h = (int(v) for v in estadisticas[i, :4])
+        if w < min_lado or h < min_lado:
+            continue
+
+        rejilla = construir_rejilla(horizontales[y:y + h, x:x + w], verticales[y:y + h, x:x + w])
+        if rejilla is None or len(rejilla['celdas']) < 2:
+            continue
+
+        for celda in rejilla['celdas']:
+            celda['left'] += x
+            celda['top'] += y
+
+        tablas.append({
+            'left': x, 'top': y, 'width': w, 'height': h,
+            'filas': len(rejilla['ys']) - 1,
+            'columnas': len(rejilla['xs']) - 1,
+            'celdas': rejilla['celdas'],
+        })
+
+    tablas.sort(key=lambda t: (t['top'], t['left']))
+
+    # Borrar las reglas para que Tesseract no las lea como '|' o '_'
+    sin_reglas = gris.copy()
+    sin_reglas[reglas > 0] = 255
+
+    return tablas, sin_reglas
+
+def componer_celdas(gris, celdas, separacion=24, recorte=2, max_alto=4000, min_tinta=0.002):
+    """
+    Apilar los recortes de las celdas en imágenes compuestas
+
+    Cada recorte ocupa su propia franja horizontal, separada por
+    'separacion' píxeles en blanco, así que Tesseract no mezcla líneas de
+    celdas distintas y cada palabra se devuelve a su celda por su 'top'.
+
+    Args:
+        gris: Página en grises con las reglas borradas
+        celdas: Celdas con 'left', 'top', 'width', 'height'
+        separacion: Blanco entre franjas y alrededor de cada recorte
+        recorte: Píxeles que se quitan de cada borde de la celda
+        max_alto: Alto máximo de cada imagen compuesta
+        min_tinta: Proporción de tinta por debajo de la cual la celda se
+            considera vacía y no se reconoce
+
+    Returns:
+        Lista de tuplas (lienzo, colocaciones) con colocaciones = lista de
+        (indice_celda, y_inicio, y_fin) en el lienzo
+    """
+    recortes = []
+    for indice, celda in enumerate(celdas):
+        y0 = celda['top'] + recorte
+        x0 = celda['left'] + recorte
+        zona = gris[y0:celda['top'] + celda['height'] - recorte,
+                    x0:celda['left'] + celda['width'] - recorte]
+        if zona.size == 0:
+            continue
+
+        tinta = zona < 128
+        if tinta.mean() < min_tinta:
+            continue
+
+        # Ajustar a la tinta: lienzos más pequeños, OCR más rápido
+        bx, by, bw, bh = cv2.boundingRect(tinta.astype(np.uint8))
+        recortes.append((indice, zona[max(0, by - 2):by + bh + 2, max(0, bx - 2):bx + bw + 2]))
+
+    lienzos = []
+    lote = []
+    alto = separacion
+
+    def cerrar_lote():
+        if not lote:
+            return
+        ancho = max(r.shape[1] for _, r in lote) + 2 * separacion
+        lienzo = np.full((alto, ancho), 255, dtype=np.uint8)
+        colocaciones = []
+        y = separacion
+        for indice, recorte_celda in lote:
+            h, w = recorte_celda.shape
+            lienzo[y:y + h, separacion:separacion + w] = recorte_celda
+            colocaciones.append((indice, y, y + h))
+            y += h + separacion
+        lienzos.append((lienzo, colocaciones))
+
+    for indice, recorte_celda in recortes:
+        h = recorte_celda.shape[0]
+        if lote and alto + h + separacion > max_alto:
+            cerrar_lote()
+            lote = []
+            alto = separacion
+        lote.append((indice, recorte_celda))
+        alto += h + separacion
+
+    cerrar_lote()
+    return lienzos
+
+def reconocer_celdas(lienzos, backend, idioma='eng', psm='6', oem='3'):
+    """
+    Reconocer las imágenes compuestas y repartir las palabras por celda
+
+    Returns:
+        Dict indice_celda -> (texto, confianza media)
+    """
+    palabras_celda = {}
+
+    for lienzo, colocaciones in lienzos:
+        resultado = backend.reconocer_con_cajas(lienzo, idioma=idioma, psm=psm, oem=oem)
+        inicios = np.array([y0 for _, y0, _ in colocaciones])
+
+        for palabra in resultado['palabras']:
+            centro = palabra['top'] + palabra['height'] / 2.0
+            k = int(np.searchsorted(inicios, centro, side='right')) - 1
+            if k < 0:
+                continue
+            indice, _, y_fin = colocaciones[k]
+            if centro > y_fin:
+                continue
+            palabras_celda.setdefault(indice, []).append(palabra)
+
+    textos = {}
+    for indice, palabras in palabras_celda.items():
+        # Orden de lectura dentro de la celda: por línea y luego por x
+        palabras.sort(key=lambda p: (p['block_num'], p['par_num'], p['line_num'], p['left']))
+        confs = [p['conf'] for p in palabras if p['conf'] >= 0]
+        textos[indice] = (' '.join(p['texto'] for p in palabras),
+                          sum(confs) / len(confs) if confs else -1.0)
+    return textos
+
+def reconocer_tablas(imagen, backend=None, idioma='eng', oem='3', psm='6', max_alto=4000):
+    """
+    Detectar y reconocer todas las tablas regladas de una página
+
+    Args:
+        imagen: PIL.Image o ndarray, ya enderezada
+        backend: Backend OCR (por defecto, obtener_backend())
+        idioma, oem, psm: Parámetros de Tesseract para las imágenes compuestas
+        max_alto: Alto máximo de cada imagen compuesta
+
+    Returns:
+        Lista de tablas (ver detectar_tablas); cada celda incluye 'texto' y
+        'conf', y cada tabla 'llamadas_ocr'
+    """
+    backend = backend or obtener_backend()
+    tablas, sin_reglas = detectar_tablas(imagen)
+
+    for tabla in tablas:
+        lienzos = componer_celdas(sin_reglas, tabla['celdas'], max_alto=max_alto)
+        textos = reconocer_celdas(lienzos, backend, idioma=idioma, psm=psm, oem=oem)
+        for indice, celda in enumerate(tabla['celdas']):
+            celda['texto'], celda['conf'] = textos.get(indice, ('', -1.0))
+        tabla['llamadas_ocr'] = len(lienzos)
+
+    return tablas
+
+def tabla_a_rejilla(tabla):
+    """
+    Colocar las celdas de una tabla reconocida en una rejilla
+
+    Las celdas combinadas ocupan la primera posición que cubren; las demás
+    quedan a None.
+
+    Returns:
+        Lista de filas (listas de dict o None) de tabla['filas'] x
+        tabla['columnas']
+    """
+    rejilla = [[None] * tabla['columnas'] for _ in range(tabla['filas'])]
+    for celda in tabla['celdas']:
+        rejilla[celda['fila']][celda['columna']] = celda
+    return rejilla
+
+def tabla_a_filas(tabla):
+    """
+    Convertir una tabla reconocida en filas de texto
+
+    Returns:
+        Lista de filas (listas de str) de tabla['filas'] x tabla['columnas']
+    """
+    return [[celda.get('texto', '') if celda else '' for celda in fila]
+            for fila in tabla_a_rejilla(tabla)]
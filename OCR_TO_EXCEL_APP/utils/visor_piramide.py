@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Vista previa con zoom y desplazamiento por teselas sobre tk.Canvas
+
+Solo se crean las teselas visibles, a partir del nivel de la pirámide
+(utils.piramide) más cercano al zoom. Las teselas ya creadas se reutilizan
+al desplazarse; al cambiar de zoom se generan las nuevas desde el nivel ya
+calculado, sin volver a decodificar la imagen.
+
+Ratón: rueda = zoom sobre el cursor, arrastrar = desplazar,
+doble clic = ajustar a la ventana.
+"""
+
+import math
+import threading
+import tkinter as tk
+from collections import OrderedDict
+
+class VisorPiramide(tk.Canvas):
+    """Canvas que muestra una PiramideImagen por teselas"""
+
+    def __init__(self, parent, tam_tesela=256, max_teselas=256, **opciones):
+        """
+        Args:
+            parent: Widget contenedor
+            tam_tesela: Lado de cada tesela en píxeles de pantalla
+            max_teselas: Teselas conservadas en memoria (LRU)
+            **opciones: Opciones de tk.Canvas
+        """
+        super().__init__(parent, **opciones)
+        self.tam_tesela = tam_tesela
+        self.max_teselas = max_teselas
+        self.piramide = None
+        self.zoom = 1.0
+        self.desp_x = 0
+        self.desp_y = 0
+        self.ajustada = True
+        self._teselas = OrderedDict()
+        self._dibujadas = {}
+        self._cargando = set()
+        self._arrastre = None
+
+        self.bind('<Configure>', self._al_redimensionar)
+        self.bind('<ButtonPress-1>', self._empezar_arrastre)
+        self.bind('<B1-Motion>', self._arrastrar)
+        self.bind('<Double-1>', lambda e: self.ajustar())
+        self.bind('<MouseWheel>', self._rueda)
+        self.bind('<Button-4>', lambda e: self._zoom_en(e.x, e.y, 1.25))
+        self.bind('<Button-5>', lambda e: self._zoom_en(e.x, e.y, 1 / 1.25))
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+
+    def mostrar(self, piramide):
+        """Mostrar una imagen ajustada a la ventana"""
+        self.piramide = piramide
+        self.limpiar()
+        self.ajustar()
+
+    def limpiar(self):
+        """Quitar la imagen y olvidar sus teselas"""
+        self.delete('tesela')
+        self.delete('aviso')
+        self._teselas.clear()
+        self._dibujadas.clear()
+
+    def ajustar(self):
+        """Zoom para ver la imagen completa, centrada"""
+        if self.piramide is None:
+            return
+        ancho, alto = self._tamano_ventana()
+        self.zoom = min(ancho / self.piramide.ancho, alto / self.piramide.alto, 1.0)
+        self.desp_x = (ancho - self.piramide.ancho * self.zoom) // 2
+        self.desp_y = (alto - self.piramide.alto * self.zoom) // 2
+        self.ajustada = True
+        self._redibujar()
+
+    # ------------------------------------------------------------------
+    # Eventos
+    # ------------------------------------------------------------------
+
+    def _tamano_ventana(self):
+        return max(self.winfo_width(), 1), max(self.winfo_height(), 1)
+
+    def _al_redimensionar(self, event):
+        if self.ajustada:
+            self.ajustar()
+        else:
+            self._renderizar()
+
+    def _empezar_arrastre(self, event):
+        self._arrastre = (event.x, event.y)
+
+    def _arrastrar(self, event):
+        if self._arrastre is None or self.piramide is None:
+            return
+        dx = event.x - self._arrastre[0]
+        dy = event.y - self._arrastre[1]
+        self._arrastre = (event.x, event.y)
+        self.desp_x += dx
+        self.desp_y += dy
+        self.ajustada = False
+        # Las teselas dibujadas se mueven; solo se crean las que entran
+        self.move('tesela', dx, dy)
+        self._renderizar()
+
+    def _rueda(self, event):
+        self._zoom_en(event.x, event.y, 1.25 if event.delta > 0 else 1 / 1.25)
+
+    def _zoom_en(self, x, y, factor):
+        """Cambiar el zoom manteniendo fijo el punto bajo el cursor"""
+        if self.piramide is None:
+            return
+        ancho, alto = self._tamano_ventana()
+        minimo = min(ancho / self.piramide.ancho, alto / self.piramide.alto, 1.0) / 2
+        zoom = min(max(self.zoom * factor, minimo), 8.0)
+        if zoom == self.zoom:
+            return
+
+        # Punto de la imagen original bajo el cursor
+        px = (x - self.desp_x) / self.zoom
+        py = (y - self.desp_y) / self.zoom
+        self.zoom = zoom
+        self.desp_x = round(x - px * zoom)
+        self.desp_y = round(y - py * zoom)
+        self.ajustada = False
+        self._redibujar()
+
+    # ------------------------------------------------------------------
+    # Teselas
+    # ------------------------------------------------------------------
+
+    def _redibujar(self):
+        """Volver a colocar todas las teselas (cambio de zoom o de ventana)"""
+        self.delete('tesela')
+        self._dibujadas.clear()
+        self._renderizar()
+
+    def _renderizar(self):
+        """Dibujar las teselas visibles que falten y quitar las que salen"""
+        if self.piramide is None:
+            return
+
+        nivel, _ = self.piramide.nivel_para(self.zoom)
+        if not self.piramide.tiene_nivel(nivel):
+            self._cargar_nivel(nivel)
+            return
+        self.delete('aviso')
+
+        ancho, alto = self._tamano_ventana()
+        tam = self.tam_tesela
+        total_x = math.ceil(self.piramide.ancho * self.zoom / tam)
+        total_y = math.ceil(self.piramide.alto * self.zoom / tam)
+        primera_x = max(0, int(-self.desp_x // tam))
+        primera_y = max(0, int(-self.desp_y // tam))
+        ultima_x = min(total_x - 1, int((ancho - self.desp_x) // tam))
+        ultima_y = min(total_y - 1, int((alto - self.desp_y) // tam))
+
+        visibles = set()
+        for ty in range(primera_y, ultima_y + 1):
+            for tx in range(primera_x, ultima_x + 1):
+                visibles.add((tx, ty))
+                if (tx, ty) in self._dibujadas:
+                    continue
+                imagen = self._tesela(tx, ty)
+                if imagen is None:
+                    continue
+                self._dibujadas[(tx, ty)] = self.create_image(
+                    self.desp_x + tx * tam, self.desp_y + ty * tam,
+                    anchor=tk.NW, image=imagen, tags=('tesela',))
+
+        for clave in [c for c in self._dibujadas if c not in visibles]:
+            self.delete(self._dibujadas.pop(clave))
+
+    def _tesela(self, tx, ty):
+        """PhotoImage de una tesela (memorizada por zoom y posición)"""
+        from PIL import ImageTk
+
+        clave = (self.zoom, tx, ty)
+        if clave in self._teselas:
+            self._teselas.move_to_end(clave)
+            return self._teselas[clave]
+
+        tam = self.tam_tesela
+        recorte = self.piramide.recorte(self.zoom, tx * tam, ty * tam, tam, tam)
+        imagen = ImageTk.PhotoImage(recorte) if recorte is not None else None
+
+        self._teselas[clave] = imagen
+        while len(self._teselas) > self.max_teselas:
+            self._teselas.popitem(last=False)
+        return imagen
+
+    def _cargar_nivel(self, nivel):
+        """Calcular un nivel en segundo plano y dibujar al terminar"""
+        if not self._dibujadas:
+            self.delete('aviso')
+            ancho, alto = self._tamano_ventana()
+            self.create_text(ancho // 2, alto // 2, text="Cargando vista previa...",
+                             fill='white', tags=('aviso',))
+        if nivel in self._cargando:
+            return
+        self._cargando.add(nivel)
+        piramide = self.piramide
+
+        def cargar():
+            try:
+                piramide.nivel(nivel)
+            except Exception as e:
+                print(f"Error generando vista previa: {e}")
+            self.after(0, lambda: terminar())
+
+        def terminar():
+            self._cargando.discard(nivel)
+            if self.piramide is piramide and piramide.tiene_nivel(nivel):
+                self._renderizar()
+
+        threading.Thread(target=cargar, daemon=True).start()